@@ -1,7 +1,9 @@
-from core.web_agent import WebAgent
+from core.web_agent import get_web_agent
 import os
 import json
 import logging
+import time
+import threading
 from datetime import datetime
 from supabase import create_client, Client
 from dotenv import load_dotenv
@@ -15,6 +17,19 @@ from core.auto_construction import AutoConstructionModule
 from core.evolution import EvolutionModule
 from core.self_correction import SelfCorrectionModule
 from core.json_utils import extract_json, safe_json_response, create_json_prompt, MISSION_INTERPRETATION_SCHEMA
+from core.llm_cache import get_llm_cache, normalize_prompt
+from core.llm_clients import get_client_registry
+from core.async_llm import gather_limited
+from core.async_runtime import get_runtime
+from core.semantic_cache import SemanticLLMCache, is_code_generation
+from core.llm_router import AdaptiveLLMRouter, CircuitOpen, call_class_scope, current_call_class
+from core.llm_hedging import LLMHedger
+from core.single_flight import SingleFlight, fingerprint
+from core.rate_limiter import get_rate_limiter, RateLimitExceeded
+from core.llm_streaming import stream_openai_compatible, stream_gemini, stream_ollama, JSONFieldStreamer
+from core.context_budget import pack_context, get_stats as get_context_stats
+from core.write_behind import get_write_behind
+from core.ttl_cache import TTLCache
 import ollama
 import google.generativeai as genai
 import re
@@ -24,14 +39,17 @@ from typing import Optional
 gemini_api_key = os.getenv('GEMINI_API_KEY')
 try:
     if gemini_api_key:
-        genai.configure(api_key=gemini_api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        # Aquece o modelo compartilhado do registro de clientes
+        model = get_client_registry().gemini_model(gemini_api_key, os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'))
         print("DEBUG: Conexão com o Gemini bem-sucedida.")
     else:
         print("ERRO: GEMINI_API_KEY não configurada.")
 except Exception as e:
     print(f"ERRO: Conexão com o Gemini falhou. {e}")
 
+# Prompts idênticos em andamento (loop proativo, evolução e /api/chat) compartilham uma única chamada
+llm_flight = SingleFlight("llm")
+
 # Configuração de logging
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -84,18 +102,39 @@ class NexoGenesisAgent:
         }
         # Manter a inicialização original do Supabase via get_supabase_client()
         self.supabase = get_supabase_client()
+        # Inserções (memória, tarefas, tentativas de evolução) vão em lote por uma fila em segundo plano
+        self.write_queue = get_write_behind(self.supabase)
         self.gemini_api_key = os.environ.get("GEMINI_API_KEY")
         self.openai_api_key = os.environ.get("OPENAI_API_KEY")
         self.search_module = InternetSearchModule() # Mantenha por enquanto
-        self.web_agent = WebAgent() # Novo WebAgent
+        # Navegador persistente compartilhado pelo processo (ex.: um agente por conexão websocket)
+        self.web_agent = get_web_agent()
         print("🌐 Agente de navegação web (Playwright) ativo.")
         self.groq_api_key = os.environ.get("GROQ_API_KEY")
         self.llm_provider = os.environ.get("NEXO_LLM_PROVIDER", "google")
+        self.gemini_model = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
+        self.openai_model = os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.groq_model = os.environ.get("GROQ_MODEL", "mixtral-8x7b-32768")
+        self.ollama_model = os.environ.get("OLLAMA_MODEL", "llama2")
+        # Cache persistente de respostas (evita reenviar prompts idênticos)
+        self.llm_cache = get_llm_cache()
+        # Sessões HTTP com keep-alive e modelos reutilizados para todos os provedores
+        self.clients = get_client_registry()
+        # Roteador adaptativo (latência, erros, cota e custo por provedor)
+        self.router = AdaptiveLLMRouter(preferred=self.llm_provider)
+        # Hedge opcional entre provedores para reduzir a latência de cauda (NEXO_LLM_HEDGING=1)
+        self.hedger = LLMHedger(self.router)
+        # Token buckets por provedor com fila de prioridade (interativo antes de fundo)
+        self.rate_limiter = get_rate_limiter()
+        # Cache semântico opcional para prompts quase idênticos (NEXO_SEMANTIC_CACHE=1)
+        self.semantic_cache = SemanticLLMCache()
+        # Tempo até o primeiro token das respostas em streaming, por provedor
+        self.stream_metrics = {}
 
         # Inicializar módulos de auto-construção, automação web e memória vetorial
         from core.vector_memory import VectorMemory
         self.vector_memory = VectorMemory()
-        self.auto_constructor = AutoConstructionModule(self.call_llm)
+        self.auto_constructor = AutoConstructionModule(self.call_llm, self.acall_llm)
         self.evolution_module = EvolutionModule(self)
         self.sentiment_analyzer = SentimentIntensityAnalyzer()
 
@@ -126,7 +165,7 @@ class NexoGenesisAgent:
                 "reason_for_failure": reason_for_failure,
                 "details": json.dumps(details, ensure_ascii=False) if details else None
             }
-            self.supabase.table(self.evolution_attempts_table).insert(data).execute()
+            self.write_queue.enqueue(self.evolution_attempts_table, data)
             print(f"📝 Tentativa de evolução registrada: ciclo {cycle_number}, sucesso: {success}")
         except Exception as e:
             print(f"Erro ao registrar tentativa de evolução: {e}")
@@ -193,6 +232,12 @@ CREATE TABLE evolution_attempts (
         self.agent_memory_table = "nexo_agent_memory"
         self.user_context_table = "nexo_user_context"
         self.proactive_tasks_table = "nexo_proactive_tasks"
+        # Cache read-through (TTL + LRU) das leituras de contexto e memória; gravações atualizam o cache
+        self.user_context_cache = TTLCache()
+        self.agent_memory_cache = TTLCache()
+        self.langchain_enabled = False
+        self._langchain_ready = False
+        self._langchain_lock = threading.Lock()
         self._ensure_tables_exist()
 
         # Fazer o NexoGenesis refletir sobre o feedback do usuário (simulado)
@@ -212,7 +257,8 @@ CREATE TABLE evolution_attempts (
                     # Exemplo de missão proativa: buscar oportunidades de mercado
                     proactive_mission = "Pesquisar oportunidades de receita e inovação para o sistema Nexo."
                     print(f"🤖 [Proativo] Iniciando missão automática: {proactive_mission}")
-                    result = self.process_mission(proactive_mission, user_id)
+                    with call_class_scope("background"):
+                        result = self.process_mission(proactive_mission, user_id)
                     print(f"🤖 [Proativo] Resultado da missão: {result}")
                     # Enviar mensagem automática (pode ser por e-mail, Telegram, etc.)
                     # Aqui apenas imprime, mas pode ser integrado com notificações reais
@@ -286,24 +332,31 @@ CREATE TABLE evolution_attempts (
             logger.warning("Supabase não inicializado. Não foi possível salvar na memória.")
             return
         try:
-            data, count = self.supabase.table(self.agent_memory_table).insert({
+            self.write_queue.enqueue(self.agent_memory_table, {
                 "agent_id": agent_id,
                 "key": key,
                 "value": json.dumps(value),
                 "timestamp": datetime.now().isoformat()
-            }).execute()
+            })
+            # A linha pode ainda estar na fila: o cache garante que a próxima leitura já a veja
+            self.agent_memory_cache.set((agent_id, key), json.dumps(value))
             logger.info(f"Salvo na memória do agente {agent_id}: {key}")
         except Exception as e:
             logger.error(f"Erro ao salvar na memória do agente: {e}")
 
-    def load_from_memory(self, agent_id: str, key: str) -> Optional[any]:
-        if not self.supabase:
-            logger.warning("Supabase não inicializado. Não foi possível carregar da memória.")
-            return None
-        try:
-            # --- Integração LangChain ---
-            self.langchain_enabled = False
+    def _ensure_langchain(self):
+        """Inicializa a integração LangChain uma única vez, no primeiro uso"""
+        if self._langchain_ready:
+            return self.langchain_enabled
+        with self._langchain_lock:
+            if self._langchain_ready:
+                return self.langchain_enabled
             try:
+                from langchain.llms import OpenAI as LangOpenAI
+                from langchain.llms import Ollama as LangOllama
+                from langchain.llms import GooglePalm as LangGemini
+                from langchain.agents import Tool
+                from langchain.memory import ConversationBufferMemory
                 self.langchain_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
                 self.langchain_tools = [
                     Tool(
@@ -326,6 +379,16 @@ CREATE TABLE evolution_attempts (
                 self.langchain_enabled = True
             except Exception as e:
                 print(f"Erro ao inicializar LangChain: {e}")
+            self._langchain_ready = True
+            return self.langchain_enabled
+
+    def load_from_memory(self, agent_id: str, key: str) -> Optional[any]:
+        if not self.supabase:
+            logger.warning("Supabase não inicializado. Não foi possível carregar da memória.")
+            return None
+        self._ensure_langchain()
+
+        def fetch():
             response = (
                 self.supabase.table(self.agent_memory_table)
                     .select("value")
@@ -335,9 +398,12 @@ CREATE TABLE evolution_attempts (
                     .limit(1)
                     .execute()
             )
-            if response.data:
-                return json.loads(response.data[0]["value"])
-            return None
+            return response.data[0]["value"] if response.data else None
+
+        try:
+            # O cache guarda o JSON bruto: cada chamada recebe um objeto novo
+            raw = self.agent_memory_cache.get_or_load((agent_id, key), fetch)
+            return json.loads(raw) if raw is not None else None
         except Exception as e:
             logger.error(f"Erro ao carregar da memória do agente: {e}")
             return None
@@ -353,15 +419,18 @@ CREATE TABLE evolution_attempts (
                 "context_data": json.dumps(context_data),
                 "last_updated": datetime.now().isoformat()
             }, on_conflict="user_id").execute()
+            self.user_context_cache.set(user_id, json.dumps(context_data))
             logger.info(f"Contexto do usuário {user_id} salvo/atualizado.")
         except Exception as e:
+            self.user_context_cache.invalidate(user_id)
             logger.error(f"Erro ao salvar contexto do usuário: {e}")
 
     def load_user_context(self, user_id: str) -> Optional[dict]:
         if not self.supabase:
             logger.warning("Supabase não inicializado. Não foi possível carregar contexto do usuário.")
             return None
-        try:
+
+        def fetch():
             response = (
                 self.supabase.table(self.user_context_table)
                 .select("context_data")
@@ -369,10 +438,12 @@ CREATE TABLE evolution_attempts (
                 .limit(1)
                 .execute()
             )
-            
-            if response.data:
-                return json.loads(response.data[0]["context_data"])
-            return None
+            return response.data[0]["context_data"] if response.data else None
+
+        try:
+            # Usuário recorrente: contexto servido do cache, sem ida ao Supabase
+            raw = self.user_context_cache.get_or_load(user_id, fetch)
+            return json.loads(raw) if raw is not None else None
         except Exception as e:
             logger.error(f"Erro ao carregar contexto do usuário: {e}")
             return None
@@ -380,51 +451,9 @@ CREATE TABLE evolution_attempts (
     def interpret_mission(self, user_message):
         """Interpreta uma missão em linguagem natural, agora com navegação web e reconhecimento de sentimento."""
         try:
-            # Análise de sentimento
-            sentiment = self.sentiment_analyzer.polarity_scores(user_message)
-            sentiment_label = "neutro"
-            if sentiment["compound"] >= 0.5:
-                sentiment_label = "positivo"
-            elif sentiment["compound"] <= -0.5:
-                sentiment_label = "negativo"
-            search_context = ""
-            # Lógica para usar a navegação web em vez da busca simples
-            if "pesquisar detalhadamente" in user_message.lower():
-                import asyncio
-                loop = asyncio.get_event_loop()
-                search_results = loop.run_until_complete(self.web_agent.search_and_extract(user_message, 2))
-                if search_results:
-                    search_context = f"\n\nInformações detalhadas da internet:\n{json.dumps(search_results, indent=2)}"
-            elif any(keyword in user_message.lower() for keyword in ["novo", "criar", "implementar", "desenvolver"]):
-                search_results = self.search_module.search_web(f"{user_message} implementation best practices", 2)
-                if search_results:
-                    search_context = f"\n\nInformações relevantes da internet:\n{json.dumps(search_results, indent=2)}"
-            instruction = f"""
-            Você é o Nexo Gênesis, um agente orquestrador do ecossistema EcoGuardians.
-            O sentimento do usuário é: {sentiment_label}
-            Sua personalidade atual é: {json.dumps(self.personality, ensure_ascii=False)}
-            Analise a seguinte missão do usuário e determine:
-            1. Que tipo de agente ou funcionalidade é necessária
-            2. Quais são os requisitos técnicos
-            3. Se já existe um agente que pode fazer isso
-            4. Qual seria o nome do novo agente (se necessário)
-            5. Se deve usar auto-construção avançada para implementações complexas
-            Missão: {user_message}{search_context}
-            """
-            prompt = create_json_prompt(instruction, MISSION_INTERPRETATION_SCHEMA)
-            response = self.call_llm(prompt, user_message)
-            # Usar função robusta de extração JSON
-            fallback = {
-                "action": "clarify",
-                "agent_name": "Assistente",
-                "description": "Agente de esclarecimento",
-                "requirements": [],
-                "response": f"Desculpe, houve um erro ao processar sua missão. Pode reformular?",
-                "use_auto_construction": False
-            }
-            
-            interpretation = safe_json_response(response, fallback)
-            return interpretation
+            prompt, semantic_text = self._mission_prompt(user_message)
+            response = self.call_llm(prompt, user_message, call_site="interpret_mission", semantic_text=semantic_text)
+            return self._parse_interpretation(response)
             
         except Exception as e:
             print(f"Erro ao interpretar missão: {e}")
@@ -433,62 +462,197 @@ CREATE TABLE evolution_attempts (
                 "response": f"Erro ao processar sua missão: {e}"
             }
 
-    def choose_llm_model(self, user_message):
+    def _mission_prompt(self, user_message):
+        """Monta o prompt de interpretação (sentimento, personalidade e contexto da internet) e o texto do cache semântico"""
+        # Análise de sentimento
+        sentiment = self.sentiment_analyzer.polarity_scores(user_message)
+        sentiment_label = "neutro"
+        if sentiment["compound"] >= 0.5:
+            sentiment_label = "positivo"
+        elif sentiment["compound"] <= -0.5:
+            sentiment_label = "negativo"
+        search_context = ""
+        # Lógica para usar a navegação web em vez da busca simples
+        if "pesquisar detalhadamente" in user_message.lower():
+            # O WebAgent vive no loop compartilhado; esta thread só aguarda o resultado
+            search_results = get_runtime().run(self.web_agent.search_and_extract(user_message, 2), timeout=90)
+            if search_results:
+                search_context = f"\n\nInformações detalhadas da internet:\n{pack_context(search_results, user_message, 'interpret_mission')}"
+        elif any(keyword in user_message.lower() for keyword in ["novo", "criar", "implementar", "desenvolver"]):
+            search_results = self.search_module.search_web(f"{user_message} implementation best practices", 2)
+            if search_results:
+                search_context = f"\n\nInformações relevantes da internet:\n{pack_context(search_results, user_message, 'interpret_mission')}"
+        instruction = f"""
+        Você é o Nexo Gênesis, um agente orquestrador do ecossistema EcoGuardians.
+        O sentimento do usuário é: {sentiment_label}
+        Sua personalidade atual é: {json.dumps(self.personality, ensure_ascii=False)}
+        Analise a seguinte missão do usuário e determine:
+        1. Que tipo de agente ou funcionalidade é necessária
+        2. Quais são os requisitos técnicos
+        3. Se já existe um agente que pode fazer isso
+        4. Qual seria o nome do novo agente (se necessário)
+        5. Se deve usar auto-construção avançada para implementações complexas
+        Missão: {user_message}{search_context}
         """
-        Escolhe o modelo LLM a ser usado com base na mensagem do usuário e na configuração.
-        Prioriza LLMs pagos para tarefas críticas e LLMs de código aberto para rotinas ou fallback.
+        prompt = create_json_prompt(instruction, MISSION_INTERPRETATION_SCHEMA)
+        semantic_text = f"{sentiment_label} {json.dumps(self.personality, ensure_ascii=False)} {user_message}"
+        return prompt, semantic_text
+
+    def _parse_interpretation(self, response):
+        """Extrai a interpretação da resposta do LLM (com fallback de esclarecimento)"""
+        # Usar função robusta de extração JSON
+        fallback = {
+            "action": "clarify",
+            "agent_name": "Assistente",
+            "description": "Agente de esclarecimento",
+            "requirements": [],
+            "response": f"Desculpe, houve um erro ao processar sua missão. Pode reformular?",
+            "use_auto_construction": False
+        }
+        return safe_json_response(response, fallback)
+
+    def classify_call(self, user_message="", prompt=""):
         """
-        # Lógica de priorização e fallback
-        if "urgente" in user_message.lower() or "estratégia" in user_message.lower():
-            if self.openai_api_key: return "openai"
-            if self.gemini_api_key: return "google"
-            if self.groq_api_key: return "groq"
-            return "ollama" # Fallback para Ollama se não houver chaves pagas
-        elif "informação básica" in user_message.lower() or "rotina" in user_message.lower():
-            return "ollama" # Prioriza Ollama para tarefas leves
-        else:
-            # Padrão: usa o provedor configurado, com fallback para outros pagos e depois Ollama
-            if self.llm_provider == "google" and self.gemini_api_key: return "google"
-            if self.llm_provider == "openai" and self.openai_api_key: return "openai"
-            if self.llm_provider == "groq" and self.groq_api_key: return "groq"
-            return "ollama" # Fallback final para Ollama
-
-    def call_llm(self, prompt, user_message=""):
-        """Chama o LLM configurado com lógica de fallback"""
-        chosen_llm = self.choose_llm_model(user_message)
-        
-        try:
-            if chosen_llm == "google":
-                return self.call_gemini(prompt)
-            elif chosen_llm == "openai":
-                return self.call_openai(prompt)
-            elif chosen_llm == "groq":
-                return self.call_groq(prompt)
-            elif chosen_llm == "ollama":
-                return self.call_ollama(prompt)
-            else:
-                return '{"action": "error", "response": "Nenhum LLM configurado adequadamente ou disponível."}'
-        except Exception as e:
-            # Em caso de falha do LLM escolhido, tenta um fallback
-            print(f"Erro ao chamar {chosen_llm}: {e}. Tentando fallback...")
-            if chosen_llm != "ollama": # Se o erro não foi no Ollama, tenta Ollama como fallback
+        Define a classe da chamada usada pelo roteador:
+        critical (urgente/estratégia), background (rotina e loops), code (geração de código) ou interactive.
+        """
+        message = (user_message or "").lower()
+        if "urgente" in message or "estratégia" in message:
+            return "critical"
+        if "informação básica" in message or "rotina" in message:
+            return "background"
+        if prompt and is_code_generation(prompt):
+            return "code"
+        return current_call_class() or "interactive"
+
+    def available_llm_providers(self):
+        """
+        Provedores com credenciais configuradas. Ollama só entra se o servidor local responder
+        (custo zero o colocaria em primeiro nas chamadas de fundo) ou se não houver outro provedor.
+        """
+        providers = []
+        if self.gemini_api_key: providers.append("google")
+        if self.openai_api_key: providers.append("openai")
+        if self.groq_api_key: providers.append("groq")
+        if not providers or self.clients.ollama_reachable():
+            providers.append("ollama")
+        return providers
+
+    def choose_llm_model(self, user_message, prompt=""):
+        """
+        Escolhe o provedor pelo roteador adaptativo: o mais barato que atende ao SLO de latência
+        da classe da chamada, ignorando provedores com circuit breaker aberto ou cota esgotada.
+        """
+        return self.router.choose(self.classify_call(user_message, prompt), self.available_llm_providers())
+
+    def get_routing_decisions(self, limit=20):
+        """Retorna as últimas decisões do roteador e o estado de cada provedor"""
+        return {
+            "decisions": self.router.get_decisions(limit),
+            "providers": self.router.snapshot()
+        }
+
+    def call_llm(self, prompt, user_message="", use_cache=True, call_site=None, semantic_text=None):
+        """
+        Chama o LLM configurado com lógica de fallback.
+        use_cache=False ignora os caches; call_site ativa o cache semântico para aquele ponto de chamada,
+        comparando semantic_text (ou o próprio prompt) com prompts anteriores.
+        """
+        key = fingerprint(
+            "llm", normalize_prompt(prompt), self.classify_call(user_message, prompt),
+            use_cache, call_site, semantic_text
+        )
+        return llm_flight.do(key, lambda: self._call_llm_once(prompt, user_message, use_cache, call_site, semantic_text))
+
+    def _call_llm_once(self, prompt, user_message="", use_cache=True, call_site=None, semantic_text=None):
+        """Execução única de call_llm (consulta o cache semântico, chama o provedor e armazena)"""
+        if use_cache and call_site:
+            cached = self.semantic_cache.lookup(call_site, semantic_text or prompt, prompt)
+            if cached is not None:
+                return cached
+        response = self._dispatch_llm(prompt, user_message, use_cache, call_site)
+        if use_cache and call_site and '"action": "error"' not in response[:40]:
+            self.semantic_cache.store(call_site, semantic_text or prompt, response, prompt)
+        return response
+
+    async def acall_llm(self, prompt, user_message="", use_cache=True, call_site=None, semantic_text=None):
+        """
+        Variante assíncrona de call_llm. Os SDKs dos provedores são bloqueantes,
+        então a chamada roda em thread sem bloquear o event loop.
+        """
+        import asyncio
+        return await asyncio.to_thread(self.call_llm, prompt, user_message, use_cache, call_site, semantic_text)
+
+    async def acall_many(self, prompts, user_message="", limit=4):
+        """Dispara vários prompts independentes em paralelo (no máximo `limit` simultâneos)"""
+        return await gather_limited(
+            [lambda p=p: self.acall_llm(p, user_message) for p in prompts],
+            limit=limit
+        )
+
+    def _dispatch_llm(self, prompt, user_message="", use_cache=True, call_site=None):
+        """Chama os provedores na ordem definida pelo roteador, com hedge opcional e fallback automático"""
+        callers = {
+            "google": self.call_gemini,
+            "openai": self.call_openai,
+            "groq": self.call_groq,
+            "ollama": self.call_ollama
+        }
+        providers = {name: (lambda p, fn=callers[name]: fn(p, use_cache)) for name in self.available_llm_providers()}
+        call_class = self.classify_call(user_message, prompt)
+        # A classe define a prioridade na fila do limitador de taxa de cada provedor
+        with call_class_scope(call_class):
+            if len(providers) > 1 and self.hedger.should_hedge(prompt, call_class, call_site):
+                order = self.router.rank(call_class, list(providers))
                 try:
-                    return self.call_ollama(prompt)
-                except Exception as ollama_e:
-                    return f'{{"action": "error", "response": "Erro ao chamar LLM e fallback: {e}, {ollama_e}"}}'
-            return f'{{"action": "error", "response": "Erro ao chamar LLM: {e}"}}'
+                    _provider, response = self.hedger.call(prompt, providers, order)
+                    return response
+                except Exception as e:
+                    print(f"Hedge entre {order[:2]} falhou: {e}. Tentando demais provedores...")
+                    providers = {name: fn for name, fn in providers.items() if name not in order[:2]} or providers
+            try:
+                # A latência é medida dentro de cada call_* (respostas do cache não contam)
+                _provider, response = self.router.call(prompt, providers, call_class, measure=False)
+                return response
+            except Exception as e:
+                return f'{{"action": "error", "response": "Erro ao chamar LLM: {e}"}}'
+
+    def get_llm_metrics(self):
+        """Retorna as métricas da camada de LLM (caches, hedge, coalescência, limitador de taxa e orçamento de contexto) e dos caches de contexto e memória"""
+        return {
+            "exact": self.llm_cache.get_stats(),
+            "semantic": self.semantic_cache.get_metrics(),
+            "hedging": self.hedger.get_metrics(),
+            "single_flight": llm_flight.get_stats(),
+            "rate_limiter": self.rate_limiter.get_metrics(),
+            "streaming": self.stream_metrics,
+            "context_budget": get_context_stats(),
+            "user_context_cache": self.user_context_cache.get_stats(),
+            "agent_memory_cache": self.agent_memory_cache.get_stats()
+        }
+
+    def _cached_provider_call(self, provider, model, prompt, request, use_cache=True):
+        """
+        Serve a resposta do cache ou chama o provedor: aguarda a vez no limitador de taxa
+        e registra latência e erros no roteador
+        """
+        def limited_request():
+            tokens = len(prompt) // 4 + 1000  # prompt + max_tokens da resposta
+            self.rate_limiter.acquire(provider, tokens, current_call_class())
+            return self.router.track(provider, request, len(prompt) // 4)
+        return self.llm_cache.get_or_call(provider, model, prompt, limited_request, use_cache)
 
-    def call_gemini(self, prompt):
+    def call_gemini(self, prompt, use_cache=True):
         """Chama a API do Google Gemini"""
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY não configurada.")
-        import google.generativeai as genai
-        genai.configure(api_key=self.gemini_api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text
+        def request():
+            model = self.clients.gemini_model(self.gemini_api_key, self.gemini_model)
+            response = model.generate_content(prompt)
+            return response.text
+        return self._cached_provider_call("google", self.gemini_model, prompt, request, use_cache)
 
-    def call_openai(self, prompt):
+    def call_openai(self, prompt, use_cache=True):
         """Chama a API da OpenAI"""
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY não configurada.")
@@ -500,19 +664,21 @@ CREATE TABLE evolution_attempts (
         }
         
         payload = {
-            "model": "gpt-3.5-turbo", # Pode ser configurado para gpt-4 ou outro
+            "model": self.openai_model, # Pode ser configurado para gpt-4 ou outro
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": 1000
         }
         
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            raise Exception(f"Erro na API OpenAI: {response.status_code} - {response.text}")
+        def request():
+            response = self.clients.post("openai", url, json=payload, headers=headers)
+            if response.status_code == 200:
+                result = response.json()
+                return result["choices"][0]["message"]["content"]
+            else:
+                raise Exception(f"Erro na API OpenAI: {response.status_code} - {response.text}")
+        return self._cached_provider_call("openai", self.openai_model, prompt, request, use_cache)
 
-    def call_groq(self, prompt):
+    def call_groq(self, prompt, use_cache=True):
         """Chama a API do Groq"""
         if not self.groq_api_key:
             raise ValueError("GROQ_API_KEY não configurada.")
@@ -524,30 +690,113 @@ CREATE TABLE evolution_attempts (
         }
         
         payload = {
-            "model": "mixtral-8x7b-32768", # Modelo Groq, pode ser alterado
+            "model": self.groq_model, # Modelo Groq, pode ser alterado
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": 1000
         }
         
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            raise Exception(f"Erro na API Groq: {response.status_code} - {response.text}")
+        def request():
+            response = self.clients.post("groq", url, json=payload, headers=headers)
+            if response.status_code == 200:
+                result = response.json()
+                return result["choices"][0]["message"]["content"]
+            else:
+                raise Exception(f"Erro na API Groq: {response.status_code} - {response.text}")
+        return self._cached_provider_call("groq", self.groq_model, prompt, request, use_cache)
 
-    def call_ollama(self, prompt):
+    def call_ollama(self, prompt, use_cache=True):
         """Chama a API do Ollama (assumindo que o servidor Ollama está rodando localmente ou acessível)"""
-        try:
-            # Para usar Ollama, você precisa ter o servidor Ollama rodando e um modelo puxado (ex: ollama pull llama2)
-            # O modelo padrão aqui é 'llama2', mas pode ser configurado via variável de ambiente ou parâmetro.
-            ollama_model = os.environ.get("OLLAMA_MODEL", "llama2")
-            
-            # A chamada ao Ollama é síncrona por padrão na biblioteca Python
-            response = ollama.chat(model=ollama_model, messages=[{'role': 'user', 'content': prompt}])
-            return response["message"]["content"]
-        except Exception as e:
-            raise Exception(f"Erro na API Ollama: {e}. Certifique-se de que o servidor Ollama está rodando e o modelo '{ollama_model}' está disponível.")
+        # Para usar Ollama, você precisa ter o servidor Ollama rodando e um modelo puxado (ex: ollama pull llama2)
+        # O modelo padrão aqui é 'llama2', mas pode ser configurado via variável de ambiente OLLAMA_MODEL.
+        ollama_model = self.ollama_model
+        def request():
+            try:
+                # A chamada ao Ollama é síncrona por padrão na biblioteca Python
+                response = self.clients.ollama_client().chat(model=ollama_model, messages=[{'role': 'user', 'content': prompt}])
+                return response["message"]["content"]
+            except Exception as e:
+                raise Exception(f"Erro na API Ollama: {e}. Certifique-se de que o servidor Ollama está rodando e o modelo '{ollama_model}' está disponível.")
+        return self._cached_provider_call("ollama", ollama_model, prompt, request, use_cache)
+
+    def _provider_stream(self, provider, prompt):
+        """Abre o streaming de tokens no provedor indicado"""
+        if provider == "google":
+            if not self.gemini_api_key:
+                raise ValueError("GEMINI_API_KEY não configurada.")
+            return stream_gemini(self.clients.gemini_model(self.gemini_api_key, self.gemini_model), prompt)
+        if provider == "ollama":
+            return stream_ollama(self.clients.ollama_client(), self.ollama_model, prompt)
+        api_key, url, model = {
+            "openai": (self.openai_api_key, "https://api.openai.com/v1/chat/completions", self.openai_model),
+            "groq": (self.groq_api_key, "https://api.groq.com/openai/v1/chat/completions", self.groq_model),
+        }[provider]
+        if not api_key:
+            raise ValueError(f"Chave da API de {provider} não configurada.")
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": 1000,
+            "stream": True
+        }
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        return stream_openai_compatible(self.clients.post(provider, url, json=payload, headers=headers, stream=True))
+
+    def stream_llm(self, prompt, user_message="", use_cache=True):
+        """
+        Variante em streaming de call_llm: gera os trechos de texto conforme chegam do provedor.
+        Respostas em cache saem de uma vez; a resposta completa é gravada no cache ao final.
+        O fallback para o próximo provedor só ocorre se nenhum trecho tiver sido enviado.
+        """
+        call_class = self.classify_call(user_message, prompt)
+        order = self.router.rank(call_class, self.available_llm_providers())
+        models = {"google": self.gemini_model, "openai": self.openai_model, "groq": self.groq_model, "ollama": self.ollama_model}
+        if use_cache:
+            for provider in order:
+                cached = self.llm_cache.get(provider, models[provider], prompt)
+                if cached is not None:
+                    yield cached
+                    return
+
+        last_error = None
+        for provider in order:
+            chunks = []
+            try:
+                self.rate_limiter.acquire(provider, len(prompt) // 4 + 1000, call_class)
+                self.router.claim(provider)
+            except (CircuitOpen, RateLimitExceeded) as e:
+                # Provedor em teste por outra chamada ou fila local cheia: não é falha do provedor
+                print(f"Streaming com {provider} adiado: {e}. Tentando próximo provedor...")
+                last_error = e
+                continue
+            start = time.perf_counter()
+            try:
+                for chunk in self._provider_stream(provider, prompt):
+                    if not chunks:
+                        self._record_first_token(provider, time.perf_counter() - start)
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                self.router.record(provider, time.perf_counter() - start, False)
+                if chunks:
+                    # Parte da resposta já foi entregue: não mistura com a de outro provedor
+                    raise
+                print(f"Streaming com {provider} falhou: {e}. Tentando próximo provedor...")
+                last_error = e
+                continue
+            response = "".join(chunks)
+            self.router.record(provider, time.perf_counter() - start, True, len(prompt) // 4 + len(response) // 4)
+            if response and use_cache:
+                self.llm_cache.set(provider, models[provider], prompt, response)
+            return
+        raise RuntimeError(f"Nenhum provedor disponível para streaming: {last_error}")
+
+    def _record_first_token(self, provider, ttft):
+        """Acumula o tempo até o primeiro token por provedor"""
+        stats = self.stream_metrics.setdefault(provider, {"streams": 0, "total_ttft": 0.0, "max_ttft": 0.0})
+        stats["streams"] += 1
+        stats["total_ttft"] += ttft
+        stats["max_ttft"] = max(stats["max_ttft"], ttft)
+        stats["avg_ttft"] = round(stats["total_ttft"] / stats["streams"], 4)
 
     def create_agent(self, agent_name, description, requirements):
         """Cria um novo agente baseado nas especificações"""
@@ -624,67 +873,129 @@ CREATE TABLE evolution_attempts (
 
             # Interpretar missão
             interpretation = self.interpret_mission(user_message)
-            response_text = interpretation.get("response", "Processando sua missão...")
-
-            # Lógica de auto-correção proativa
-            erro_detectado = False
-            if "erro" in response_text.lower() or "falha" in response_text.lower():
-                erro_detectado = True
-                self.self_correction_module.log_error(
-                    error_type="Erro detectado na missão",
-                    description=response_text,
-                    context={"user_message": user_message, "timestamp": datetime.now().isoformat()}
-                )
-                self.self_correction_module.reflect_on_performance(
-                    user_feedback=response_text,
-                    current_context={"user_message": user_message, "timestamp": datetime.now().isoformat()}
-                )
-                # Acionar auto-construção para correção
-                response_text += "\n\n🔧 Iniciando auto-correção proativa..."
-                construction_result = self.auto_constructor.auto_construct_feature(f"Corrija: {user_message}")
-                if construction_result["success"]:
-                    response_text += f"\n✅ Auto-correção concluída!"
-                else:
-                    response_text += f"\n❌ Falha na auto-correção: {construction_result.get('reason', 'Erro desconhecido')}"
-
-            # Fluxo normal de criação de agente ou auto-construção
-            if interpretation.get("action") == "create_agent":
-                agent_result = self.create_agent(
-                    interpretation.get("agent_name"),
-                    interpretation.get("description"),
-                    interpretation.get("requirements")
-                )
-                if agent_result["success"]:
-                    response_text += "\n\n✅ " + agent_result.get("message", "")
-                else:
-                    response_text += "\n\n❌ " + agent_result.get("message", "Erro desconhecido")
-
-            elif interpretation.get("action") == "auto_construct" or interpretation.get("use_auto_construction"):
-                response_text += "\n\n🛠️ Iniciando auto-construção avançada..."
-                construction_result = self.auto_constructor.auto_construct_feature(user_message)
-                if construction_result["success"]:
-                    response_text += f"\n\n✅ Auto-construção concluída com sucesso!"
-                    response_text += f"\n📁 Arquivos criados: {len(construction_result.get('code', {}).get('files', {}))}"
-                    response_text += f"\n🔧 Deploy realizado: {construction_result.get('deployment', {}).get('status', 'N/A')}"
-                else:
-                    response_text += f"\n\n❌ Auto-construção falhou: {construction_result.get('reason', 'Erro desconhecido')}"
-
-            # Salvar contexto atualizado
-            user_context["history"].append({"role": "nexo", "content": response_text, "timestamp": datetime.now().isoformat()})
-            self.save_user_context(user_id, user_context)
-
-            # Verificar proatividade após processar a mensagem
-            self.check_for_proactive_tasks(user_id, user_message, response_text)
-
-            # Atualizar personalidade com base na mensagem do usuário
-            self.update_personality(user_message)
-
-            return response_text
+            return self._complete_mission(user_message, user_id, user_context, interpretation)
 
         except Exception as e:
             logger.error(f"Erro ao processar missão: {e}")
             return f"Erro ao processar missão: {e}"
 
+    def process_mission_stream(self, user_message, user_id: str = "default_user"):
+        """
+        Variante em streaming de process_mission: o campo "response" da interpretação é
+        enviado conforme o LLM gera os tokens; o que o pós-processamento acrescentar
+        (auto-correção, criação de agente, auto-construção) sai no final.
+        """
+        logger.info(f"NexoGenesis processando missão (streaming) de {user_id}: {user_message}")
+        # --- Orquestração CrewAI ---
+        try:
+            crew = self.iniciar_crewai()
+            resultado = crew.kickoff()
+            yield f"[CrewAI] Resultado colaborativo: {resultado}"
+            return
+        except Exception as e:
+            print(f"Erro CrewAI: {e}")
+
+        # Carregar contexto do usuário
+        user_context = self.load_user_context(user_id) or {"history": []}
+        user_context["history"].append({"role": "user", "content": user_message, "timestamp": datetime.now().isoformat()})
+
+        streamed = ""
+        try:
+            prompt, semantic_text = self._mission_prompt(user_message)
+            response = self.semantic_cache.lookup("interpret_mission", semantic_text, prompt)
+            if response is None:
+                extractor = JSONFieldStreamer("response")
+                chunks = []
+                for chunk in self.stream_llm(prompt, user_message):
+                    chunks.append(chunk)
+                    text = extractor.feed(chunk)
+                    if text:
+                        streamed += text
+                        yield text
+                response = "".join(chunks)
+                if '"action": "error"' not in response[:40]:
+                    self.semantic_cache.store("interpret_mission", semantic_text, response, prompt)
+            interpretation = self._parse_interpretation(response)
+        except Exception as e:
+            print(f"Erro ao interpretar missão: {e}")
+            interpretation = {
+                "action": "error",
+                "response": f"Erro ao processar sua missão: {e}"
+            }
+
+        try:
+            response_text = self._complete_mission(user_message, user_id, user_context, interpretation)
+        except Exception as e:
+            logger.error(f"Erro ao processar missão: {e}")
+            response_text = f"Erro ao processar missão: {e}"
+
+        # Envia só o que ainda não saiu no streaming
+        if response_text.startswith(streamed):
+            rest = response_text[len(streamed):]
+        else:
+            rest = ("\n\n" if streamed else "") + response_text
+        if rest:
+            yield rest
+
+    def _complete_mission(self, user_message, user_id, user_context, interpretation):
+        """Aplica a interpretação (auto-correção, criação de agente, auto-construção) e salva o contexto"""
+        response_text = interpretation.get("response", "Processando sua missão...")
+
+        # Lógica de auto-correção proativa
+        erro_detectado = False
+        if "erro" in response_text.lower() or "falha" in response_text.lower():
+            erro_detectado = True
+            self.self_correction_module.log_error(
+                error_type="Erro detectado na missão",
+                description=response_text,
+                context={"user_message": user_message, "timestamp": datetime.now().isoformat()}
+            )
+            self.self_correction_module.reflect_on_performance(
+                user_feedback=response_text,
+                current_context={"user_message": user_message, "timestamp": datetime.now().isoformat()}
+            )
+            # Acionar auto-construção para correção
+            response_text += "\n\n🔧 Iniciando auto-correção proativa..."
+            construction_result = self.auto_constructor.auto_construct_feature(f"Corrija: {user_message}")
+            if construction_result["success"]:
+                response_text += f"\n✅ Auto-correção concluída!"
+            else:
+                response_text += f"\n❌ Falha na auto-correção: {construction_result.get('reason', 'Erro desconhecido')}"
+
+        # Fluxo normal de criação de agente ou auto-construção
+        if interpretation.get("action") == "create_agent":
+            agent_result = self.create_agent(
+                interpretation.get("agent_name"),
+                interpretation.get("description"),
+                interpretation.get("requirements")
+            )
+            if agent_result["success"]:
+                response_text += "\n\n✅ " + agent_result.get("message", "")
+            else:
+                response_text += "\n\n❌ " + agent_result.get("message", "Erro desconhecido")
+
+        elif interpretation.get("action") == "auto_construct" or interpretation.get("use_auto_construction"):
+            response_text += "\n\n🛠️ Iniciando auto-construção avançada..."
+            construction_result = self.auto_constructor.auto_construct_feature(user_message)
+            if construction_result["success"]:
+                response_text += f"\n\n✅ Auto-construção concluída com sucesso!"
+                response_text += f"\n📁 Arquivos criados: {len(construction_result.get('code', {}).get('files', {}))}"
+                response_text += f"\n🔧 Deploy realizado: {construction_result.get('deployment', {}).get('status', 'N/A')}"
+            else:
+                response_text += f"\n\n❌ Auto-construção falhou: {construction_result.get('reason', 'Erro desconhecido')}"
+
+        # Salvar contexto atualizado
+        user_context["history"].append({"role": "nexo", "content": response_text, "timestamp": datetime.now().isoformat()})
+        self.save_user_context(user_id, user_context)
+
+        # Verificar proatividade após processar a mensagem
+        self.check_for_proactive_tasks(user_id, user_message, response_text)
+
+        # Atualizar personalidade com base na mensagem do usuário
+        self.update_personality(user_message)
+
+        return response_text
+
     def update_personality(self, user_message):
         """Evolui a personalidade do Nexo conforme o estilo do usuário."""
         # Detecta gírias e tom descontraído
@@ -733,13 +1044,13 @@ CREATE TABLE evolution_attempts (
             logger.warning("Supabase não inicializado. Não foi possível agendar tarefa proativa.")
             return
         try:
-            data, count = self.supabase.table(self.proactive_tasks_table).insert({
+            self.write_queue.enqueue(self.proactive_tasks_table, {
                 "user_id": user_id,
                 "description": description,
                 "task_type": task_type,
                 "status": "pending",
                 "scheduled_at": datetime.now().isoformat()
-            }).execute()
+            })
             logger.info(f"Tarefa proativa agendada no Supabase para {user_id}: {description}")
         except Exception as e:
             logger.error(f"Erro ao agendar tarefa proativa: {e}")
@@ -834,7 +1145,7 @@ CREATE TABLE evolution_attempts (
         import uuid
         try:
             if self.supabase:
-                self.supabase.table("evolution_attempts").insert({
+                self.write_queue.enqueue("evolution_attempts", {
                     "id": str(uuid.uuid4()),
                     "timestamp": datetime.now().isoformat(),
                     "cycle_number": cycle_number,
@@ -843,7 +1154,7 @@ CREATE TABLE evolution_attempts (
                     "success": success,
                     "reason_for_failure": reason_for_failure,
                     "details": json.dumps(details, ensure_ascii=False)
-                }).execute()
+                })
                 print(f"🧬 Tentativa de evolução registrada no Supabase: ciclo {cycle_number}")
         except Exception as e:
             print(f"Erro ao registrar tentativa de evolução: {e}")
@@ -6,10 +6,17 @@ import os
 import json
 import logging
 from datetime import datetime
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context
 from dotenv import load_dotenv
 import ollama
 
+from core.llm_router import call_class_scope
+from core.llm_streaming import sse_event
+from core.http_cache import get_http_cache
+from core.search_index import get_search_index
+from core.crawl_scheduler import get_crawl_scheduler
+from core.write_behind import get_write_behind
+
 # Importar módulos do Nexo
 try:
     from agentes.NexoGenesis import NexoGenesisAgent
@@ -70,7 +77,7 @@ class NexoAPI:
 
             # Se o Nexo Genesis estiver disponível, usar ele
             if self.nexo_genesis:
-                response = self.nexo_genesis.processar_mensagem(message, user_id)
+                response = self.nexo_genesis.process_mission(message, user_id)
             elif llama_response:
                 response = f"[Llama] {llama_response}"
             else:
@@ -92,6 +99,25 @@ class NexoAPI:
                 'response': 'Desculpe, ocorreu um erro interno. Tente novamente.'
             }
     
+    def stream_message(self, message_data):
+        """
+        Gerar a resposta para o streaming (SSE) pelo mesmo pipeline de missões de process_message:
+        os tokens da resposta saem conforme o LLM os gera. Sem o Nexo Genesis, a resposta de
+        process_message é entregue em um único trecho.
+        """
+        if self.nexo_genesis:
+            message = message_data.get('message', '')
+            user_id = message_data.get('user_id', '')
+            logger.info(f"Processando mensagem (streaming) de {user_id}: {message[:50]}...")
+            with call_class_scope("interactive"):
+                yield from self.nexo_genesis.process_mission_stream(message, user_id)
+            return
+        with call_class_scope("interactive"):
+            result = self.process_message(message_data)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error', 'Erro ao processar mensagem'))
+        yield result['response']
+
     def generate_fallback_response(self, message):
         """Gerar resposta de fallback quando o Nexo Genesis não estiver disponível"""
         message_lower = message.lower()
@@ -168,6 +194,23 @@ nexo_api = NexoAPI()
 def register_api_routes(app):
     """Registrar rotas da API no Flask app"""
     
+    def stream_chat(data):
+        """Eventos SSE: {"delta": ...} por trecho e {"done": true, "response": ...} ao final"""
+        chunks = []
+        try:
+            for chunk in nexo_api.stream_message(data):
+                chunks.append(chunk)
+                yield sse_event({'delta': chunk})
+            yield sse_event({
+                'done': True,
+                'success': True,
+                'response': ''.join(chunks),
+                'timestamp': datetime.now().isoformat()
+            })
+        except Exception as e:
+            logger.error(f"Erro no streaming de chat: {e}")
+            yield sse_event({'error': 'Erro ao gerar resposta', 'response': ''.join(chunks)})
+
     @app.route('/api/chat', methods=['POST'])
     def chat_endpoint():
         """Endpoint para receber mensagens do bot do Telegram"""
@@ -180,8 +223,17 @@ def register_api_routes(app):
                     'error': 'Mensagem não fornecida'
                 }), 400
             
-            # Processar mensagem
-            result = nexo_api.process_message(data)
+            # Streaming (SSE): cada trecho é enviado assim que o provedor o gera
+            if data.get('stream'):
+                return Response(
+                    stream_with_context(stream_chat(data)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+                )
+
+            # Processar mensagem (prioridade interativa nas filas dos provedores)
+            with call_class_scope("interactive"):
+                result = nexo_api.process_message(data)
             
             return jsonify(result)
             
@@ -217,6 +269,20 @@ def register_api_routes(app):
             ]
         })
     
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics_endpoint():
+        """Endpoint com métricas da camada de LLM (caches, filas e limitadores de taxa), do cache HTTP, do índice de buscas, do ritmo de crawling e da fila de gravação no Supabase"""
+        if not nexo_api.nexo_genesis:
+            return jsonify({'error': 'Nexo Genesis não disponível'}), 503
+        return jsonify({
+            'llm': nexo_api.nexo_genesis.get_llm_metrics(),
+            'http_cache': get_http_cache().get_stats(),
+            'search_index': get_search_index().get_stats(),
+            'crawl': get_crawl_scheduler().get_stats(),
+            'write_behind': get_write_behind().get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    
     @app.route('/api/capabilities', methods=['GET'])
     def capabilities_endpoint():
         """Endpoint para listar capacidades do Nexo"""
@@ -5,7 +5,8 @@ Pode ser expandido para qualquer fonte externa.
 """
 import os
 import requests
-import google.generativeai as genai
+from core.llm_clients import get_client_registry
+from core.search_backend import get_search_backend
 
 class APISearch:
     def __init__(self):
@@ -13,8 +14,7 @@ class APISearch:
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_KEY")
-        if self.gemini_api_key:
-            genai.configure(api_key=self.gemini_api_key)
+        self.clients = get_client_registry()
 
     def search_google(self, query):
         # Exemplo: usar Google Custom Search API
@@ -22,16 +22,16 @@ class APISearch:
         cx = os.getenv("GOOGLE_CSE_ID")
         if not api_key or not cx:
             return "Google API Key ou CSE ID não configurados."
-        url = f"https://www.googleapis.com/customsearch/v1?q={query}&key={api_key}&cx={cx}"
-        resp = requests.get(url)
-        if resp.status_code == 200:
-            return resp.json()
-        return f"Erro Google Search: {resp.text}"
+        # Backend compartilhado (cache HTTP e ritmo por host); mantém o formato {"items": [...]}
+        try:
+            return {"items": get_search_backend(api_key, cx).search(query)}
+        except Exception as e:
+            return f"Erro Google Search: {e}"
 
     def search_gemini(self, prompt):
         if not self.gemini_api_key:
             return "GEMINI_API_KEY não configurada."
-        model = genai.GenerativeModel("gemini-1.5-flash")
+        model = self.clients.gemini_model(self.gemini_api_key, "gemini-1.5-flash")
         response = model.generate_content(prompt)
         return response.text
 
@@ -41,7 +41,7 @@ class APISearch:
         url = "https://api.openai.com/v1/chat/completions"
         headers = {"Authorization": f"Bearer {self.openai_api_key}", "Content-Type": "application/json"}
         payload = {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": prompt}], "max_tokens": 1000}
-        resp = requests.post(url, json=payload, headers=headers)
+        resp = self.clients.post("openai", url, json=payload, headers=headers)
         if resp.status_code == 200:
             return resp.json()["choices"][0]["message"]["content"]
         return f"Erro OpenAI: {resp.text}"
@@ -0,0 +1,69 @@
+"""
+Utilitários assíncronos para chamadas de LLM.
+Permite disparar prompts independentes em paralelo a partir de um único
+event loop, com limite de concorrência, mantendo a API síncrona existente.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from core.async_runtime import get_runtime
+
+DEFAULT_CONCURRENCY = 4
+
+
+async def gather_limited(tasks, limit=DEFAULT_CONCURRENCY, return_exceptions=False):
+    """
+    Executa as tarefas com no máximo `limit` em andamento ao mesmo tempo.
+    Cada item pode ser um awaitable ou uma função sem argumentos que retorna um awaitable.
+    Os resultados são retornados na mesma ordem das tarefas.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(task):
+        async with semaphore:
+            return await (task() if callable(task) else task)
+
+    return await asyncio.gather(*(run(task) for task in tasks), return_exceptions=return_exceptions)
+
+
+def make_async(fn):
+    """
+    Converte uma função síncrona (ex.: llm_caller) em corrotina executada em thread
+    """
+    if asyncio.iscoroutinefunction(fn):
+        return fn
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def run_sync(coro, timeout=None):
+    """
+    Executa uma corrotina a partir de código síncrono no loop compartilhado (core.async_runtime),
+    sem criar um event loop por chamada.
+    Se esta thread já estiver rodando um loop (código síncrono chamado de dentro de uma corrotina),
+    usa uma thread auxiliar para não bloquear o próprio loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return get_runtime().run(coro, timeout)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result(timeout)
+
+
+if __name__ == "__main__":
+    # Teste do módulo
+    import time
+
+    def llm_lento(prompt, context=""):
+        time.sleep(0.5)
+        return f"resposta para {prompt}"
+
+    allm = make_async(llm_lento)
+    start = time.perf_counter()
+    results = run_sync(gather_limited([lambda i=i: allm(f"prompt {i}") for i in range(4)], limit=4))
+    print(results, f"{time.perf_counter() - start:.2f}s")
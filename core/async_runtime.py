@@ -0,0 +1,178 @@
+"""
+Runtime assíncrono compartilhado.
+Um único event loop roda em uma thread de fundo; código síncrono (rotas Flask,
+threads de automação, loop de evolução) envia corrotinas para ele com submit()
+ou run(), sem criar um loop por chamada. Subsistemas assíncronos presos a um
+loop (WebAgent/Playwright, clientes async) vivem sempre neste mesmo loop.
+"""
+import atexit
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class AsyncRuntime:
+    """
+    Event loop dedicado em thread daemon
+    - submit(coro) -> concurrent.futures.Future (thread-safe)
+    - run(coro, timeout) bloqueia a thread chamadora até o resultado
+    - register_shutdown(fn) agenda finalizadores assíncronos (ex.: WebAgent.close)
+    """
+
+    def __init__(self, name="nexo-async"):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._shutdown_callbacks = []
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _run_loop(self, loop, started):
+        asyncio.set_event_loop(loop)
+        started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def start(self):
+        """
+        Inicia o loop de fundo (idempotente)
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(loop, started), name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+            return loop
+
+    @property
+    def loop(self):
+        return self.start()
+
+    def in_runtime_thread(self):
+        """
+        Indica se o código atual roda na thread do loop compartilhado
+        """
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def _count(self, metric):
+        with self._stats_lock:
+            self.stats[metric] += 1
+
+    def _done(self, future):
+        self._count("failed" if future.cancelled() or future.exception() else "completed")
+
+    def submit(self, coro):
+        """
+        Agenda a corrotina no loop compartilhado e retorna um concurrent.futures.Future
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        self._count("submitted")
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, coro, timeout=None):
+        """
+        Executa a corrotina no loop compartilhado e aguarda o resultado.
+        Dentro do próprio loop use `await`: bloquear aqui travaria o runtime.
+        """
+        if self.in_runtime_thread():
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run chamado dentro do loop compartilhado; use await.")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def register_shutdown(self, fn):
+        """
+        Registra uma função assíncrona sem argumentos chamada no encerramento
+        """
+        self._shutdown_callbacks.append(fn)
+
+    async def _run_shutdown_callbacks(self):
+        for fn in reversed(self._shutdown_callbacks):
+            try:
+                await fn()
+            except Exception as e:
+                print(f"Erro ao encerrar recurso assíncrono: {e}")
+
+    def shutdown(self, timeout=10):
+        """
+        Executa os finalizadores, cancela tarefas pendentes e para o loop
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._run_shutdown_callbacks(), loop).result(timeout)
+        except Exception as e:
+            print(f"Erro no encerramento do runtime assíncrono: {e}")
+
+        def stop():
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.stop()
+
+        loop.call_soon_threadsafe(stop)
+        thread.join(timeout)
+        with self._lock:
+            self._loop = None
+            self._thread = None
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return dict(stats, running=self._thread is not None and self._thread.is_alive())
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    """
+    Retorna o runtime assíncrono compartilhado pelo processo
+    """
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+            atexit.register(_runtime.shutdown)
+        return _runtime
+
+
+if __name__ == "__main__":
+    # Teste do módulo: 8 threads síncronas disparam corrotinas no mesmo loop
+    import time
+
+    runtime = get_runtime()
+
+    async def tarefa(i):
+        await asyncio.sleep(0.2)
+        return i, id(asyncio.get_running_loop())
+
+    start = time.perf_counter()
+    futures = [runtime.submit(tarefa(i)) for i in range(8)]
+    resultados = [f.result() for f in futures]
+    print(f"{len(resultados)} corrotinas em {time.perf_counter() - start:.2f}s,"
+          f" loops distintos: {len({loop for _, loop in resultados})}")
+
+    resultados = []
+    threads = [threading.Thread(target=lambda i=i: resultados.append(runtime.run(tarefa(i)))) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(sorted(r[0] for r in resultados), runtime.get_stats())
+    runtime.shutdown()
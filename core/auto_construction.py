@@ -41,13 +41,17 @@ class AutoConstructionModule:
         return script
 import os
 import json
+import asyncio
+import threading
 import subprocess
 from datetime import datetime
 from dotenv import load_dotenv
 from core.database import get_supabase_client
 from core.internet_search import InternetSearchModule
 from core.json_utils import extract_json, safe_json_response, create_json_prompt, ARCHITECTURE_SCHEMA, CODE_IMPLEMENTATION_SCHEMA, REVIEW_SCHEMA
+from core.context_budget import pack_context, compact_json
 from core.github_integration import GitHubIntegration
+from core.async_llm import gather_limited, make_async, run_sync
 
 load_dotenv()
 
@@ -57,11 +61,16 @@ class AutoConstructionModule:
     Pipeline: Architect AI → Coder AI → Reviewer AI → Deployer AI
     """
     
-    def __init__(self, llm_caller):
+    def __init__(self, llm_caller, async_llm_caller=None):
         self.supabase = get_supabase_client()
         self.search = InternetSearchModule()
         self.github = GitHubIntegration()
         self.llm_caller = llm_caller  # Referência para chamar LLMs
+        # Versão assíncrona do llm_caller para etapas independentes em paralelo
+        self.async_llm_caller = async_llm_caller or make_async(llm_caller)
+        self.max_concurrency = int(os.environ.get("NEXO_LLM_CONCURRENCY", 4))
+        # Deploy e commits não podem rodar em paralelo
+        self._deploy_lock = threading.Lock()
         self.construction_history = []
     
     def auto_construct_feature(self, feature_request):
@@ -76,15 +85,16 @@ class AutoConstructionModule:
             mercado_results = self.search.search_web(f"{feature_request} market analysis opportunities", 3)
             print(f"Resultados da pesquisa de mercado: {json.dumps(mercado_results, indent=2)}")
 
-            # 0.1 Análise e estudo proativo
+            # 0.1 Análise e estudo proativo + 1. Architect AI - Planejamento
+            # As duas etapas são independentes e rodam em paralelo no mesmo event loop
             print("📊 Analisando e estudando oportunidades...")
             estudo_prompt = f"Analise os resultados de mercado e gere oportunidades de receita e inovação para o sistema. Resultados: {json.dumps(mercado_results, indent=2)}"
-            estudo_result = self.llm_caller(estudo_prompt, feature_request)
+            estudo_result, architecture = run_sync(gather_limited([
+                lambda: self.async_llm_caller(estudo_prompt, feature_request),
+                lambda: asyncio.to_thread(self.architect_ai, feature_request)
+            ], limit=self.max_concurrency))
             print(f"Estudo/Oportunidades: {estudo_result}")
 
-            # 1. Architect AI - Planejamento
-            architecture = self.architect_ai(feature_request)
-
             # 2. Coder AI - Implementação
             code = self.coder_ai(architecture)
 
@@ -109,30 +119,31 @@ class AutoConstructionModule:
 
             # 4. Deployer AI - Deploy (se aprovado)
             if review["approved"]:
-                deployment = self.deployer_ai(code, architecture)
-                # 4.1 Gerar Dockerfile e script de deploy
-                dockerfile = self.gerar_dockerfile()
-                deploy_script = self.gerar_script_deploy()
-                # 5. Commit automático no GitHub
-                construction_result = {
-                    "success": True,
-                    "feature": feature_request,
-                    "architecture": architecture,
-                    "code": code,
-                    "review": review,
-                    "deployment": deployment,
-                    "dockerfile": dockerfile,
-                    "deploy_script": deploy_script,
-                    "timestamp": datetime.now().isoformat()
-                }
-                if self.github.is_enabled():
-                    print("📡 Fazendo commit automático no GitHub...")
-                    github_success = self.github.auto_commit_construction_result(construction_result)
-                    construction_result["github_commit"] = github_success
-                else:
-                    print("⚠️ Integração GitHub desabilitada")
-                    construction_result["github_commit"] = False
-                return construction_result
+                with self._deploy_lock:
+                    deployment = self.deployer_ai(code, architecture)
+                    # 4.1 Gerar Dockerfile e script de deploy
+                    dockerfile = self.gerar_dockerfile()
+                    deploy_script = self.gerar_script_deploy()
+                    # 5. Commit automático no GitHub
+                    construction_result = {
+                        "success": True,
+                        "feature": feature_request,
+                        "architecture": architecture,
+                        "code": code,
+                        "review": review,
+                        "deployment": deployment,
+                        "dockerfile": dockerfile,
+                        "deploy_script": deploy_script,
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    if self.github.is_enabled():
+                        print("📡 Fazendo commit automático no GitHub...")
+                        github_success = self.github.auto_commit_construction_result(construction_result)
+                        construction_result["github_commit"] = github_success
+                    else:
+                        print("⚠️ Integração GitHub desabilitada")
+                        construction_result["github_commit"] = False
+                    return construction_result
             else:
                 # Garante que sempre haja 'approved' e motivo
                 return {
@@ -179,7 +190,7 @@ class AutoConstructionModule:
         Requisito: {feature_request}
         
         Informações da internet:
-        {json.dumps(search_results, indent=2)}
+        {pack_context(search_results, feature_request, "architect_ai")}
         
         Crie uma arquitetura detalhada seguindo os princípios éticos do EcoGuardians.
         """
@@ -214,15 +225,17 @@ class AutoConstructionModule:
         # Busca exemplos de código relevantes
         tech_stack = " ".join(architecture.get("dependencies", []))
         code_examples = self.search.search_code_examples(tech_stack, architecture["overview"])
+        # Somente os trechos mais relevantes dos exemplos, dentro do orçamento de tokens do Coder AI
+        examples_context = pack_context(code_examples, f"{architecture['overview']} {tech_stack}", "coder_ai")
         
         instruction = f"""
         Você é o Coder AI do ecossistema EcoGuardians.
         
         Arquitetura:
-        {json.dumps(architecture, indent=2)}
+        {compact_json(architecture)}
         
         Exemplos de código encontrados:
-        {json.dumps(code_examples, indent=2)}
+        {examples_context}
         
         Implemente o código completo seguindo a arquitetura.
         
@@ -0,0 +1,228 @@
+"""
+Orçamento de contexto para prompts.
+Resultados de busca e scraping são quebrados em trechos, deduplicados,
+ordenados por relevância para a missão e empacotados em JSON compacto
+dentro de um limite de tokens por ponto de chamada.
+"""
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+# Orçamento padrão (tokens) por ponto de chamada. Sobrescreva com NEXO_CONTEXT_BUDGET_<SITE>=tokens
+DEFAULT_BUDGETS = {
+    "interpret_mission": 800,
+    "architect_ai": 1200,
+    "coder_ai": 3000,
+    "evolution_opportunities": 2000,
+}
+
+# Campos de texto longo que são recortados em trechos; os demais são mantidos como metadados
+TEXT_FIELDS = ("content", "snippet")
+PASSAGE_CHARS = 400
+DUPLICATE_OVERLAP = 0.8
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_stats = {"calls": 0, "original_tokens": 0, "packed_tokens": 0, "duplicates_dropped": 0, "passages_dropped": 0}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    """
+    Estima localmente o número de tokens (tiktoken se instalado, senão ~4 caracteres por token)
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def compact_json(data):
+    """
+    Serialização JSON sem indentação nem espaços (mesmo conteúdo, menos tokens)
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def budget_for(call_site, default=1500):
+    """
+    Orçamento de tokens do ponto de chamada
+    """
+    env = os.environ.get(f"NEXO_CONTEXT_BUDGET_{call_site.upper()}") if call_site else None
+    if env:
+        return int(env)
+    return DEFAULT_BUDGETS.get(call_site, default)
+
+
+def _words(text):
+    return [w.lower() for w in _WORD_RE.findall(text or "")]
+
+
+def _shingles(words, size=5):
+    if len(words) <= size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def split_passages(text, max_chars=PASSAGE_CHARS):
+    """
+    Quebra um texto em trechos de até max_chars, respeitando parágrafos, linhas
+    (a indentação de código é preservada) e, em linhas longas, frases
+    """
+    passages = []
+    for block in re.split(r"\n\s*\n", text or ""):
+        current = ""
+        for line in block.split("\n"):
+            line = line.rstrip()
+            if not line.strip():
+                continue
+            pieces = re.split(r"(?<=[.!?])\s+", line) if len(line) > max_chars else [line]
+            for position, piece in enumerate(pieces):
+                while len(piece) > max_chars:
+                    if current:
+                        passages.append(current)
+                        current = ""
+                    passages.append(piece[:max_chars])
+                    piece = piece[max_chars:]
+                if current and len(current) + len(piece) + 1 > max_chars:
+                    passages.append(current)
+                    current = piece
+                elif current:
+                    # Frases da mesma linha são unidas por espaço; linhas diferentes, por quebra de linha
+                    separator = " " if position else "\n"
+                    current = f"{current}{separator}{piece}"
+                else:
+                    current = piece
+        if current:
+            passages.append(current)
+    return passages
+
+
+def _score(query_terms, words, doc_freq, total):
+    """Relevância estilo BM25 simplificado do trecho em relação aos termos da missão"""
+    if not words or not query_terms:
+        return 0.0
+    counts = Counter(words)
+    score = 0.0
+    for term in query_terms:
+        tf = counts.get(term)
+        if tf:
+            idf = math.log(1 + (total - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * len(words) / 60))
+    return score
+
+
+def pack_context(items, query, call_site=None, max_tokens=None, text_fields=TEXT_FIELDS):
+    """
+    Empacota resultados (lista de dicts) no orçamento de tokens do ponto de chamada.
+    Retorna a lista em JSON compacto com apenas os trechos mais relevantes de cada item,
+    mantendo a ordem original dos itens e dos trechos.
+    """
+    return pack_context_with_coverage(items, query, call_site, max_tokens, text_fields)[0]
+
+
+def pack_context_with_coverage(items, query, call_site=None, max_tokens=None, text_fields=TEXT_FIELDS):
+    """
+    Como pack_context, mas retorna (json, cobertos): cobertos são os índices dos itens
+    cujo texto entrou inteiro no contexto (trechos descartados como duplicata contam
+    se o trecho equivalente entrou). Itens fora dessa lista foram cortados pelo orçamento.
+    """
+    if not items:
+        return "[]", []
+    if not isinstance(items, list):
+        return compact_json(items), []
+    max_tokens = max_tokens if max_tokens is not None else budget_for(call_site)
+    original_tokens = estimate_tokens(json.dumps(items, indent=2, ensure_ascii=False))
+
+    # Metadados de cada item (título, link...) e trechos dos campos de texto longo
+    headers = []
+    passages = []  # (item, campo, ordem, texto, palavras)
+    seen = []
+    # Trechos de que cada item depende: os próprios e, para duplicatas, o trecho equivalente já visto
+    needed = [[] for _ in items]
+    duplicates = 0
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            headers.append(item)
+            continue
+        headers.append({k: v for k, v in item.items() if k not in text_fields})
+        for field in text_fields:
+            for order, passage in enumerate(split_passages(item.get(field) or "")):
+                words = _words(passage)
+                shingles = _shingles(words)
+                # Descarta trechos quase idênticos a um já visto (mesma notícia em sites diferentes)
+                match = next(
+                    (position for position, other in enumerate(seen)
+                     if other and len(shingles & other) >= DUPLICATE_OVERLAP * min(len(shingles), len(other))),
+                    None
+                )
+                if match is not None:
+                    duplicates += 1
+                    needed[index].append(match)
+                    continue
+                needed[index].append(len(passages))
+                seen.append(shingles)
+                passages.append((index, field, order, passage, words))
+
+    query_terms = {w for w in _words(query) if len(w) >= 3}
+    doc_freq = Counter(term for *_, words in passages for term in set(words) & query_terms)
+    ranked = sorted(
+        range(len(passages)),
+        key=lambda i: (-_score(query_terms, passages[i][4], doc_freq, len(passages)), passages[i][0], passages[i][2])
+    )
+
+    used = estimate_tokens(compact_json(headers))
+    chosen = set()
+    for position in ranked:
+        cost = estimate_tokens(passages[position][3]) + 2
+        if used + cost > max_tokens:
+            continue
+        chosen.add(position)
+        used += cost
+
+    packed = [dict(h) if isinstance(h, dict) else h for h in headers]
+    for index, field, _order, text, _words_ in sorted((passages[i] for i in chosen), key=lambda p: (p[0], p[1], p[2])):
+        entry = packed[index]
+        entry[field] = f"{entry[field]}\n{text}" if field in entry else text
+    result = compact_json(packed)
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["original_tokens"] += original_tokens
+        _stats["packed_tokens"] += estimate_tokens(result)
+        _stats["duplicates_dropped"] += duplicates
+        _stats["passages_dropped"] += len(passages) - len(chosen)
+    covered = [index for index, deps in enumerate(needed) if all(position in chosen for position in deps)]
+    return result, covered
+
+
+def get_stats():
+    """
+    Tokens antes e depois do empacotamento em todas as chamadas
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    original = stats["original_tokens"]
+    stats["saved_ratio"] = round(1 - stats["packed_tokens"] / original, 3) if original else 0.0
+    return stats
+
+
+if __name__ == "__main__":
+    # Teste do módulo: resultados repetidos e longos cabem no orçamento
+    texto = "Flask permite criar APIs REST rapidamente. " * 20 + "\n\nCache com Redis reduz a latência das respostas. " * 5
+    resultados = [
+        {"title": "Flask REST", "link": "https://a.example", "content": texto},
+        {"title": "Flask REST (cópia)", "link": "https://b.example", "content": texto},
+        {"title": "Outro", "link": "https://c.example", "content": "Assunto sem relação com a missão. " * 40},
+    ]
+    print(pack_context(resultados, "cache redis latência api", max_tokens=200))
+    print(get_stats())
@@ -0,0 +1,334 @@
+"""
+Agendador de cortesia para requisições de saída (buscas e scraping).
+Cada host tem um balde de tokens próprio; respostas 429/503 reduzem a taxa
+do host (e respeitam Retry-After), sucessos a recuperam aos poucos.
+GETs (idempotentes) são repetidos com backoff exponencial e jitter, e o
+robots.txt de cada host fica em cache para o scraping de páginas.
+"""
+import os
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib import robotparser
+from urllib.parse import urlparse
+import requests
+from core.rate_limiter import TokenBucket
+from core.crawler import domain_of
+
+DEFAULT_RATE = float(os.environ.get("NEXO_CRAWL_RATE", 1.0))  # requisições/s por host
+DEFAULT_BURST = float(os.environ.get("NEXO_CRAWL_BURST", 3))
+DEFAULT_MAX_RETRIES = int(os.environ.get("NEXO_CRAWL_MAX_RETRIES", 3))
+DEFAULT_BASE_BACKOFF = float(os.environ.get("NEXO_CRAWL_BACKOFF", 1.0))
+DEFAULT_MAX_BACKOFF = float(os.environ.get("NEXO_CRAWL_MAX_BACKOFF", 30.0))
+DEFAULT_MAX_WAIT = float(os.environ.get("NEXO_CRAWL_MAX_WAIT", 60.0))
+ROBOTS_TTL = int(os.environ.get("NEXO_ROBOTS_TTL", 24 * 3600))
+USER_AGENT = os.environ.get("NEXO_CRAWL_USER_AGENT", "NexoBot")
+
+# Taxas por host (requisições/s). Sobrescreva com NEXO_CRAWL_HOST_RATES="duckduckgo.com=0.5,googleapis.com=2"
+DEFAULT_HOST_RATES = {
+    "duckduckgo.com": 0.5,
+    "googleapis.com": 2.0,
+}
+
+RETRY_STATUS = {429, 503}
+MIN_RATE_FACTOR = 0.1
+SLOW_DOWN_WINDOW = 2.0
+
+
+class CrawlThrottled(Exception):
+    """Espera pela vez do host excedeu o limite"""
+
+
+class RobotsDisallowed(Exception):
+    """URL bloqueada pelo robots.txt do host"""
+
+
+def _parse_host_rates(raw):
+    rates = dict(DEFAULT_HOST_RATES)
+    for item in (raw or "").split(","):
+        if "=" in item:
+            host, rate = item.split("=", 1)
+            rates[host.strip().lower()] = float(rate)
+    return rates
+
+
+def retry_after_seconds(value):
+    """
+    Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    """
+    Estado de cortesia de um host: balde de tokens, fator de taxa adaptativo e bloqueio até
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.factor = 1.0
+        self.bucket = TokenBucket(burst, rate)
+        self.blocked_until = 0.0
+        self.slowed_at = float("-inf")
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "errors": 0, "wait_time": 0.0, "backoff_time": 0.0}
+
+    def slow_down(self, now):
+        # Redução multiplicativa após 429/503; uma rajada de bloqueios conta como um só
+        if now - self.slowed_at < SLOW_DOWN_WINDOW:
+            return
+        self.slowed_at = now
+        self.factor = max(MIN_RATE_FACTOR, self.factor / 2)
+        self.bucket.refill_per_second = self.rate * self.factor
+
+    def recover(self):
+        # Recuperação aditiva após sucessos
+        if self.factor < 1.0:
+            self.factor = min(1.0, self.factor + 0.1)
+            self.bucket.refill_per_second = self.rate * self.factor
+
+
+class CrawlScheduler:
+    """
+    Ritmo por host para requisições de saída
+    - acquire(url): aguarda a vez do host (balde de tokens e bloqueios por 429/503)
+    - allowed(url): consulta o robots.txt em cache
+    - wrap(fetcher): fetcher(url, params, headers, timeout) com ritmo, robots opcional e retentativas
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, host_rates=None, max_retries=DEFAULT_MAX_RETRIES,
+                 base_backoff=DEFAULT_BASE_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF, max_wait=DEFAULT_MAX_WAIT,
+                 user_agent=USER_AGENT, sleep=time.sleep, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates if host_rates is not None else _parse_host_rates(os.environ.get("NEXO_CRAWL_HOST_RATES"))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.user_agent = user_agent
+        self.sleep = sleep
+        self.clock = clock
+        self.session = requests.Session()
+        self._hosts = {}
+        self._robots = {}
+        self._lock = threading.Lock()
+        self.stats = {"robots_fetched": 0, "robots_denied": 0, "gave_up": 0}
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            rate = next((r for h, r in self.host_rates.items() if host == h or host.endswith("." + h)), self.rate)
+            state = HostState(rate, self.burst)
+            state.bucket.clock = self.clock
+            state.bucket.updated_at = self.clock()
+            self._hosts[host] = state
+        return state
+
+    def acquire(self, url):
+        """
+        Reserva a próxima vaga do host e espera por ela; retorna o tempo de espera.
+        Levanta CrawlThrottled se a espera passar de max_wait.
+        """
+        host = domain_of(url)
+        with self._lock:
+            state = self._host(host)
+            now = self.clock()
+            wait = max(state.bucket.time_until(1), state.blocked_until - now, 0.0)
+            if wait > self.max_wait:
+                state.stats["errors"] += 1
+                raise CrawlThrottled(f"Host {host} exige espera de {wait:.0f}s")
+            # Reserva o token agora (o balde pode ficar negativo); a espera acontece fora do lock
+            state.bucket.take(1)
+            state.stats["requests"] += 1
+            state.stats["wait_time"] += wait
+        if wait:
+            self.sleep(wait)
+        return wait
+
+    def _backoff(self, attempt, retry_after=None):
+        # Jitter completo: aleatório entre 0 e o teto exponencial; Retry-After é o mínimo
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def _penalize(self, host, retry_after):
+        with self._lock:
+            state = self._host(host)
+            state.stats["throttled"] += 1
+            state.slow_down(self.clock())
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, self.clock() + retry_after)
+
+    def _succeed(self, host):
+        with self._lock:
+            self._host(host).recover()
+
+    def allowed(self, url):
+        """
+        Indica se o robots.txt do host permite a URL (falhas ao ler o robots liberam o acesso)
+        """
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        with self._lock:
+            cached = self._robots.get(origin)
+        if cached is None or cached[1] < self.clock():
+            parser = robotparser.RobotFileParser()
+            try:
+                response = self.session.get(origin + "/robots.txt", timeout=5, headers={"User-Agent": self.user_agent})
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(response.text.splitlines())
+            except Exception:
+                parser.allow_all = True
+            cached = (parser, self.clock() + ROBOTS_TTL)
+            with self._lock:
+                self._robots[origin] = cached
+                self.stats["robots_fetched"] += 1
+        allowed = cached[0].can_fetch(self.user_agent, url)
+        if not allowed:
+            with self._lock:
+                self.stats["robots_denied"] += 1
+        return allowed
+
+    def wrap(self, fetcher, respect_robots=False):
+        """
+        Envolve um fetcher de GET (idempotente) com ritmo por host, robots.txt opcional
+        e retentativas com backoff em 429/503 e erros de conexão.
+        A requisição sai com o mesmo User-Agent usado nas regras do robots.txt.
+        """
+        def polite_fetch(url, params=None, headers=None, timeout=10):
+            headers = dict(headers or {}, **{"User-Agent": self.user_agent})
+            if respect_robots and not self.allowed(url):
+                raise RobotsDisallowed(f"robots.txt não permite {url}")
+            host = domain_of(url)
+            for attempt in range(self.max_retries + 1):
+                self.acquire(url)
+                last_try = attempt == self.max_retries
+                try:
+                    response = fetcher(url, params=params, headers=headers, timeout=timeout)
+                except (requests.ConnectionError, requests.Timeout):
+                    if last_try:
+                        self._count_gave_up()
+                        raise
+                    self._retry(host, self._backoff(attempt))
+                    continue
+                if response.status_code not in RETRY_STATUS:
+                    self._succeed(host)
+                    return response
+                retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                self._penalize(host, retry_after)
+                if last_try or (retry_after or 0.0) > self.max_wait:
+                    self._count_gave_up()
+                    return response
+                self._retry(host, self._backoff(attempt, retry_after))
+            return response
+
+        return polite_fetch
+
+    def _retry(self, host, delay):
+        with self._lock:
+            state = self._host(host)
+            state.stats["retries"] += 1
+            state.stats["backoff_time"] += delay
+        self.sleep(delay)
+
+    def _count_gave_up(self):
+        with self._lock:
+            self.stats["gave_up"] += 1
+
+    def get_stats(self):
+        """
+        Contadores globais e, por host, requisições, retentativas, bloqueios e tempo parado
+        (espera pelo balde + backoff, somados entre as threads)
+        """
+        with self._lock:
+            hosts = {
+                host: dict(
+                    state.stats,
+                    wait_time=round(state.stats["wait_time"], 3),
+                    backoff_time=round(state.stats["backoff_time"], 3),
+                    rate=round(state.rate * state.factor, 3),
+                )
+                for host, state in self._hosts.items()
+            }
+            stats = dict(self.stats)
+        stats["blocked_time"] = round(sum(h["wait_time"] + h["backoff_time"] for h in hosts.values()), 3)
+        stats["hosts"] = hosts
+        return stats
+
+
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+
+def get_crawl_scheduler():
+    """
+    Retorna o agendador de cortesia compartilhado
+    """
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = CrawlScheduler()
+        return _shared_scheduler
+
+
+if __name__ == "__main__":
+    # Benchmark: servidor local que devolve 429 acima de 5 req/s.
+    # Sem ritmo, a rajada é bloqueada; com o agendador, quase tudo passa.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from concurrent.futures import ThreadPoolExecutor
+
+    janela = []
+    janela_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            agora = time.monotonic()
+            with janela_lock:
+                janela[:] = [t for t in janela if agora - t < 1.0]
+                excedeu = len(janela) >= 5
+                if not excedeu:
+                    janela.append(agora)
+            self.send_response(429 if excedeu else 200)
+            if excedeu:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/p{i}" for i in range(30)]
+    session = requests.Session()
+    get = lambda url, params=None, headers=None, timeout=10: session.get(url, params=params, headers=headers, timeout=timeout)
+
+    def rodar(fetch):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(8) as pool:
+            status = list(pool.map(lambda u: fetch(u).status_code, urls))
+        return status.count(200), time.perf_counter() - start
+
+    ok, elapsed = rodar(get)
+    print(f"Sem ritmo: {ok}/{len(urls)} com sucesso em {elapsed:.2f}s")
+    time.sleep(1.1)
+    scheduler = CrawlScheduler(rate=4.5, burst=3, host_rates={})
+    ok, elapsed = rodar(scheduler.wrap(get))
+    print(f"Com agendador: {ok}/{len(urls)} com sucesso em {elapsed:.2f}s")
+    print(scheduler.get_stats())
+    server.shutdown()
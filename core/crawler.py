@@ -0,0 +1,185 @@
+"""
+Crawler concorrente para buscas e scraping.
+Pool de threads com limite global, limite por domínio e prazo total:
+o que não terminar dentro do prazo é devolvido como None (resultado parcial).
+"""
+import os
+import threading
+from collections import deque
+from urllib.parse import urlparse
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+DEFAULT_CONCURRENCY = int(os.environ.get("NEXO_CRAWL_CONCURRENCY", 8))
+DEFAULT_PER_DOMAIN = int(os.environ.get("NEXO_CRAWL_PER_DOMAIN", 2))
+DEFAULT_DEADLINE = float(os.environ.get("NEXO_CRAWL_DEADLINE", 30))
+
+
+def domain_of(url):
+    """
+    Domínio usado para o limite por host (sem "www.")
+    """
+    netloc = urlparse(url or "").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class Crawler:
+    """
+    Executa tarefas de rede em paralelo
+    - No máximo max_workers simultâneas no total e per_domain por domínio
+    - Cada domínio tem sua fila; uma tarefa só vai para o pool quando o domínio tem vaga,
+      então um domínio lento nunca ocupa threads esperando (sem bloqueio entre domínios)
+    - map() respeita um prazo total e devolve resultados parciais
+    - Não chame map() de dentro de uma tarefa do próprio crawler (o pool é compartilhado)
+    """
+
+    def __init__(self, max_workers=DEFAULT_CONCURRENCY, per_domain=DEFAULT_PER_DOMAIN, deadline=DEFAULT_DEADLINE):
+        self.max_workers = max_workers
+        self.per_domain = per_domain
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nexo-crawl")
+        self._queues = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self.stats = {"tasks": 0, "completed": 0, "failed": 0, "timed_out": 0}
+
+    def _submit(self, domain, fn, item):
+        future = Future()
+        with self._lock:
+            self._queues.setdefault(domain, deque()).append((fn, item, future))
+        self._dispatch(domain)
+        return future
+
+    def _dispatch(self, domain):
+        # Envia ao pool as tarefas do domínio enquanto houver vaga
+        while True:
+            with self._lock:
+                queue = self._queues.get(domain)
+                if not queue or self._active.get(domain, 0) >= self.per_domain:
+                    return
+                fn, item, future = queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue  # cancelada pelo prazo antes de começar
+                self._active[domain] = self._active.get(domain, 0) + 1
+            self.executor.submit(self._run, domain, fn, item, future)
+
+    def _run(self, domain, fn, item, future):
+        try:
+            future.set_result(fn(item))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._active[domain] -= 1
+            self._dispatch(domain)
+
+    def _count(self, metric, amount=1):
+        with self._lock:
+            self.stats[metric] += amount
+
+    def map(self, fn, items, deadline=None, domain=domain_of):
+        """
+        Aplica fn a cada item em paralelo e devolve os resultados na ordem dos itens.
+        Falhas e tarefas não concluídas no prazo viram None.
+        domain(item) define o grupo do limite por domínio (padrão: domínio da URL).
+        """
+        items = list(items)
+        if not items:
+            return []
+        deadline = self.deadline if deadline is None else deadline
+        futures = [self._submit(domain(item), fn, item) for item in items]
+        done, _pending = wait(futures, timeout=deadline)
+        self._count("tasks", len(futures))
+
+        results = []
+        for future in futures:
+            if future not in done:
+                # Prazo esgotado: cancela se ainda não começou; se já está em andamento, o resultado é descartado
+                future.cancel()
+                self._count("timed_out")
+                results.append(None)
+            elif future.exception() is not None:
+                print(f"Erro no crawler: {future.exception()}")
+                self._count("failed")
+                results.append(None)
+            else:
+                self._count("completed")
+                results.append(future.result())
+        return results
+
+    def get_stats(self):
+        """
+        Contadores de tarefas concluídas, com falha e expiradas
+        """
+        with self._lock:
+            return dict(self.stats, domains=len(self._queues))
+
+
+_shared_crawler = None
+_shared_lock = threading.Lock()
+
+
+def get_crawler():
+    """
+    Retorna o crawler compartilhado (um único pool para todo o processo)
+    """
+    global _shared_crawler
+    with _shared_lock:
+        if _shared_crawler is None:
+            _shared_crawler = Crawler()
+        return _shared_crawler
+
+
+if __name__ == "__main__":
+    # Benchmark: ciclo de evolução (5 fontes x 2 resultados) contra um servidor HTTP local com latência
+    import time
+    import requests
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    LATENCIA = 0.3
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(LATENCIA)
+            body = b"<html><body>conteudo</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    servidores = [ThreadingHTTPServer(("127.0.0.1", 0), Handler) for _ in range(5)]
+    for servidor in servidores:
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    fontes = [f"http://127.0.0.1:{s.server_port}" for s in servidores]
+
+    def buscar(fonte):
+        requests.get(f"{fonte}/busca", timeout=10)
+        return [f"{fonte}/pagina{i}" for i in range(2)]
+
+    def raspar(url):
+        return requests.get(url, timeout=10).text
+
+    start = time.perf_counter()
+    for fonte in fontes:
+        for url in buscar(fonte):
+            raspar(url)
+    serial = time.perf_counter() - start
+
+    crawler = Crawler(max_workers=8, per_domain=2)
+    start = time.perf_counter()
+    links = [url for urls in crawler.map(buscar, fontes, domain=lambda f: "busca") if urls for url in urls]
+    crawler.map(raspar, links)
+    concorrente = time.perf_counter() - start
+
+    # Prazo curto: devolve o que ficou pronto
+    parcial = Crawler(max_workers=2, per_domain=1).map(raspar, [f"{fontes[0]}/p{i}" for i in range(4)], deadline=0.45)
+
+    print(f"Serial: {serial:.2f}s | Crawler: {concorrente:.2f}s ({serial / concorrente:.1f}x)")
+    print(f"Resultados parciais no prazo: {sum(r is not None for r in parcial)}/4", crawler.get_stats())
+    for servidor in servidores:
+        servidor.shutdown()
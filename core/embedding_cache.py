@@ -0,0 +1,353 @@
+"""
+Cache de embeddings e pipeline de embeddings em lote.
+Vetores ficam em uma matriz float32 em disco (lida via memmap), indexada por
+modelo + hash do texto em SQLite; textos repetidos (missões, lições, melhorias)
+nunca são recalculados. Pedidos de várias threads que chegam dentro de uma
+pequena janela são agrupados em uma única chamada ao modelo (micro-batching).
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_CACHE_DIR = os.environ.get("NEXO_EMBEDDING_CACHE_PATH", "cache/embeddings")
+DEFAULT_MAX_BATCH = int(os.environ.get("NEXO_EMBEDDING_BATCH", 64))
+DEFAULT_MAX_WAIT = float(os.environ.get("NEXO_EMBEDDING_BATCH_WAIT", 0.01))
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Trava exclusiva entre processos (Flask, bot e evolução compartilham o cache)
+    """
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingCache:
+    """
+    Cache persistente de embeddings de um modelo
+    - <modelo>.f32: matriz float32 (uma linha por texto), só acrescentada
+    - <modelo>.sqlite: hash do texto -> linha da matriz
+    - <modelo>.lock: gravações de vários processos são serializadas; a linha de cada
+      vetor vem do tamanho real do arquivo, não de um contador do processo
+    """
+
+    def __init__(self, model_name, path=DEFAULT_CACHE_DIR):
+        self.model_name = model_name
+        self.path = path
+        self.enabled = os.environ.get("NEXO_EMBEDDING_CACHE", "1") != "0" and bool(path)
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._matrix = None
+        self.dim = None
+        self.rows = 0
+        if self.enabled:
+            self._open()
+
+    def _open(self):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            base = os.path.join(self.path, re.sub(r"[^\w.-]", "_", self.model_name))
+            self.matrix_path = base + ".f32"
+            self.lock_path = base + ".lock"
+            self._conn = sqlite3.connect(base + ".sqlite", check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, row INTEGER)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.commit()
+            self._refresh_rows()
+        except Exception as e:
+            print(f"⚠️ Cache de embeddings desativado: {e}")
+            self._conn = None
+            self.enabled = False
+
+    def _refresh_rows(self):
+        # Outros processos podem ter definido a dimensão e acrescentado linhas
+        if self.dim is None:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+            if not row:
+                return
+            self.dim = int(row[0])
+        size = os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0
+        self.rows = size // (4 * self.dim)
+
+    def _view(self):
+        # Remapeia a matriz quando novas linhas foram acrescentadas
+        if self._matrix is None or self._matrix.shape[0] < self.rows:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return self._matrix
+
+    def get_many(self, texts):
+        """
+        Retorna um vetor (np.ndarray) ou None para cada texto
+        """
+        if not self.enabled or not texts:
+            return [None] * len(texts)
+        hashes = [text_hash(t) for t in texts]
+        with self._lock:
+            if self.dim is None:
+                self._refresh_rows()
+            if self.dim is None:
+                self.stats["misses"] += len(texts)
+                return [None] * len(texts)
+            found = {}
+            unique = list(set(hashes))
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                found.update(self._conn.execute(
+                    f"SELECT hash, row FROM embeddings WHERE hash IN ({placeholders})", chunk
+                ).fetchall())
+            if found and max(found.values()) >= self.rows:
+                self._refresh_rows()
+            matrix = self._view() if found else None
+            vectors = [np.array(matrix[found[h]]) if h in found and found[h] < self.rows else None for h in hashes]
+            hits = sum(v is not None for v in vectors)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(texts) - hits
+        return vectors
+
+    def put_many(self, texts, vectors):
+        """
+        Acrescenta os vetores de textos ainda não armazenados
+        """
+        if not self.enabled or not texts:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock, file_lock(self.lock_path):
+            self._refresh_rows()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+            elif vectors.shape[1] != self.dim:
+                return
+            new_rows, new_hashes, seen = [], [], set()
+            for text, vector in zip(texts, vectors):
+                h = text_hash(text)
+                if h in seen or self._conn.execute("SELECT 1 FROM embeddings WHERE hash = ?", (h,)).fetchone():
+                    continue
+                seen.add(h)
+                new_hashes.append((h, len(new_rows)))
+                new_rows.append(vector)
+            if not new_rows:
+                self._conn.commit()
+                return
+            with open(self.matrix_path, "ab") as f:
+                # Linha inicial pelo tamanho real do arquivo (descarta um resto de linha incompleta)
+                row_bytes = 4 * self.dim
+                start = os.fstat(f.fileno()).st_size // row_bytes
+                f.truncate(start * row_bytes)
+                f.write(np.stack(new_rows).tobytes())
+            self._conn.executemany(
+                "INSERT INTO embeddings (hash, row) VALUES (?, ?)", [(h, start + offset) for h, offset in new_hashes]
+            )
+            self._conn.commit()
+            self.rows = start + len(new_rows)
+            self.stats["writes"] += len(new_rows)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, rows=self.rows, dim=self.dim)
+
+
+class MicroBatcher:
+    """
+    Agrupa pedidos de embedding de várias threads: o primeiro pedido abre uma janela
+    de max_wait segundos (ou até max_batch textos) e tudo vai em uma chamada ao modelo
+    """
+
+    def __init__(self, embed_fn, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+        self.embed_fn = embed_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = []
+        self._condition = threading.Condition()
+        self._worker = None
+        self.stats = {"requests": 0, "batches": 0, "texts": 0}
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="nexo-embed-batcher", daemon=True)
+            self._worker.start()
+
+    def submit(self, texts):
+        """
+        Enfileira textos e retorna um Future com a lista de vetores
+        """
+        future = Future()
+        with self._condition:
+            self._pending.append((list(texts), future))
+            self.stats["requests"] += 1
+            self._ensure_worker()
+            self._condition.notify()
+        return future
+
+    def embed(self, texts, timeout=None):
+        return self.submit(texts).result(timeout)
+
+    def _take_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = time.monotonic() + self.max_wait
+            while sum(len(t) for t, _ in self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch, size = [], 0
+            while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch):
+                texts, future = self._pending.pop(0)
+                batch.append((texts, future))
+                size += len(texts)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = list(self.embed_fn(texts)) if texts else []
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._condition:
+                self.stats["batches"] += 1
+                self.stats["texts"] += len(texts)
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self.stats)
+        stats["avg_batch"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+
+class CachedEmbeddingFunction:
+    """
+    Função de embedding com cache persistente e micro-batching.
+    Interface compatível com as embedding functions do chromadb: fn(input) -> lista de vetores.
+    """
+
+    def __init__(self, embedding_fn, model_name, cache=None, batcher=None):
+        self.embedding_fn = embedding_fn
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache(model_name)
+        self.batcher = batcher or MicroBatcher(embedding_fn)
+
+    def __call__(self, input):
+        texts = list(input)
+        vectors = self.cache.get_many(texts)
+        # Textos ausentes (sem repetição) vão juntos ao modelo, agrupados com os de outras threads
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            computed = self.batcher.embed(missing)
+            self.cache.put_many(missing, computed)
+            by_text = dict(zip(missing, (np.asarray(v, dtype=np.float32) for v in computed)))
+            vectors = [v if v is not None else by_text[t] for t, v in zip(texts, vectors)]
+        return vectors
+
+    def get_stats(self):
+        return {"cache": self.cache.get_stats(), "batcher": self.batcher.get_stats()}
+
+
+_functions = {}
+_functions_lock = threading.Lock()
+
+
+def get_cached_embedding_function(embedding_fn, model_name):
+    """
+    Retorna a função de embedding com cache compartilhada para o modelo
+    """
+    with _functions_lock:
+        function = _functions.get(model_name)
+        if function is None:
+            function = CachedEmbeddingFunction(embedding_fn, model_name)
+            _functions[model_name] = function
+        return function
+
+
+if __name__ == "__main__":
+    # Benchmark: textos/s embutindo um a um vs em lote vs cache quente (CPU)
+    # Usa o modelo ONNX padrão do chromadb se instalado; senão um modelo sintético em NumPy
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        from chromadb.utils import embedding_functions
+        modelo = embedding_functions.DefaultEmbeddingFunction()
+        modelo(["aquecimento"])
+        nome = "all-MiniLM-L6-v2 (ONNX)"
+    except Exception:
+        rng = np.random.default_rng(0)
+        vocab, pesos1, pesos2 = 4096, rng.standard_normal((4096, 512), dtype=np.float32), rng.standard_normal((512, 384), dtype=np.float32)
+
+        def modelo(textos):
+            # Custo fixo por chamada (como a sessão ONNX) + multiplicações de matriz
+            time.sleep(0.002)
+            bolsa = np.zeros((len(textos), vocab), dtype=np.float32)
+            for i, texto in enumerate(textos):
+                for palavra in texto.split():
+                    bolsa[i, hash(palavra) % vocab] += 1.0
+            saida = np.tanh(bolsa @ pesos1) @ pesos2
+            return list(saida / np.linalg.norm(saida, axis=1, keepdims=True))
+        nome = "modelo sintético NumPy"
+
+    textos = [f"missão {i}: otimizar o módulo {i % 17} com cache e lotes de requisições" for i in range(512)]
+    print(f"Modelo: {nome}")
+
+    start = time.perf_counter()
+    for texto in textos:
+        modelo([texto])
+    print(f"Um a um:        {len(textos) / (time.perf_counter() - start):8.0f} textos/s")
+
+    start = time.perf_counter()
+    for i in range(0, len(textos), 64):
+        modelo(textos[i:i + 64])
+    print(f"Em lotes de 64: {len(textos) / (time.perf_counter() - start):8.0f} textos/s")
+
+    funcao = CachedEmbeddingFunction(modelo, "bench", cache=EmbeddingCache("bench", tempfile.mkdtemp()))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(32) as pool:
+        list(pool.map(lambda t: funcao([t]), textos))  # 32 threads pedindo um texto por vez
+    print(f"Micro-batching: {len(textos) / (time.perf_counter() - start):8.0f} textos/s {funcao.batcher.get_stats()}")
+
+    start = time.perf_counter()
+    for texto in textos:
+        funcao([texto])
+    print(f"Cache quente:   {len(textos) / (time.perf_counter() - start):8.0f} textos/s {funcao.cache.get_stats()}")
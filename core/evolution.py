@@ -1,12 +1,19 @@
 import os
 import json
 import time
+import asyncio
 import threading
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from core.database import get_supabase_client
 from core.internet_search import InternetSearchModule
 from core.auto_construction import AutoConstructionModule
+from core.async_llm import gather_limited, run_sync
+from core.llm_router import call_class_scope
+from core.context_budget import pack_context_with_coverage, compact_json
+from core.crawler import get_crawler
+from core.near_duplicates import NearDuplicateStore, get_near_duplicates
+from core.watermarks import SourceWatermarks
 
 load_dotenv()
 
@@ -20,9 +27,13 @@ class EvolutionModule:
         self.supabase = get_supabase_client()
         self.search = InternetSearchModule()
         self.nexo = nexo_genesis_agent
-        self.auto_constructor = AutoConstructionModule(self.nexo.call_llm)
+        self.auto_constructor = AutoConstructionModule(self.nexo.call_llm, getattr(self.nexo, "acall_llm", None))
         
         self.evolution_history = []
+        # URLs e hashes de conteúdo já analisados por fonte (pesquisa incremental entre ciclos)
+        self.watermarks = SourceWatermarks()
+        # Conteúdo completo das páginas do ciclo: impressões só são registradas após a análise
+        self._pending_pages = {}
         self.is_evolving = False
         self.evolution_thread = None
         
@@ -65,7 +76,8 @@ class EvolutionModule:
                 # Verifica se é hora de evoluir
                 if self._should_evolve():
                     print("🧬 Iniciando ciclo de evolução...")
-                    self.evolve()
+                    with call_class_scope("background"):
+                        self.evolve()
                 
                 # Aguarda próximo ciclo
                 time.sleep(self.evolution_interval)
@@ -112,23 +124,33 @@ class EvolutionModule:
             current_state = self._analyze_current_state()
             evolution_cycle["steps"].append("analyze_state")
             
-            # 2. Busca por melhorias
+            # 2. Busca por melhorias (apenas conteúdo novo ou alterado desde o último ciclo)
             improvements = self._search_for_improvements()
             evolution_cycle["steps"].append("search_improvements")
             
-            # 3. Identifica oportunidades de evolução
-            opportunities = self._identify_evolution_opportunities(current_state, improvements)
-            evolution_cycle["steps"].append("identify_opportunities")
+            # 3. Identifica oportunidades de evolução; sem material novo, o LLM nem é chamado
+            if improvements:
+                opportunities = self._identify_evolution_opportunities(current_state, improvements)
+                evolution_cycle["steps"].append("identify_opportunities")
+            else:
+                print("💤 Nenhum conteúdo novo desde o último ciclo; análise com IA ignorada")
+                opportunities = []
+                evolution_cycle["steps"].append("no_new_content")
             
-            # 4. Implementa melhorias (se houver)
+            # 4. Implementa melhorias (se houver) em paralelo; o deploy é serializado pelo AutoConstructionModule
             if opportunities:
-                for opportunity in opportunities[:2]:  # Máximo 2 melhorias por ciclo
-                    try:
-                        result = self._implement_improvement(opportunity)
+                selected = opportunities[:2]  # Máximo 2 melhorias por ciclo
+                results = run_sync(gather_limited(
+                    [lambda op=op: asyncio.to_thread(self._implement_improvement, op) for op in selected],
+                    limit=len(selected),
+                    return_exceptions=True
+                ))
+                for opportunity, result in zip(selected, results):
+                    if isinstance(result, Exception):
+                        evolution_cycle["errors"].append(str(result))
+                    else:
                         evolution_cycle["improvements"].append(result)
                         evolution_cycle["steps"].append(f"implement_{opportunity['type']}")
-                    except Exception as e:
-                        evolution_cycle["errors"].append(str(e))
             
             # 5. Registra evolução
             self.evolution_history.append(evolution_cycle)
@@ -177,21 +199,51 @@ class EvolutionModule:
         Busca por melhorias e novas tecnologias
         """
         improvements = []
+        crawler = get_crawler()
         
-        for source in self.learning_sources:
-            try:
-                results = self.search.search_web(source, 2)
-                for result in results:
-                    content = self.search.scrape_content(result["link"])
-                    if content:
-                        improvements.append({
-                            "source": source,
-                            "title": result["title"],
-                            "content": content["content"][:1000],  # Primeiros 1000 chars
-                            "url": result["link"]
-                        })
-            except Exception as e:
-                print(f"Erro ao buscar {source}: {e}")
+        # Buscas de todas as fontes em paralelo (grupo "busca": no máximo per_domain simultâneas na API)
+        searches = crawler.map(lambda source: self.search.search_web(source, 2), self.learning_sources, domain=lambda source: "busca")
+        found = [
+            (source, result)
+            for source, results in zip(self.learning_sources, searches)
+            for result in (results or [])
+            if result.get("link")
+        ]
+        # Cada URL é baixada uma vez por ciclo (o cache HTTP torna barato rever as já conhecidas)
+        duplicates = get_near_duplicates()
+        # Duplicatas entre páginas do próprio ciclo; o armazém persistente só é consultado aqui
+        run_duplicates = NearDuplicateStore(path=":memory:", max_age=0)
+        self._pending_pages = {}
+        pending, links = [], set()
+        for source, result in found:
+            if result["link"] not in links:
+                links.add(result["link"])
+                pending.append((source, result))
+        found = pending
+        missing = [source for source, results in zip(self.learning_sources, searches) if results is None]
+        if missing:
+            print(f"⚠️ Fontes sem resposta no prazo: {missing}")
+        
+        # Scraping concorrente com limite por domínio; páginas que estouram o prazo ficam de fora
+        contents = crawler.map(self.search.scrape_content, [result["link"] for _source, result in found])
+        for (source, result), content in zip(found, contents):
+            if not content:
+                continue
+            text = content["content"][:1000]  # Primeiros 1000 chars
+            # Só segue o que mudou desde a última análise da fonte; o mesmo artigo
+            # republicado em outra URL é descartado antes de chegar ao prompt
+            if (
+                self.watermarks.is_new(source, result["link"], text)
+                and duplicates.check(result["link"], content["content"], record=False) is None
+                and run_duplicates.check(result["link"], content["content"]) is None
+            ):
+                self._pending_pages[result["link"]] = content["content"]
+                improvements.append({
+                    "source": source,
+                    "title": result["title"],
+                    "content": text,
+                    "url": result["link"]
+                })
         
         return improvements
     
@@ -199,14 +251,17 @@ class EvolutionModule:
         """
         Identifica oportunidades de evolução usando IA
         """
+        # Só as melhorias que couberam inteiras no orçamento são marcadas como analisadas
+        packed, covered = pack_context_with_coverage(improvements, " ".join(self.learning_sources), "evolution_opportunities")
+        analyzed = [improvements[i] for i in covered]
         prompt = f"""
         Você é o Evolution AI do ecossistema EcoGuardians.
         
         Estado atual do sistema:
-        {json.dumps(current_state, indent=2)}
+        {compact_json(current_state)}
         
         Melhorias encontradas na internet:
-        {json.dumps(improvements, indent=2)}
+        {packed}
         
         Identifique oportunidades de evolução e retorne JSON com array de objetos:
         [
@@ -230,7 +285,13 @@ class EvolutionModule:
         """
         
         try:
-            response = self.nexo.call_llm(prompt, "Identificar oportunidades de evolução")
+            # Cache semântico chaveado pelo conteúdo empacotado (não só pelos títulos), com limiar estrito
+            response = self.nexo.call_llm(
+                prompt,
+                "Identificar oportunidades de evolução",
+                call_site="evolution_opportunities",
+                semantic_text=packed
+            )
             
             # Limpar resposta para extrair JSON
             if response.strip().startswith("```json"):
@@ -239,6 +300,17 @@ class EvolutionModule:
                 response = response.strip()[3:-3].strip()
             
             opportunities = json.loads(response)
+            # call_llm não levanta exceção: falhas do provedor chegam como {"action": "error", ...}
+            if not isinstance(opportunities, list) or not all(isinstance(op, dict) for op in opportunities):
+                raise ValueError(f"resposta não é uma lista de oportunidades: {response[:200]}")
+            # Análise concluída: as marcas d'água avançam e o material não é reenviado no próximo ciclo.
+            # O que o orçamento cortou não foi visto pelo LLM e volta a ser candidato no próximo ciclo.
+            self.watermarks.commit(analyzed)
+            duplicates = get_near_duplicates()
+            for imp in analyzed:
+                duplicates.record(imp["url"], self._pending_pages.pop(imp["url"], imp["content"]))
+            if len(analyzed) < len(improvements):
+                print(f"📦 {len(improvements) - len(analyzed)} melhorias não couberam no contexto; ficam para o próximo ciclo")
             
             # Filtrar apenas oportunidades de alta e média prioridade
             return [op for op in opportunities if op.get("priority") in ["high", "medium"]]
@@ -325,7 +397,7 @@ if __name__ == "__main__":
     
     # Simulação de Nexo Genesis
     class MockNexoGenesis:
-        def call_llm(self, prompt, context):
+        def call_llm(self, prompt, context, **kwargs):
             return '[{"type": "performance", "priority": "high", "description": "Teste"}]'
     
     mock_nexo = MockNexoGenesis()
@@ -0,0 +1,261 @@
+"""
+Download em streaming e extração incremental de texto de páginas HTML.
+O corpo é lido em blocos e passado a um HTMLParser que descarta script/style;
+a leitura para assim que há texto suficiente ou o limite de bytes é atingido.
+PDFs e binários são ignorados pelo Content-Type. BeautifulSoup fica como fallback.
+"""
+import re
+import codecs
+from html.parser import HTMLParser
+
+MAX_CHARS = 5000
+MAX_BYTES = 2 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+# Tipos aceitos para extração de texto (ausência de Content-Type também é aceita)
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg"}
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "td", "th", "table", "section", "article",
+    "header", "footer", "nav", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote",
+}
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+_CHARSET_RE = re.compile(r"charset=([\w-]+)", re.IGNORECASE)
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Extrator incremental: feed() pode ser chamado bloco a bloco;
+    `done` fica verdadeiro quando max_chars de texto já foram coletados
+    """
+
+    def __init__(self, max_chars=MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.title = ""
+        self._skip_depth = 0
+        self._in_title = False
+
+    @property
+    def done(self):
+        return self.length >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in BLOCK_TAGS and self.parts and self.parts[-1] != " ":
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag in BLOCK_TAGS and self.parts and self.parts[-1] != " ":
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data
+        if self.done:
+            return
+        text = " ".join(data.split())
+        if text:
+            # Preserva o espaço entre trechos de texto vizinhos
+            if data[:1].isspace() and self.parts and self.parts[-1] != " ":
+                self.parts.append(" ")
+            self.parts.append(text)
+            self.length += len(text) + 1
+            if data[-1:].isspace():
+                self.parts.append(" ")
+
+    def get_text(self):
+        return " ".join("".join(self.parts).split())[:self.max_chars]
+
+    def get_title(self):
+        return " ".join(self.title.split())
+
+
+def is_text_content_type(content_type):
+    """
+    Indica se o Content-Type pode ser convertido em texto (HTML ou texto simples)
+    """
+    if not content_type:
+        return True
+    return content_type.split(";")[0].strip().lower() in TEXT_CONTENT_TYPES
+
+
+def _charset(content_type, first_chunk):
+    match = _CHARSET_RE.search(content_type or "")
+    if match:
+        return match.group(1)
+    match = _META_CHARSET_RE.search(first_chunk or b"")
+    if match:
+        return match.group(1).decode("ascii", errors="ignore")
+    return "utf-8"
+
+
+def extract_from_chunks(chunks, content_type="text/html", max_chars=MAX_CHARS, max_bytes=MAX_BYTES):
+    """
+    Extrai texto de um iterável de blocos de bytes, parando cedo.
+    Retorna dict com text, title, bytes_read, truncated (parou antes do fim) e raw (bytes lidos).
+    """
+    extractor = HTMLTextExtractor(max_chars)
+    plain = content_type and content_type.split(";")[0].strip().lower() == "text/plain"
+    decoder = None
+    raw = bytearray()
+    plain_parts = []
+    truncated = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if decoder is None:
+            try:
+                decoder = codecs.getincrementaldecoder(_charset(content_type, chunk))(errors="replace")
+            except LookupError:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        raw.extend(chunk)
+        text = decoder.decode(chunk)
+        if plain:
+            plain_parts.append(text)
+            enough = sum(len(p) for p in plain_parts) >= max_chars
+        else:
+            extractor.feed(text)
+            enough = extractor.done
+        if enough or len(raw) >= max_bytes:
+            truncated = True
+            break
+    if plain:
+        text = " ".join("".join(plain_parts).split())[:max_chars]
+        title = ""
+    else:
+        extractor.close()
+        text, title = extractor.get_text(), extractor.get_title()
+    return {"text": text, "title": title, "bytes_read": len(raw), "truncated": truncated, "raw": bytes(raw)}
+
+
+def extract_text_bs4(content, max_chars=MAX_CHARS):
+    """
+    Extração original com BeautifulSoup (fallback)
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = ' '.join(chunk for chunk in chunks if chunk)
+    title = str(soup.title.string) if soup.title and soup.title.string else ""
+    return {"text": text[:max_chars], "title": title}
+
+
+def extract_text(content, content_type="text/html", max_chars=MAX_CHARS):
+    """
+    Extrai texto de um corpo já baixado; usa BeautifulSoup se o parser incremental falhar
+    """
+    try:
+        result = extract_from_chunks([content], content_type, max_chars, max_bytes=len(content) + 1)
+        return {"text": result["text"], "title": result["title"]}
+    except Exception:
+        return extract_text_bs4(content, max_chars)
+
+
+class StreamedPage:
+    """
+    Resposta de fetch_text: interface mínima de requests.Response (status_code, headers,
+    content, encoding) mais o texto já extraído
+    """
+
+    def __init__(self, status_code, headers, content=b"", text="", title="", bytes_read=0,
+                 truncated=False, skipped=False, encoding="utf-8"):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.text_content = text
+        self.title = title
+        self.bytes_read = bytes_read
+        self.truncated = truncated
+        self.skipped = skipped
+        self.encoding = encoding
+        # Repassado pelo HTTPCache para o extrator, evitando um segundo parsing
+        self.extracted = {"text": text, "title": title, "skipped": skipped} if status_code == 200 else None
+
+
+def fetch_text(session, url, params=None, headers=None, timeout=10, max_chars=MAX_CHARS, max_bytes=MAX_BYTES):
+    """
+    GET em streaming: lê o corpo em blocos só até extrair max_chars de texto ou atingir max_bytes.
+    Respostas que não são HTML/texto (PDF, imagens, binários) não têm o corpo lido.
+    """
+    response = session.get(url, params=params, headers=headers, timeout=timeout, stream=True)
+    try:
+        content_type = response.headers.get("Content-Type", "")
+        if response.status_code != 200:
+            return StreamedPage(response.status_code, response.headers)
+        if not is_text_content_type(content_type):
+            return StreamedPage(response.status_code, response.headers, skipped=True)
+        result = extract_from_chunks(response.iter_content(CHUNK_SIZE), content_type or "text/html", max_chars, max_bytes)
+        return StreamedPage(
+            response.status_code, response.headers, result["raw"], result["text"], result["title"],
+            result["bytes_read"], result["truncated"]
+        )
+    finally:
+        # Fecha a conexão sem ler o restante do corpo
+        response.close()
+
+
+if __name__ == "__main__":
+    # Benchmark: extração completa com BeautifulSoup vs streaming incremental
+    # Uso: python -m core.html_text [pasta_com_paginas_salvas]
+    import os
+    import sys
+    import time
+    import tracemalloc
+
+    pasta = sys.argv[1] if len(sys.argv) > 1 else None
+    if pasta:
+        corpus = [open(os.path.join(pasta, nome), "rb").read() for nome in sorted(os.listdir(pasta)) if nome.endswith((".html", ".htm"))]
+    else:
+        # Corpus sintético: páginas típicas com scripts, estilos e muito texto após o início
+        bloco = "<p>Python 3.13 traz melhorias de desempenho no interpretador e no GC. </p>" * 40
+        script = "<script>" + "var x = 1;" * 2000 + "</script><style>" + "p{color:red}" * 500 + "</style>"
+        corpus = [
+            f"<html><head><title>Página {i}</title>{script}</head><body><nav>menu</nav>{bloco * (5 + i)}</body></html>".encode("utf-8")
+            for i in range(20)
+        ]
+
+    def medir(funcao):
+        tracemalloc.start()
+        cpu = time.process_time()
+        lidos = funcao()
+        cpu = time.process_time() - cpu
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return lidos, cpu, pico
+
+    extract_text_bs4(corpus[0])  # aquece imports do BeautifulSoup fora da medição
+
+    def completo():
+        total = 0
+        for pagina in corpus:
+            extract_text_bs4(pagina)
+            total += len(pagina)
+        return total
+
+    def streaming():
+        total = 0
+        for pagina in corpus:
+            blocos = (pagina[i:i + CHUNK_SIZE] for i in range(0, len(pagina), CHUNK_SIZE))
+            total += extract_from_chunks(blocos)["bytes_read"]
+        return total
+
+    for nome, funcao in (("BeautifulSoup completo", completo), ("Streaming incremental", streaming)):
+        lidos, cpu, pico = medir(funcao)
+        print(f"{nome}: {lidos / 1024:.0f} KiB lidos, CPU {cpu * 1000:.0f} ms, pico de memória {pico / 1024:.0f} KiB")
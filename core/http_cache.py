@@ -0,0 +1,371 @@
+"""
+Cache HTTP em disco para buscas e scraping.
+Chave por URL + parâmetros da consulta, frescor por fonte (TTL),
+revalidação condicional com ETag/Last-Modified, corpo comprimido (zlib)
+e cache do conteúdo já extraído (texto/resultados), para que ciclos
+quentes não façam nem a requisição nem o parsing com BeautifulSoup.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlencode
+import requests
+
+DEFAULT_CACHE_PATH = os.environ.get("NEXO_HTTP_CACHE_PATH", "cache/http_cache.sqlite")
+DEFAULT_MAX_ENTRIES = int(os.environ.get("NEXO_HTTP_CACHE_MAX_ENTRIES", 20000))
+
+# Tempo de frescor (segundos) por fonte. Sobrescreva com NEXO_HTTP_CACHE_TTL_<FONTE>=segundos
+DEFAULT_TTLS = {
+    "google": 6 * 3600,
+    "duckduckgo": 6 * 3600,
+    "scrape": 24 * 3600,
+}
+
+
+def _ttls_from_env(ttls):
+    ttls = dict(ttls)
+    for kind in list(ttls):
+        env = os.environ.get(f"NEXO_HTTP_CACHE_TTL_{kind.upper()}")
+        if env:
+            ttls[kind] = int(env)
+    return ttls
+
+
+def make_http_key(url, params=None):
+    """
+    Chave do cache: URL + parâmetros da consulta em ordem estável
+    """
+    raw = url
+    if params:
+        raw += "?" + urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    """
+    Resposta HTTP servida pela rede ou pelo cache (interface mínima compatível com requests.Response)
+    """
+
+    def __init__(self, url, status_code, content, headers=None, key=None, from_cache=False,
+                 revalidated=False, extracted=None, encoding=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content or b""
+        self.headers = headers or {}
+        self.key = key
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+        self.extracted = extracted
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class HTTPCache:
+    """
+    Cache HTTP persistente (SQLite)
+    - Dentro do TTL da fonte: responde sem tocar a rede
+    - Após o TTL: GET condicional (If-None-Match / If-Modified-Since); 304 reaproveita o corpo e o texto extraído
+    - Apenas respostas 200 sem "Cache-Control: no-store" são armazenadas
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None, max_entries=DEFAULT_MAX_ENTRIES, session=None):
+        self.path = path
+        self.ttls = _ttls_from_env(ttls or DEFAULT_TTLS)
+        self.max_entries = max_entries
+        self.session = session or requests.Session()
+        self.enabled = os.environ.get("NEXO_HTTP_CACHE", "1") != "0"
+        self.stats = {
+            "fresh_hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "extracted_hits": 0,
+            "bytes_saved": 0,
+        }
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            self._connect()
+
+    def _connect(self):
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    key TEXT PRIMARY KEY,
+                    url TEXT,
+                    kind TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    encoding TEXT,
+                    body BLOB,
+                    extracted BLOB,
+                    fetched_at REAL,
+                    expires_at REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_fetched ON http_cache(fetched_at)")
+            self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Cache HTTP desativado: {e}")
+            self._conn = None
+            self.enabled = False
+
+    def _count(self, metric, amount=1):
+        with self._lock:
+            self.stats[metric] += amount
+
+    def _load(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, encoding, body, extracted, expires_at FROM http_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        url, etag, last_modified, encoding, body, extracted, expires_at = row
+        return {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": encoding,
+            "body": zlib.decompress(body) if body else b"",
+            "extracted": json.loads(zlib.decompress(extracted)) if extracted else None,
+            "expires_at": expires_at,
+        }
+
+    def _store(self, key, url, kind, response):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(key, url, kind, etag, last_modified, encoding, body, extracted, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)",
+                (
+                    key, url, kind,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    response.encoding,
+                    zlib.compress(response.content),
+                    now,
+                    now + self.ttls.get(kind, DEFAULT_TTLS["scrape"]),
+                ),
+            )
+            self.stats["writes"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _touch(self, key, kind):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET fetched_at = ?, expires_at = ? WHERE key = ?",
+                (now, now + self.ttls.get(kind, DEFAULT_TTLS["scrape"]), key)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM http_cache WHERE key IN "
+                "(SELECT key FROM http_cache ORDER BY fetched_at ASC LIMIT ?)",
+                (excess,),
+            )
+            self.stats["evictions"] += excess
+
+    def _default_fetch(self, url, params=None, headers=None, timeout=10):
+        return self.session.get(url, params=params, headers=headers, timeout=timeout)
+
+    def fetch(self, url, params=None, headers=None, kind="scrape", timeout=10, fetcher=None):
+        """
+        GET com cache. fetcher(url, params, headers, timeout) permite trocar o cliente HTTP.
+        Retorna um CachedResponse.
+        """
+        fetcher = fetcher or self._default_fetch
+        if not self.enabled:
+            response = fetcher(url, params=params, headers=headers, timeout=timeout)
+            return CachedResponse(url, response.status_code, response.content, response.headers,
+                                  extracted=getattr(response, "extracted", None), encoding=response.encoding)
+
+        key = make_http_key(url, params)
+        entry = self._load(key)
+        if entry and entry["expires_at"] > time.time():
+            self._count("fresh_hits")
+            self._count("bytes_saved", len(entry["body"]))
+            return CachedResponse(url, 200, entry["body"], key=key, from_cache=True,
+                                  extracted=entry["extracted"], encoding=entry["encoding"])
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        response = fetcher(url, params=params, headers=request_headers, timeout=timeout)
+
+        if entry and response.status_code == 304:
+            # Conteúdo inalterado: renova o frescor e reaproveita corpo e texto extraído
+            self._touch(key, kind)
+            self._count("revalidated")
+            self._count("bytes_saved", len(entry["body"]))
+            return CachedResponse(url, 200, entry["body"], response.headers, key=key, from_cache=True,
+                                  revalidated=True, extracted=entry["extracted"], encoding=entry["encoding"])
+
+        self._count("misses")
+        cacheable = response.status_code == 200 and "no-store" not in response.headers.get("Cache-Control", "")
+        if cacheable:
+            self._store(key, url, kind, response)
+        # Fetchers em streaming (core.html_text) já entregam o texto extraído junto da resposta
+        return CachedResponse(url, response.status_code, response.content, response.headers,
+                              key=key if cacheable else None, extracted=getattr(response, "extracted", None),
+                              encoding=response.encoding)
+
+    def fetch_extracted(self, url, extract, params=None, headers=None, kind="scrape", timeout=10, fetcher=None):
+        """
+        Como fetch, mas retorna extract(resposta) e guarda o resultado junto do corpo.
+        Em acertos do cache (frescos ou 304) o extrator não é executado.
+        """
+        response = self.fetch(url, params, headers, kind, timeout, fetcher)
+        if response.from_cache and response.extracted is not None:
+            self._count("extracted_hits")
+            return response.extracted
+        data = extract(response)
+        if response.key and data is not None:
+            self.set_extracted(response.key, data)
+        return data
+
+    def set_extracted(self, key, data):
+        """
+        Associa o conteúdo extraído (serializável em JSON) à versão atual do corpo
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET extracted = ? WHERE key = ?",
+                (zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8")), key)
+            )
+            self._conn.commit()
+
+    def peek_extracted(self, url, params=None):
+        """
+        Conteúdo extraído ainda fresco para a URL, sem tocar a rede (None se ausente ou expirado)
+        """
+        if not self.enabled:
+            return None
+        entry = self._load(make_http_key(url, params))
+        if entry and entry["expires_at"] > time.time() and entry["extracted"] is not None:
+            self._count("fresh_hits")
+            self._count("extracted_hits")
+            return entry["extracted"]
+        return None
+
+    def put_extracted(self, url, data, params=None, kind="scrape"):
+        """
+        Guarda um conteúdo extraído obtido por outro caminho (ex.: requisições em lote), sem corpo
+        """
+        if not self.enabled or data is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(key, url, kind, etag, last_modified, encoding, body, extracted, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, NULL, NULL, 'utf-8', NULL, ?, ?, ?)",
+                (
+                    make_http_key(url, params), url, kind,
+                    zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8")),
+                    now,
+                    now + self.ttls.get(kind, DEFAULT_TTLS["scrape"]),
+                ),
+            )
+            self.stats["writes"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def clear(self):
+        """
+        Remove todas as entradas do cache
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache")
+            self._conn.commit()
+
+    def get_stats(self):
+        """
+        Retorna contadores de uso do cache
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            if self.enabled:
+                stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+        lookups = stats["fresh_hits"] + stats["revalidated"] + stats["misses"]
+        stats["hit_rate"] = round((stats["fresh_hits"] + stats["revalidated"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_http_cache():
+    """
+    Retorna a instância compartilhada do cache HTTP
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = HTTPCache()
+        return _shared_cache
+
+
+if __name__ == "__main__":
+    # Teste do módulo: servidor local com ETag; a segunda leitura expirada é revalidada com 304
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = b"<html><title>Nexo</title><body>" + b"conteudo " * 500 + b"</body></html>"
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/pagina"
+
+    cache = HTTPCache(path=":memory:", ttls={"scrape": 0})
+    extrair = lambda r: {"chars": len(r.text)}
+    print(cache.fetch_extracted(url, extrair))  # rede + extração
+    print(cache.fetch_extracted(url, extrair))  # TTL 0: GET condicional -> 304, sem nova extração
+    print(cache.get_stats())
+    server.shutdown()
@@ -2,11 +2,23 @@ import os
 import requests
 from bs4 import BeautifulSoup
 import json
+from collections import deque
 from datetime import datetime
 from dotenv import load_dotenv
+from core.single_flight import SingleFlight, fingerprint
+from core.http_cache import get_http_cache
+from core.crawler import get_crawler
+from core.crawl_scheduler import get_crawl_scheduler, RobotsDisallowed
+from core.search_backend import get_search_backend
+from core.html_text import fetch_text, extract_text
+from core.search_index import get_search_index, DEFAULT_LOCAL_MAX_AGE
 
 load_dotenv()
 
+# Compartilhados entre todas as instâncias (Nexo, evolução e auto-construção)
+search_flight = SingleFlight("search")
+scrape_flight = SingleFlight("scrape")
+
 class InternetSearchModule:
     """
     Módulo de busca na internet para o Nexo Gênesis
@@ -16,12 +28,40 @@ class InternetSearchModule:
     def __init__(self):
         self.google_api_key = os.environ.get("GOOGLE_API_KEY")
         self.google_cse_id = os.environ.get("GOOGLE_CSE_ID")
-        self.search_history = []
+        # Histórico em memória limitado; o histórico completo fica no índice local (FTS5)
+        self.search_history = deque(maxlen=int(os.environ.get("NEXO_SEARCH_HISTORY_MAX", 100)))
+        self.index = get_search_index()
+        # Modo "local primeiro": temas já pesquisados são respondidos pelo índice, sem rede
+        self.local_first = os.environ.get("NEXO_SEARCH_LOCAL_FIRST", "0") == "1"
+        self.local_max_age = DEFAULT_LOCAL_MAX_AGE
+        # Cache HTTP em disco com revalidação condicional (compartilhado entre instâncias)
+        self.http_cache = get_http_cache()
+        # Ritmo por host e retentativas em 429/503; só é usado quando o cache precisa ir à rede
+        self.scheduler = get_crawl_scheduler()
+        self._polite_get = self.scheduler.wrap(self._http_get)
+        self._polite_fetch_text = self.scheduler.wrap(self._fetch_text, respect_robots=True)
     
-    def search_web(self, query, num_results=5):
-        """
-        Busca informações na web usando Google Custom Search API
-        """
+    def _http_get(self, url, params=None, headers=None, timeout=10):
+        return self.http_cache.session.get(url, params=params, headers=headers, timeout=timeout)
+    
+    def _fetch_text(self, url, params=None, headers=None, timeout=10):
+        # Lê o corpo em streaming só até ter texto suficiente; PDFs e binários não são baixados
+        return fetch_text(self.http_cache.session, url, params, headers, timeout, max_chars=5000)
+    
+    def search_web(self, query, num_results=5, local_first=None):
+        """
+        Busca informações na web usando Google Custom Search API.
+        Buscas idênticas simultâneas compartilham uma única requisição.
+        Com local_first (ou NEXO_SEARCH_LOCAL_FIRST=1), tenta antes o índice local.
+        """
+        if self.local_first if local_first is None else local_first:
+            local = self.index.lookup(query, num_results, self.local_max_age)
+            if local:
+                return local
+        key = fingerprint("search", query.strip().lower(), num_results)
+        return search_flight.do(key, lambda: self._search_web(query, num_results))
+
+    def _search_web(self, query, num_results):
         try:
             if self.google_api_key and self.google_cse_id:
                 return self._google_search(query, num_results)
@@ -36,31 +76,10 @@ class InternetSearchModule:
         """
         Busca usando Google Custom Search API
         """
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
-            "key": self.google_api_key,
-            "cx": self.google_cse_id,
-            "q": query,
-            "num": num_results
-        }
-        
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            results = []
-            
-            for item in data.get("items", []):
-                results.append({
-                    "title": item.get("title"),
-                    "link": item.get("link"),
-                    "snippet": item.get("snippet"),
-                    "source": "google"
-                })
-            
-            self._log_search(query, results)
-            return results
-        else:
-            raise Exception(f"Erro na API Google: {response.status_code}")
+        # Backend compartilhado com ferramentas e APISearch (cache HTTP e ritmo por host)
+        results = get_search_backend(self.google_api_key, self.google_cse_id).search(query, num_results)
+        self._log_search(query, results)
+        return results
     
     def _duckduckgo_search(self, query, num_results):
         """
@@ -69,35 +88,36 @@ class InternetSearchModule:
         try:
             # Simulação de busca DuckDuckGo (implementação simplificada)
             # Em produção, usar biblioteca como duckduckgo-search
-            url = f"https://duckduckgo.com/html/?q={query}"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
-            response = requests.get(url, headers=headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            url = "https://duckduckgo.com/html/"
+            headers = {"User-Agent": self.scheduler.user_agent}
             
-            results = []
-            search_results = soup.find_all('div', class_='result')[:num_results]
-            
-            for result in search_results:
-                title_elem = result.find('a', class_='result__a')
-                snippet_elem = result.find('a', class_='result__snippet')
+            # O cache guarda a página inteira de resultados; o corte em num_results é feito na leitura
+            def parse(response):
+                soup = BeautifulSoup(response.content, 'html.parser')
+                results = []
+                search_results = soup.find_all('div', class_='result')
                 
-                if title_elem:
-                    link = title_elem.get('href')
-                    if link:
-                        if link.startswith('//'):
-                            link = 'https:' + link
-                        elif not link.startswith('http'):
-                            link = 'https://' + link.lstrip('/')
-                    results.append({
-                        "title": title_elem.get_text(strip=True),
-                        "link": link,
-                        "snippet": snippet_elem.get_text(strip=True) if snippet_elem else "",
-                        "source": "duckduckgo"
-                    })
+                for result in search_results:
+                    title_elem = result.find('a', class_='result__a')
+                    snippet_elem = result.find('a', class_='result__snippet')
+                    
+                    if title_elem:
+                        link = title_elem.get('href')
+                        if link:
+                            if link.startswith('//'):
+                                link = 'https:' + link
+                            elif not link.startswith('http'):
+                                link = 'https://' + link.lstrip('/')
+                        results.append({
+                            "title": title_elem.get_text(strip=True),
+                            "link": link,
+                            "snippet": snippet_elem.get_text(strip=True) if snippet_elem else "",
+                            "source": "duckduckgo"
+                        })
+                return results
             
+            results = self.http_cache.fetch_extracted(url, parse, params={"q": query}, headers=headers,
+                                                      kind="duckduckgo", fetcher=self._polite_get)[:num_results]
             self._log_search(query, results)
             return results
             
@@ -107,33 +127,44 @@ class InternetSearchModule:
     
     def scrape_content(self, url):
         """
-        Extrai conteúdo de uma página web
+        Extrai conteúdo de uma página web (downloads simultâneos da mesma URL são coalescidos)
         """
+        content = scrape_flight.do(fingerprint("scrape", url), lambda: self._scrape_content(url))
+        if content:
+            try:
+                self.index.add_page(url, content["title"], content["content"])
+            except Exception as e:
+                print(f"Erro ao indexar página: {e}")
+        return content
+
+    def _scrape_content(self, url):
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            headers = {"User-Agent": self.scheduler.user_agent}
             
-            # Remove scripts e estilos
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Extrai texto principal
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            def extract(response):
+                page = response.extracted or extract_text(response.content, response.headers.get("Content-Type", "text/html"))
+                return {
+                    "content": page["text"][:5000],  # Limita a 5000 caracteres
+                    "title": page["title"],
+                    "skipped": page.get("skipped", False)
+                }
             
+            # Em ciclos quentes o texto extraído vem do cache, sem rede nem BeautifulSoup
+            extracted = self.http_cache.fetch_extracted(url, extract, headers=headers, kind="scrape", timeout=10,
+                                                        fetcher=self._polite_fetch_text)
+            if extracted.get("skipped"):
+                print(f"Conteúdo ignorado (não é HTML/texto): {url}")
+                return None
             return {
                 "url": url,
-                "content": text[:5000],  # Limita a 5000 caracteres
-                "title": soup.title.string if soup.title else "",
+                "content": extracted["content"],
+                "title": extracted["title"],
                 "scraped_at": datetime.now().isoformat()
             }
             
+        except RobotsDisallowed as e:
+            print(f"Scraping ignorado: {e}")
+            return None
         except Exception as e:
             print(f"Erro ao extrair conteúdo de {url}: {e}")
             return None
@@ -145,15 +176,16 @@ class InternetSearchModule:
         query = f"{technology} {problem} example code github"
         results = self.search_web(query, 3)
         
+        selected = [r for r in results if any(site in (r.get("link") or "") for site in ["github.com", "stackoverflow.com", "docs."])]
+        
+        # Páginas extraídas em paralelo; as que estouram o prazo do crawler ficam de fora
         code_results = []
-        for result in results:
-            if any(site in result["link"] for site in ["github.com", "stackoverflow.com", "docs."]):
-                content = self.scrape_content(result["link"])
-                if content:
-                    code_results.append({
-                        **result,
-                        "content": content["content"]
-                    })
+        for result, content in zip(selected, get_crawler().map(self.scrape_content, [r["link"] for r in selected])):
+            if content:
+                code_results.append({
+                    **result,
+                    "content": content["content"]
+                })
         
         return code_results
     
@@ -164,35 +196,45 @@ class InternetSearchModule:
         query = f"{library_name} official documentation"
         results = self.search_web(query, 3)
         
+        selected = [r for r in results if any(keyword in (r.get("link") or "") for keyword in ["docs.", "documentation", "readthedocs"])]
+        
         doc_results = []
-        for result in results:
-            if any(keyword in result["link"] for keyword in ["docs.", "documentation", "readthedocs"]):
-                content = self.scrape_content(result["link"])
-                if content:
-                    doc_results.append({
-                        **result,
-                        "content": content["content"]
-                    })
+        for result, content in zip(selected, get_crawler().map(self.scrape_content, [r["link"] for r in selected])):
+            if content:
+                doc_results.append({
+                    **result,
+                    "content": content["content"]
+                })
         
         return doc_results
     
     def _log_search(self, query, results):
         """
-        Registra histórico de buscas
+        Registra histórico de buscas (resumo em memória, resultados no índice local)
         """
         search_log = {
             "query": query,
             "timestamp": datetime.now().isoformat(),
             "results_count": len(results),
-            "results": results
+            "links": [r.get("link") for r in results]
         }
         self.search_history.append(search_log)
+        try:
+            self.index.add_search(query, results)
+        except Exception as e:
+            print(f"Erro ao indexar busca: {e}")
     
     def get_search_history(self):
         """
-        Retorna histórico de buscas
+        Retorna histórico de buscas recentes
+        """
+        return list(self.search_history)
+    
+    def search_local(self, text, limit=10):
+        """
+        Busca textual ranqueada no índice local de buscas e páginas extraídas
         """
-        return self.search_history
+        return self.index.search(text, limit)
 
 if __name__ == "__main__":
     # Teste do módulo
@@ -0,0 +1,187 @@
+"""
+Cache persistente de respostas de LLM endereçado por conteúdo.
+A chave é formada por provedor, modelo e hash do prompt normalizado,
+com TTL, limite LRU de entradas e contadores de acerto/erro.
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = os.environ.get("NEXO_LLM_CACHE_PATH", "cache/llm_cache.sqlite")
+DEFAULT_TTL = int(os.environ.get("NEXO_LLM_CACHE_TTL", 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("NEXO_LLM_CACHE_MAX_ENTRIES", 5000))
+
+
+def normalize_prompt(prompt):
+    """
+    Normaliza o prompt para que diferenças de indentação e espaços não gerem chaves diferentes
+    """
+    return re.sub(r"\s+", " ", prompt or "").strip()
+
+
+def make_cache_key(provider, model, prompt):
+    """
+    Gera a chave de cache a partir do provedor, modelo e prompt normalizado
+    """
+    digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{provider}:{model}:{digest}"
+
+
+class LLMResponseCache:
+    """
+    Cache em disco (SQLite) para respostas de LLM
+    - Entradas expiram após o TTL
+    - Ao ultrapassar max_entries, remove as menos usadas recentemente (LRU)
+    - Mantém contadores de hits, misses e escritas
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = os.environ.get("NEXO_LLM_CACHE", "1") != "0"
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            self._connect()
+
+    def _connect(self):
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT,
+                    model TEXT,
+                    response TEXT,
+                    created_at REAL,
+                    last_access REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+            self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Cache de LLM desativado: {e}")
+            self._conn = None
+            self.enabled = False
+
+    def get(self, provider, model, prompt):
+        """
+        Retorna a resposta em cache ou None se ausente/expirada
+        """
+        if not self.enabled:
+            return None
+        key = make_cache_key(provider, model, prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def set(self, provider, model, prompt, response):
+        """
+        Armazena a resposta e aplica o limite LRU
+        """
+        if not self.enabled or not isinstance(response, str):
+            return
+        key = make_cache_key(provider, model, prompt)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, provider, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, now, now),
+            )
+            self.stats["writes"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            )
+            self.stats["evictions"] += excess
+
+    def get_or_call(self, provider, model, prompt, fn, use_cache=True):
+        """
+        Retorna a resposta do cache ou chama fn() e armazena o resultado
+        """
+        if use_cache:
+            cached = self.get(provider, model, prompt)
+            if cached is not None:
+                return cached
+        response = fn()
+        if use_cache:
+            self.set(provider, model, prompt, response)
+        return response
+
+    def clear(self):
+        """
+        Remove todas as entradas do cache
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def get_stats(self):
+        """
+        Retorna contadores de uso do cache
+        """
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        if self.enabled:
+            with self._lock:
+                stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return stats
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Retorna a instância compartilhada do cache de LLM
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache()
+        return _shared_cache
+
+
+if __name__ == "__main__":
+    # Teste do módulo
+    cache = LLMResponseCache(path=":memory:", max_entries=2)
+    cache.set("google", "gemini-1.5-flash", "Olá   Nexo", "resposta")
+    print(cache.get("google", "gemini-1.5-flash", "Olá Nexo"))
+    cache.set("google", "gemini-1.5-flash", "b", "2")
+    cache.set("google", "gemini-1.5-flash", "c", "3")
+    print(cache.get_stats())
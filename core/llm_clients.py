@@ -0,0 +1,225 @@
+"""
+Registro de clientes dos provedores de LLM.
+Mantém sessões HTTP com pool e keep-alive, objetos de modelo reutilizáveis
+e timeouts de conexão/leitura padronizados para todos os pontos de entrada.
+"""
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.environ.get("NEXO_HTTP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("NEXO_HTTP_READ_TIMEOUT", 60))
+POOL_SIZE = int(os.environ.get("NEXO_HTTP_POOL_SIZE", 10))
+# Por quanto tempo o resultado da verificação do servidor Ollama é reaproveitado
+OLLAMA_CHECK_TTL = float(os.environ.get("NEXO_OLLAMA_CHECK_TTL", 30))
+
+
+class ProviderClientRegistry:
+    """
+    Guarda clientes "quentes" por provedor
+    - requests.Session com pool de conexões e keep-alive
+    - HTTP/2 opcional via httpx (NEXO_HTTP2=1, se instalado)
+    - Modelos Gemini e cliente Ollama criados uma única vez
+    - ollama_reachable(): verificação rápida (com cache) de que o servidor Ollama responde
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), http2=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.http2 = http2 if http2 is not None else os.environ.get("NEXO_HTTP2", "0") == "1"
+        self._sessions = {}
+        self._http2_clients = {}
+        self._gemini_models = {}
+        self._gemini_key = None
+        self._ollama_clients = {}
+        self._ollama_checks = {}
+        self._lock = threading.Lock()
+
+    def session(self, provider):
+        """
+        Retorna a sessão HTTP compartilhada do provedor
+        """
+        with self._lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[provider] = session
+            return session
+
+    def _http2_client(self, provider):
+        with self._lock:
+            client = self._http2_clients.get(provider)
+            if client is None:
+                import httpx
+                client = httpx.Client(
+                    http2=True,
+                    timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                    limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                )
+                self._http2_clients[provider] = client
+            return client
+
+    def _post_http2(self, httpx, provider, url, **kwargs):
+        # Mesmo timeout (conexão, leitura) e mesmas exceções do caminho requests,
+        # para que os chamadores tratem requests.exceptions.* nos dois casos
+        timeout = kwargs.pop("timeout", None)
+        if isinstance(timeout, (tuple, list)):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        client = self._http2_client(provider)
+        try:
+            return client.post(url, timeout=timeout, **kwargs) if timeout else client.post(url, **kwargs)
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e)) from e
+        except httpx.ConnectError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e)) from e
+
+    def post(self, provider, url, **kwargs):
+        """
+        POST reaproveitando a conexão do provedor (com timeout padrão)
+        """
+        if self.http2 and not kwargs.get("stream"):
+            try:
+                import httpx
+            except ImportError:
+                self.http2 = False
+            else:
+                return self._post_http2(httpx, provider, url, **kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session(provider).post(url, **kwargs)
+
+    def get(self, provider, url, **kwargs):
+        """
+        GET reaproveitando a conexão do provedor (com timeout padrão)
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session(provider).get(url, **kwargs)
+
+    def gemini_model(self, api_key, model_name="gemini-1.5-flash"):
+        """
+        Retorna um GenerativeModel reutilizável; genai.configure só roda quando a chave muda
+        """
+        import google.generativeai as genai
+        with self._lock:
+            if api_key != self._gemini_key:
+                genai.configure(api_key=api_key)
+                self._gemini_key = api_key
+                self._gemini_models.clear()
+            model = self._gemini_models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._gemini_models[model_name] = model
+            return model
+
+    def ollama_client(self, host=None):
+        """
+        Retorna o cliente Ollama compartilhado
+        """
+        import ollama
+        host = host or os.environ.get("OLLAMA_HOST")
+        with self._lock:
+            client = self._ollama_clients.get(host)
+            if client is None:
+                client = ollama.Client(host=host) if host else ollama.Client()
+                self._ollama_clients[host] = client
+            return client
+
+    def ollama_reachable(self, host=None, ttl=OLLAMA_CHECK_TTL):
+        """
+        Indica se o servidor Ollama responde (GET /api/tags com timeout curto); o resultado vale por ttl segundos
+        """
+        host = host or os.environ.get("OLLAMA_HOST") or "http://localhost:11434"
+        if "://" not in host:
+            host = "http://" + host
+        now = time.monotonic()
+        with self._lock:
+            checked = self._ollama_checks.get(host)
+        if checked and now - checked[1] < ttl:
+            return checked[0]
+        try:
+            reachable = self.session("ollama").get(host.rstrip("/") + "/api/tags", timeout=(0.5, 1.0)).status_code == 200
+        except requests.exceptions.RequestException:
+            reachable = False
+        with self._lock:
+            self._ollama_checks[host] = (reachable, now)
+        return reachable
+
+    def close(self):
+        """
+        Fecha todas as conexões abertas
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            for client in self._http2_clients.values():
+                client.close()
+            self._sessions.clear()
+            self._http2_clients.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry():
+    """
+    Retorna o registro de clientes compartilhado pelo processo
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProviderClientRegistry()
+        return _registry
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: requests.post avulso x sessão com keep-alive contra um servidor local
+    import json
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MockLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    payload = {"model": "mock", "messages": [{"role": "user", "content": "olá"}]}
+    n = 300
+
+    start = time.perf_counter()
+    for _ in range(n):
+        requests.post(url, json=payload, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)).json()
+    bare = (time.perf_counter() - start) / n
+
+    registry = ProviderClientRegistry(http2=False)
+    registry.post("mock", url, json=payload).json()  # aquece a conexão
+    start = time.perf_counter()
+    for _ in range(n):
+        registry.post("mock", url, json=payload).json()
+    pooled = (time.perf_counter() - start) / n
+
+    print(f"requests.post avulso: {bare * 1000:.3f} ms/chamada")
+    print(f"sessão com pool:      {pooled * 1000:.3f} ms/chamada ({bare / pooled:.1f}x mais rápido)")
+    server.shutdown()
@@ -0,0 +1,149 @@
+"""
+Requisições "hedged" entre provedores de LLM.
+Se o provedor principal não responde dentro de um atraso derivado do p95
+da sua latência, o mesmo prompt é enviado ao segundo provedor e vence
+quem responder primeiro.
+"""
+import os
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core.semantic_cache import is_code_generation
+
+# Orçamento por ponto de chamada: tamanho máximo do prompt (tokens estimados) para permitir hedge
+DEFAULT_HEDGE_BUDGETS = {
+    "interpret_mission": {"max_prompt_tokens": 4000},
+    "chat": {"max_prompt_tokens": 4000},
+    "evolution_opportunities": {"max_prompt_tokens": 0},  # chamada de fundo: nunca duplica
+}
+
+# Classes de chamada em que o hedge pode ser usado
+HEDGE_CALL_CLASSES = ("interactive", "critical")
+
+
+class LLMHedger:
+    """
+    Executor de requisições hedged (opt-in com NEXO_LLM_HEDGING=1)
+    - Atraso do hedge = p95 da latência do provedor principal (ou default_delay)
+    - Nunca aplicado a prompts de geração de código nem fora do orçamento do ponto de chamada
+    - Contadores de quantas vezes o hedge foi disparado e venceu
+    - Hedges limitados a max_hedge_ratio das chamadas elegíveis
+    """
+
+    def __init__(self, router, enabled=None, budgets=None, default_delay=None,
+                 min_delay=0.2, max_hedge_ratio=0.25, max_workers=8):
+        self.router = router
+        self.enabled = enabled if enabled is not None else os.environ.get("NEXO_LLM_HEDGING", "0") == "1"
+        self.budgets = dict(DEFAULT_HEDGE_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.default_delay = default_delay if default_delay is not None else float(os.environ.get("NEXO_LLM_HEDGE_DELAY", 3.0))
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nexo-hedge")
+        self.metrics = {
+            "eligible": 0,
+            "calls": 0,
+            "hedges_fired": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "skipped_budget": 0,
+            "abandoned": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, metric, amount=1):
+        with self._lock:
+            self.metrics[metric] += amount
+
+    def hedge_delay(self, provider):
+        """
+        Tempo de espera antes de disparar o hedge para o provedor principal
+        """
+        p95 = self.router.latency_percentile(provider, 0.95)
+        return max(self.min_delay, p95 if p95 is not None else self.default_delay)
+
+    def should_hedge(self, prompt, call_class, call_site=None):
+        """
+        Indica se a chamada pode usar hedge dentro do orçamento do ponto de chamada
+        """
+        if not self.enabled or call_class not in HEDGE_CALL_CLASSES or is_code_generation(prompt):
+            return False
+        budget = self.budgets.get(call_site or "chat", self.budgets["chat"])
+        with self._lock:
+            # A proporção é sobre todas as chamadas elegíveis (inclusive as que não usaram hedge);
+            # contar só as que passaram por call() a deixaria presa em 1.0 após o primeiro hedge
+            self.metrics["eligible"] += 1
+            over_ratio = self.metrics["hedges_fired"] / self.metrics["eligible"] >= self.max_hedge_ratio
+        if len(prompt) // 4 > budget["max_prompt_tokens"] or over_ratio:
+            self._count("skipped_budget")
+            return False
+        return True
+
+    def call(self, prompt, providers, order):
+        """
+        Executa o prompt no primeiro provedor de `order` com hedge para o segundo.
+        Retorna (provedor, resposta); levanta a última exceção se ambos falharem.
+        """
+        self._count("calls")
+        primary = order[0]
+        # As threads do executor herdam o contexto (classe de chamada usada pelo limitador de taxa)
+        futures = {self.executor.submit(contextvars.copy_context().run, providers[primary], prompt): primary}
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+        primary_failed = bool(done) and next(iter(done)).exception() is not None
+        hedged = not done and len(order) > 1
+        if (hedged or primary_failed) and len(order) > 1:
+            # Sem resposta no prazo: dispara o hedge; falha rápida: segue direto para o secundário
+            secondary = order[1]
+            futures[self.executor.submit(contextvars.copy_context().run, providers[secondary], prompt)] = secondary
+            if hedged:
+                self._count("hedges_fired")
+
+        last_error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    continue
+                winner = futures[future]
+                if hedged:
+                    self._count("hedge_wins" if winner != primary else "primary_wins")
+                # O perdedor é cancelado; se já estiver em andamento, o resultado é descartado
+                for loser in pending:
+                    if not loser.cancel():
+                        self._count("abandoned")
+                return winner, future.result()
+        raise last_error or RuntimeError("Nenhum provedor respondeu.")
+
+    def get_metrics(self):
+        """
+        Retorna os contadores de hedge
+        """
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["enabled"] = self.enabled
+        fired = metrics["hedges_fired"]
+        metrics["hedge_win_rate"] = round(metrics["hedge_wins"] / fired, 3) if fired else 0.0
+        return metrics
+
+
+if __name__ == "__main__":
+    # Simulação: o provedor principal trava e o secundário responde
+    import time
+    from core.llm_router import AdaptiveLLMRouter
+
+    router = AdaptiveLLMRouter()
+    hedger = LLMHedger(router, enabled=True, default_delay=0.2)
+
+    def lento(prompt):
+        time.sleep(2)
+        return "principal"
+
+    def rapido(prompt):
+        time.sleep(0.05)
+        return "secundário"
+
+    start = time.perf_counter()
+    print(hedger.call("olá", {"google": lento, "groq": rapido}, ["google", "groq"]))
+    print(f"{time.perf_counter() - start:.2f}s", hedger.get_metrics())
@@ -0,0 +1,420 @@
+"""
+Roteador adaptativo de provedores de LLM.
+Acompanha latência (EWMA), taxa de erro e cota restante de cada provedor,
+abre circuit breakers para provedores com falha e escolhe o provedor mais
+barato que atende ao SLO de latência da classe de chamada.
+"""
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# Custo aproximado em USD por 1k tokens (sobrescreva com NEXO_LLM_COSTS="google=0.0004,openai=0.0015")
+DEFAULT_PROVIDER_COSTS = {
+    "ollama": 0.0,
+    "groq": 0.0003,
+    "google": 0.0004,
+    "openai": 0.0015,
+}
+
+# Qualidade relativa usada para classes que exigem modelos mais fortes
+PROVIDER_QUALITY = {
+    "openai": 3,
+    "google": 3,
+    "groq": 2,
+    "ollama": 1,
+}
+
+CALL_CLASSES = {
+    "interactive": {"latency_slo": 10.0, "min_quality": 2},
+    "critical": {"latency_slo": 30.0, "min_quality": 3},
+    "code": {"latency_slo": 120.0, "min_quality": 2},
+    "background": {"latency_slo": 60.0, "min_quality": 1},
+}
+
+_current_call_class = contextvars.ContextVar("nexo_call_class", default=None)
+
+
+@contextmanager
+def call_class_scope(call_class):
+    """
+    Define a classe das chamadas de LLM feitas dentro do bloco (ex.: "background" nos loops)
+    """
+    token = _current_call_class.set(call_class)
+    try:
+        yield
+    finally:
+        _current_call_class.reset(token)
+
+
+def current_call_class():
+    """
+    Retorna a classe de chamada ativa no contexto atual (ou None)
+    """
+    return _current_call_class.get()
+
+
+def _parse_costs(raw, defaults=DEFAULT_PROVIDER_COSTS):
+    costs = dict(defaults)
+    for item in (raw or "").split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            try:
+                costs[name.strip()] = float(value)
+            except ValueError:
+                pass
+    return costs
+
+
+def _parse_quotas(raw):
+    # Cota de tokens por janela (ex.: NEXO_LLM_QUOTAS="groq=500000,google=1000000")
+    return {name: int(value) for name, value in _parse_costs(raw, {}).items()}
+
+
+class CircuitOpen(Exception):
+    """A tentativa de teste do provedor em recuperação já está em andamento"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples: abre após N falhas seguidas e libera uma única
+    tentativa de teste (half-open) depois do período de cool-down.
+    Se a tentativa de teste não registrar resultado em cooldown segundos, outra é liberada.
+    - available(): só consulta o estado (usado ao ordenar os candidatos)
+    - claim(): reserva a tentativa de teste para a chamada que vai de fato ao provedor
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.probe_started_at = None
+        self._lock = threading.Lock()
+
+    def _recovering(self, now):
+        return self.state == "half_open" or (self.state == "open" and now - self.opened_at >= self.cooldown)
+
+    def _probe_busy(self, now):
+        return self.state == "half_open" and self.probe_in_flight and now - self.probe_started_at < self.cooldown
+
+    def recovering(self):
+        """
+        Indica se o provedor pode receber a tentativa de teste (cool-down concluído)
+        """
+        with self._lock:
+            return self._recovering(self.clock())
+
+    def available(self):
+        """
+        Indica se uma chamada seria liberada agora, sem reservar a tentativa de teste
+        """
+        with self._lock:
+            now = self.clock()
+            if self._recovering(now):
+                return not self._probe_busy(now)
+            return self.state == "closed"
+
+    def claim(self):
+        """
+        Reserva a chamada ao provedor. Em half-open, só a primeira chamada passa;
+        com o breaker ainda em cool-down a chamada é um último recurso e não é bloqueada.
+        """
+        with self._lock:
+            now = self.clock()
+            if not self._recovering(now):
+                return True
+            if self._probe_busy(now):
+                return False
+            self.state = "half_open"
+            self.probe_in_flight = True
+            self.probe_started_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = self.clock()
+            self.probe_in_flight = False
+
+    def retry_in(self):
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.cooldown - (self.clock() - self.opened_at))
+
+
+class ProviderStats:
+    """
+    Estatísticas de um provedor: latência e erro em EWMA, cota e custo
+    """
+
+    def __init__(self, name, cost, quality, alpha=0.3, breaker=None):
+        self.name = name
+        self.cost = cost
+        self.quality = quality
+        self.alpha = alpha
+        self.ewma_latency = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.remaining_quota = None  # tokens restantes (None = ilimitado)
+        self.quota = None  # cota configurada por janela (recarrega remaining_quota)
+        self.quota_resets_at = None
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=100)  # amostras recentes para percentis
+
+    def record(self, latency, success, tokens=0):
+        self.calls += 1
+        if latency is not None:
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        self.error_rate = self.alpha * (0.0 if success else 1.0) + (1 - self.alpha) * self.error_rate
+        if success:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.breaker.record_success()
+            if self.remaining_quota is not None:
+                self.remaining_quota = max(0, self.remaining_quota - tokens)
+        else:
+            self.failures += 1
+            self.breaker.record_failure()
+
+    def to_dict(self):
+        return {
+            "provider": self.name,
+            "ewma_latency": round(self.ewma_latency, 4) if self.ewma_latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "failures": self.failures,
+            "remaining_quota": self.remaining_quota,
+            "cost_per_1k": self.cost,
+            "breaker": self.breaker.state,
+        }
+
+
+class AdaptiveLLMRouter:
+    """
+    Escolhe o provedor de LLM por classe de chamada
+    - Descarta provedores com breaker aberto, cota esgotada ou abaixo da qualidade mínima
+    - Cotas de tokens por janela vêm de NEXO_LLM_QUOTAS (ou set_quota) e recarregam a cada quota_window
+    - Entre os que atendem ao SLO de latência, escolhe o mais barato
+    - Registra cada decisão para inspeção (get_decisions)
+    """
+
+    def __init__(self, costs=None, quality=None, call_classes=None, preferred=None,
+                 failure_threshold=3, cooldown=60.0, max_error_rate=0.5, quotas=None, quota_window=None,
+                 clock=time.monotonic):
+        self.costs = costs or _parse_costs(os.environ.get("NEXO_LLM_COSTS"))
+        self.quotas = quotas if quotas is not None else _parse_quotas(os.environ.get("NEXO_LLM_QUOTAS"))
+        self.quota_window = quota_window or float(os.environ.get("NEXO_LLM_QUOTA_WINDOW", 24 * 3600))
+        self.quality = quality or dict(PROVIDER_QUALITY)
+        self.call_classes = call_classes or {k: dict(v) for k, v in CALL_CLASSES.items()}
+        self.preferred = preferred
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_error_rate = max_error_rate
+        self.clock = clock
+        self.stats = {}
+        self.decisions = deque(maxlen=200)
+        self._lock = threading.Lock()
+
+    def _stats(self, provider):
+        stats = self.stats.get(provider)
+        if stats is None:
+            stats = ProviderStats(
+                provider,
+                self.costs.get(provider, 0.001),
+                self.quality.get(provider, 1),
+                breaker=CircuitBreaker(self.failure_threshold, self.cooldown, self.clock)
+            )
+            self.stats[provider] = stats
+            if provider in self.quotas:
+                self._set_quota(stats, self.quotas[provider])
+        elif stats.quota is not None and self.clock() >= stats.quota_resets_at:
+            # Nova janela: a cota volta ao valor configurado
+            self._set_quota(stats, stats.quota)
+        return stats
+
+    def _set_quota(self, stats, tokens):
+        stats.quota = tokens
+        stats.remaining_quota = tokens
+        stats.quota_resets_at = self.clock() + self.quota_window
+
+    def set_quota(self, provider, remaining_tokens):
+        """
+        Define a cota (em tokens) de um provedor para a janela atual; recarrega a cada quota_window
+        """
+        with self._lock:
+            self._set_quota(self._stats(provider), remaining_tokens)
+
+    def record(self, provider, latency, success, tokens=0):
+        """
+        Registra o resultado de uma chamada real ao provedor
+        """
+        with self._lock:
+            self._stats(provider).record(latency, success, tokens)
+
+    def latency_percentile(self, provider, q=0.95, min_samples=5):
+        """
+        Retorna o percentil q da latência recente do provedor (None se houver poucas amostras)
+        """
+        with self._lock:
+            samples = sorted(self._stats(provider).latencies)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def claim(self, provider):
+        """
+        Reserva a chamada ao provedor escolhido (em half-open, a única tentativa de teste).
+        Levanta CircuitOpen se outra chamada já está testando o provedor.
+        """
+        with self._lock:
+            if not self._stats(provider).breaker.claim():
+                raise CircuitOpen(f"Provedor {provider} em recuperação: tentativa de teste em andamento")
+
+    def track(self, provider, fn, tokens_estimate=0):
+        """
+        Executa fn() medindo latência e erros do provedor (após reservar a chamada com claim)
+        """
+        self.claim(provider)
+        start = self.clock()
+        try:
+            result = fn()
+        except Exception:
+            self.record(provider, self.clock() - start, False)
+            raise
+        tokens = tokens_estimate + (len(result) // 4 if isinstance(result, str) else 0)
+        self.record(provider, self.clock() - start, True, tokens)
+        return result
+
+    def rank(self, call_class, providers):
+        """
+        Retorna os provedores em ordem de preferência para a classe de chamada
+        """
+        config = self.call_classes.get(call_class) or self.call_classes["interactive"]
+        slo = config["latency_slo"]
+        min_quality = config.get("min_quality", 1)
+        with self._lock:
+            evaluated = []
+            for name in providers:
+                stats = self._stats(name)
+                reasons = []
+                # Só consulta o breaker: a tentativa de teste é reservada em track/claim, por quem chama
+                if not stats.breaker.available():
+                    reasons.append("circuit_open")
+                if stats.remaining_quota is not None and stats.remaining_quota <= 0:
+                    reasons.append("quota_exhausted")
+                # Em half-open o provedor recebe uma tentativa de teste, mesmo com taxa de erro alta
+                if stats.error_rate > self.max_error_rate and not stats.breaker.recovering():
+                    reasons.append("error_rate")
+                if stats.quality < min_quality:
+                    reasons.append("quality")
+                meets_slo = stats.ewma_latency is None or stats.ewma_latency <= slo
+                if not meets_slo:
+                    reasons.append("latency_slo")
+                evaluated.append((name, stats, reasons))
+
+            def cost_key(item):
+                name, stats = item[0], item[1]
+                return (stats.cost, 0 if name == self.preferred else 1, stats.ewma_latency or 0.0)
+
+            eligible = sorted([e for e in evaluated if not e[2]], key=cost_key)
+            # Sem candidatos ideais: relaxa SLO/qualidade, mantendo fora quem está com breaker aberto
+            degraded = sorted(
+                [e for e in evaluated if e[2] and "circuit_open" not in e[2] and "quota_exhausted" not in e[2]],
+                key=lambda e: (e[1].ewma_latency if e[1].ewma_latency is not None else 0.0, e[1].cost)
+            )
+            # Último recurso: provedores bloqueados, do que reabre primeiro
+            blocked = sorted(
+                [e for e in evaluated if "circuit_open" in e[2] or "quota_exhausted" in e[2]],
+                key=lambda e: e[1].breaker.retry_in()
+            )
+            ordered = [e[0] for e in eligible + degraded + blocked]
+            self.decisions.append({
+                "timestamp": time.time(),
+                "call_class": call_class,
+                "chosen": ordered[0] if ordered else None,
+                "order": ordered,
+                "candidates": [dict(stats.to_dict(), rejected_by=reasons) for _name, stats, reasons in evaluated],
+            })
+            return ordered
+
+    def choose(self, call_class, providers):
+        """
+        Retorna o provedor preferido para a classe de chamada
+        """
+        ordered = self.rank(call_class, providers)
+        return ordered[0] if ordered else None
+
+    def call(self, prompt, providers, call_class="interactive", measure=True):
+        """
+        Chama os provedores em ordem de preferência até um responder.
+        providers: dict nome -> função(prompt). Retorna (provedor, resposta).
+        """
+        last_error = None
+        for name in self.rank(call_class, list(providers)):
+            try:
+                if measure:
+                    response = self.track(name, lambda: providers[name](prompt), len(prompt) // 4)
+                else:
+                    response = providers[name](prompt)
+                return name, response
+            except Exception as e:
+                print(f"Erro ao chamar {name}: {e}. Tentando próximo provedor...")
+                last_error = e
+        raise last_error or RuntimeError("Nenhum provedor de LLM disponível.")
+
+    def get_decisions(self, limit=20):
+        """
+        Retorna as últimas decisões de roteamento
+        """
+        with self._lock:
+            return list(self.decisions)[-limit:]
+
+    def snapshot(self):
+        """
+        Retorna o estado atual de cada provedor
+        """
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+
+if __name__ == "__main__":
+    # Simulação offline com provedores falsos
+    import random
+
+    def fake_provider(delay, error_rate):
+        def call(prompt):
+            time.sleep(delay)
+            if random.random() < error_rate:
+                raise RuntimeError("erro simulado")
+            return f"ok ({delay}s)"
+        return call
+
+    router = AdaptiveLLMRouter(cooldown=0.5)
+    providers = {
+        "ollama": fake_provider(0.01, 0.9),
+        "groq": fake_provider(0.02, 0.0),
+        "openai": fake_provider(0.05, 0.0),
+    }
+    for _ in range(20):
+        print(router.call("olá", providers, "background"))
+    print(router.snapshot())
@@ -0,0 +1,135 @@
+"""
+Geradores de streaming de tokens para os provedores de LLM.
+OpenAI/Groq via SSE, Gemini com stream=True e Ollama com stream=True.
+Cada gerador produz apenas os trechos de texto novos.
+JSONFieldStreamer extrai um campo de texto de uma resposta JSON ainda em streaming.
+"""
+import re
+import json
+
+
+def stream_openai_compatible(response):
+    """
+    Lê uma resposta SSE no formato da OpenAI (também usada pelo Groq)
+    """
+    if response.status_code != 200:
+        raise Exception(f"Erro no streaming: {response.status_code} - {response.text}")
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+        except (ValueError, KeyError, IndexError):
+            continue
+        if delta:
+            yield delta
+
+
+def stream_gemini(model, prompt):
+    """
+    Streaming do Gemini (generate_content com stream=True)
+    """
+    for chunk in model.generate_content(prompt, stream=True):
+        text = getattr(chunk, "text", "")
+        if text:
+            yield text
+
+
+def stream_ollama(client, model_name, prompt):
+    """
+    Streaming do Ollama (chat com stream=True)
+    """
+    for chunk in client.chat(model=model_name, messages=[{"role": "user", "content": prompt}], stream=True):
+        text = chunk.get("message", {}).get("content", "")
+        if text:
+            yield text
+
+
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JSONFieldStreamer:
+    """
+    Extrai, à medida que os trechos chegam, o texto de um campo string de uma resposta JSON
+    (ex.: o campo "response" da interpretação de missão), para enviar ao usuário só a resposta
+    e não o JSON inteiro. feed(trecho) retorna o texto novo do campo (ou "").
+    """
+
+    def __init__(self, field):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk):
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if not self._started:
+            match = self._key.search(self._buffer)
+            if not match:
+                return ""
+            self._started = True
+            self._buffer = self._buffer[match.end():]
+        out = []
+        i = 0
+        while i < len(self._buffer):
+            char = self._buffer[i]
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                out.append(char)
+                i += 1
+                continue
+            # Escape incompleto no fim do trecho: espera o próximo
+            if i + 1 >= len(self._buffer):
+                break
+            code = self._buffer[i + 1]
+            if code == "u":
+                if i + 6 > len(self._buffer):
+                    break
+                code_point = int(self._buffer[i + 2:i + 6], 16)
+                if 0xD800 <= code_point < 0xDC00:
+                    # Par substituto (emoji com ensure_ascii): precisa do segundo \uXXXX
+                    if i + 12 > len(self._buffer):
+                        break
+                    low = int(self._buffer[i + 8:i + 12], 16)
+                    code_point = 0x10000 + ((code_point - 0xD800) << 10) + (low - 0xDC00)
+                    i += 6
+                out.append(chr(code_point))
+                i += 6
+            else:
+                out.append(_JSON_ESCAPES.get(code, code))
+                i += 2
+        self._buffer = "" if self.done else self._buffer[i:]
+        return "".join(out)
+
+
+def sse_event(payload):
+    """
+    Formata um evento Server-Sent Events com payload JSON
+    """
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def iter_sse_deltas(response):
+    """
+    Lê os eventos SSE gerados pelo /api/chat e produz os trechos de texto ("delta")
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        try:
+            event = json.loads(line[5:].strip())
+        except ValueError:
+            continue
+        if event.get("delta"):
+            yield event["delta"]
+        if event.get("error"):
+            raise Exception(event["error"])
+        if event.get("done"):
+            break
@@ -0,0 +1,247 @@
+"""
+Detecção de páginas quase duplicadas (SimHash) para o conteúdo extraído.
+O mesmo artigo republicado em várias URLs gera impressões digitais de 64 bits
+a poucos bits de distância; as cópias são descartadas antes de montar o prompt.
+As impressões ficam em SQLite, então conteúdo já visto é ignorado entre execuções.
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+DEFAULT_STORE_PATH = os.environ.get("NEXO_NEAR_DUP_PATH", "cache/near_duplicates.sqlite")
+DEFAULT_THRESHOLD = int(os.environ.get("NEXO_NEAR_DUP_THRESHOLD", 3))
+DEFAULT_MAX_AGE = int(os.environ.get("NEXO_NEAR_DUP_MAX_AGE", 7 * 24 * 3600))
+SHINGLE_SIZE = 3
+BANDS = 4  # 4 faixas de 16 bits: distância <= 3 garante ao menos uma faixa idêntica
+BAND_BITS = 64 // BANDS
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_words(text):
+    """
+    Palavras em minúsculas e sem acentos (mesmo artigo com pequenas variações de formatação)
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [w.lower() for w in _WORD_RE.findall(text)]
+
+
+def simhash(text, shingle_size=SHINGLE_SIZE):
+    """
+    SimHash de 64 bits sobre shingles de palavras normalizadas
+    """
+    words = normalize_words(text)
+    if not words:
+        return 0
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a, b):
+    """
+    Número de bits diferentes entre duas impressões
+    """
+    return bin(a ^ b).count("1")
+
+
+def _bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [fingerprint >> (i * BAND_BITS) & mask for i in range(BANDS)]
+
+
+def _to_signed(value):
+    # SQLite guarda inteiros de 64 bits com sinal
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateStore:
+    """
+    Armazém persistente de impressões SimHash
+    - seen_url(url): a URL já teve conteúdo registrado recentemente
+    - check(url, text): retorna a URL do conteúdo equivalente já visto, ou None (e registra a URL)
+    - record(url, text): registra a URL sem verificar (para quem só registra após processar)
+    - filter(items): mantém apenas itens com conteúdo inédito
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, threshold=DEFAULT_THRESHOLD, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.threshold = threshold
+        self.max_age = max_age
+        self.enabled = os.environ.get("NEXO_NEAR_DUP", "1") != "0"
+        self.stats = {"checked": 0, "duplicates": 0, "seen_urls": 0, "stored": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            self._connect()
+
+    def _connect(self):
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            band_columns = ", ".join(f"band{i} INTEGER" for i in range(BANDS))
+            self._conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    url TEXT PRIMARY KEY,
+                    simhash INTEGER,
+                    {band_columns},
+                    seen_at REAL
+                )
+                """
+            )
+            for i in range(BANDS):
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_fingerprints_band{i} ON fingerprints(band{i})")
+            self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Detecção de duplicatas desativada: {e}")
+            self._conn = None
+            self.enabled = False
+
+    def _min_seen(self):
+        return time.time() - self.max_age if self.max_age else 0
+
+    def seen_url(self, url):
+        """
+        Indica se a URL já foi processada dentro de max_age (pode ser pulada sem scraping)
+        """
+        if not self.enabled or not url:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM fingerprints WHERE url = ? AND seen_at >= ?", (url, self._min_seen())
+            ).fetchone()
+            if row:
+                self.stats["seen_urls"] += 1
+        return row is not None
+
+    def _find_similar(self, fingerprint, url):
+        # Candidatos: qualquer faixa idêntica; confirmação pela distância de Hamming completa
+        where = " OR ".join(f"band{i} = ?" for i in range(BANDS))
+        rows = self._conn.execute(
+            f"SELECT url, simhash FROM fingerprints WHERE ({where}) AND url != ? AND seen_at >= ?",
+            (*_bands(fingerprint), url, self._min_seen()),
+        ).fetchall()
+        for other_url, other in rows:
+            if hamming(fingerprint, _to_unsigned(other)) <= self.threshold:
+                return other_url
+        return None
+
+    def _store(self, url, fingerprint):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO fingerprints (url, simhash, {', '.join(f'band{i}' for i in range(BANDS))}, seen_at) "
+            f"VALUES (?, ?, {', '.join('?' for _ in range(BANDS))}, ?)",
+            (url, _to_signed(fingerprint), *_bands(fingerprint), time.time()),
+        )
+        self._conn.commit()
+
+    def check(self, url, text, record=True):
+        """
+        Retorna a URL de um conteúdo quase idêntico já visto (duplicata) ou None.
+        A URL é registrada nos dois casos, para que seen_url a pule nas próximas execuções;
+        com record=False apenas verifica (o registro fica para record()).
+        """
+        if not self.enabled or not text:
+            return None
+        fingerprint = simhash(text)
+        with self._lock:
+            self.stats["checked"] += 1
+            duplicate_of = self._find_similar(fingerprint, url)
+            if duplicate_of:
+                self.stats["duplicates"] += 1
+            if record:
+                if not duplicate_of:
+                    self.stats["stored"] += 1
+                self._store(url, fingerprint)
+        return duplicate_of
+
+    def record(self, url, text):
+        """
+        Registra a impressão do conteúdo da URL
+        """
+        if not self.enabled or not text:
+            return
+        fingerprint = simhash(text)
+        with self._lock:
+            self.stats["stored"] += 1
+            self._store(url, fingerprint)
+
+    def filter(self, items, text_field="content", url_field="url"):
+        """
+        Mantém apenas os itens cujo conteúdo não é quase duplicado (entre si ou de execuções anteriores)
+        """
+        return [item for item in items if self.check(item.get(url_field), item.get(text_field)) is None]
+
+    def prune(self):
+        """
+        Remove impressões mais antigas que max_age
+        """
+        if not self.enabled or not self.max_age:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM fingerprints WHERE seen_at < ?", (self._min_seen(),))
+            self._conn.commit()
+
+    def get_stats(self):
+        """
+        Contadores de verificação e número de impressões armazenadas
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            if self.enabled:
+                stats["fingerprints"] = self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        return stats
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_near_duplicates():
+    """
+    Retorna o armazém de impressões compartilhado
+    """
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = NearDuplicateStore()
+            _shared_store.prune()
+        return _shared_store
+
+
+if __name__ == "__main__":
+    # Teste do módulo: o mesmo artigo republicado com cabeçalho/rodapé diferentes é descartado
+    artigo = (
+        "Python 3.13 traz um modo experimental sem GIL e um compilador JIT. "
+        "As threads passam a executar código Python em paralelo em vários núcleos. "
+        "O novo interpretador interativo tem cores, edição multilinha e histórico. "
+    ) * 6
+    paginas = [
+        {"url": "https://blog.example/python-313", "content": "Blog Exemplo | " + artigo + " Comentários (3)"},
+        {"url": "https://agregador.example/post/991", "content": "Notícias: " + artigo.replace("Python", "python") + " Compartilhe"},
+        {"url": "https://outro.example/rust", "content": "Rust 1.80 estabiliza LazyCell e LazyLock, além de novos lints. " * 6},
+    ]
+    store = NearDuplicateStore(path=":memory:")
+    unicas = store.filter(paginas)
+    print([p["url"] for p in unicas])
+    print(hamming(simhash(paginas[0]["content"]), simhash(paginas[1]["content"])),
+          hamming(simhash(paginas[0]["content"]), simhash(paginas[2]["content"])))
+    print(store.seen_url("https://agregador.example/post/991"), store.get_stats())
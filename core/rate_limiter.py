@@ -0,0 +1,243 @@
+"""
+Limitador de taxa por provedor (token bucket) com fila de prioridade.
+Cada provedor tem um balde de requisições/min e outro de tokens/min;
+chamadas interativas passam à frente do trabalho de fundo na fila.
+"""
+import os
+import time
+import heapq
+import threading
+import itertools
+
+# Prioridade por classe de chamada (menor = atendido primeiro)
+PRIORITIES = {
+    "interactive": 0,
+    "critical": 0,
+    "code": 5,
+    "background": 10,
+}
+
+# Tempo máximo de espera na fila por classe antes de rejeitar (segundos)
+MAX_WAIT = {
+    "interactive": 30.0,
+    "critical": 60.0,
+    "code": 120.0,
+    "background": 300.0,
+}
+
+# Limites padrão (requisições/min, tokens/min). Sobrescreva com NEXO_RATE_LIMITS="google=15:1000000,groq=30:6000"
+DEFAULT_LIMITS = {
+    "google": (15, 1000000),
+    "openai": (500, 200000),
+    "groq": (30, 6000),
+    "ollama": (None, None),
+}
+
+
+class RateLimitExceeded(Exception):
+    """Tempo de espera na fila do provedor excedido"""
+
+
+def _parse_limits(raw):
+    limits = dict(DEFAULT_LIMITS)
+    for item in (raw or "").split(","):
+        if "=" in item and ":" in item:
+            name, values = item.split("=", 1)
+            rpm, tpm = values.split(":", 1)
+            limits[name.strip()] = (int(rpm) if rpm else None, int(tpm) if tpm else None)
+    return limits
+
+
+class TokenBucket:
+    """
+    Balde de tokens: capacidade máxima e reposição contínua por segundo
+    """
+
+    def __init__(self, capacity, refill_per_second, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def time_until(self, amount=1):
+        """
+        Segundos até haver `amount` tokens disponíveis (0 se já houver)
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def take(self, amount=1):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class ProviderRateLimiter:
+    """
+    Fila de prioridade + baldes de requisições e tokens de um provedor
+    """
+
+    def __init__(self, name, requests_per_minute=None, tokens_per_minute=None, clock=time.monotonic):
+        self.name = name
+        self.clock = clock
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock) if tokens_per_minute else None
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.metrics = {
+            "granted": 0,
+            "rejected": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+            "by_priority": {},
+        }
+
+    def _wait_needed(self, tokens):
+        wait = 0.0
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.time_until(1))
+        if self.token_bucket:
+            wait = max(wait, self.token_bucket.time_until(tokens))
+        return wait
+
+    def _record(self, priority, waited, granted):
+        stats = self.metrics["by_priority"].setdefault(priority, {"granted": 0, "rejected": 0, "total_wait": 0.0})
+        if granted:
+            self.metrics["granted"] += 1
+            self.metrics["total_wait"] += waited
+            self.metrics["max_wait"] = max(self.metrics["max_wait"], waited)
+            stats["granted"] += 1
+            stats["total_wait"] += waited
+        else:
+            self.metrics["rejected"] += 1
+            stats["rejected"] += 1
+        self.metrics["queue_depth"] = len(self._queue)
+
+    def acquire(self, tokens=1, priority=10, timeout=60.0):
+        """
+        Bloqueia até a chamada poder ser feita; retorna o tempo de espera.
+        Levanta RateLimitExceeded se o timeout expirar antes.
+        """
+        if not self.request_bucket and not self.token_bucket:
+            return 0.0
+        start = self.clock()
+        deadline = start + timeout
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._queue, entry)
+            self.metrics["queue_depth"] = len(self._queue)
+            self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], len(self._queue))
+            while True:
+                now = self.clock()
+                wait = self._wait_needed(tokens) if self._queue[0] == entry else None
+                if wait == 0.0:
+                    heapq.heappop(self._queue)
+                    if self.request_bucket:
+                        self.request_bucket.take(1)
+                    if self.token_bucket:
+                        self.token_bucket.take(tokens)
+                    waited = now - start
+                    self._record(priority, waited, True)
+                    self._condition.notify_all()
+                    return waited
+                if now >= deadline:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._record(priority, now - start, False)
+                    self._condition.notify_all()
+                    raise RateLimitExceeded(f"Fila do provedor {self.name} excedeu {timeout:.0f}s")
+                remaining = deadline - now
+                self._condition.wait(min(wait, remaining) if wait is not None else remaining)
+
+    def get_metrics(self):
+        with self._condition:
+            metrics = dict(self.metrics)
+            metrics["by_priority"] = {k: dict(v) for k, v in self.metrics["by_priority"].items()}
+            metrics["queue_depth"] = len(self._queue)
+        granted = metrics["granted"]
+        metrics["avg_wait"] = round(metrics["total_wait"] / granted, 4) if granted else 0.0
+        return metrics
+
+
+class RateLimiterRegistry:
+    """
+    Limitadores de todos os provedores, compartilhados pelo processo
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic):
+        self.limits = limits or _parse_limits(os.environ.get("NEXO_RATE_LIMITS"))
+        self.clock = clock
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider):
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None:
+                rpm, tpm = self.limits.get(provider, (None, None))
+                limiter = ProviderRateLimiter(provider, rpm, tpm, self.clock)
+                self._limiters[provider] = limiter
+            return limiter
+
+    def acquire(self, provider, tokens=1, call_class="interactive"):
+        """
+        Aguarda a vez da chamada conforme a prioridade da classe
+        """
+        call_class = call_class or "interactive"
+        return self.limiter(provider).acquire(
+            tokens,
+            PRIORITIES.get(call_class, PRIORITIES["background"]),
+            MAX_WAIT.get(call_class, MAX_WAIT["background"])
+        )
+
+    def get_metrics(self):
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {name: limiter.get_metrics() for name, limiter in limiters.items()}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Retorna o registro de limitadores compartilhado
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = RateLimiterRegistry()
+        return _registry
+
+
+if __name__ == "__main__":
+    # Teste do módulo: fila saturada, a chamada interativa passa à frente das de fundo
+    limiter = ProviderRateLimiter("teste", requests_per_minute=120)
+    limiter.request_bucket.tokens = 0
+    ordem = []
+
+    def chamada(nome, prioridade):
+        limiter.acquire(priority=prioridade, timeout=10)
+        ordem.append(nome)
+
+    threads = [threading.Thread(target=chamada, args=(f"fundo{i}", 10)) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    urgente = threading.Thread(target=chamada, args=("interativa", 0))
+    urgente.start()
+    for t in threads + [urgente]:
+        t.join()
+    print(ordem, limiter.get_metrics())
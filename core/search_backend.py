@@ -0,0 +1,223 @@
+"""
+Backend único do Google Custom Search.
+O serviço do googleapiclient é construído uma vez por chave (documento de
+descoberta estático, sem cache de descoberta em disco) e reaproveitado;
+várias consultas vão em uma única requisição em lote. Consultas individuais
+usam o cache HTTP e o ritmo por host, como o restante das buscas.
+"""
+import os
+import threading
+import requests
+from core.http_cache import get_http_cache
+from core.crawl_scheduler import get_crawl_scheduler
+
+CSE_URL = "https://www.googleapis.com/customsearch/v1"
+MAX_BATCH = int(os.environ.get("NEXO_GOOGLE_BATCH_SIZE", 10))
+REQUEST_TIMEOUT = float(os.environ.get("NEXO_GOOGLE_TIMEOUT", 10))
+
+
+class SearchBackendError(Exception):
+    """Falha na API do Google Custom Search"""
+
+
+def normalize_items(data):
+    """
+    Converte a resposta da API em resultados {title, link, snippet, source}
+    """
+    return [
+        {
+            "title": item.get("title"),
+            "link": item.get("link"),
+            "snippet": item.get("snippet"),
+            "source": "google"
+        }
+        for item in (data or {}).get("items", [])
+    ]
+
+
+class GoogleSearchBackend:
+    """
+    Cliente do Google Custom Search compartilhado
+    - service(): serviço do googleapiclient construído uma única vez
+    - search(query, num): uma consulta (cache HTTP + ritmo por host)
+    - search_many(queries, num): consultas fora do cache em requisições em lote
+    """
+
+    def __init__(self, api_key, cse_id, session=None):
+        self.api_key = api_key
+        self.cse_id = cse_id
+        self.http_cache = get_http_cache()
+        self.session = session or self.http_cache.session
+        self.scheduler = get_crawl_scheduler()
+        self._fetch = self.scheduler.wrap(self._get)
+        self._service = None
+        self._service_lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"searches": 0, "batches": 0, "batched_queries": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.api_key and self.cse_id)
+
+    def _count(self, metric, amount=1):
+        with self._stats_lock:
+            self.stats[metric] += amount
+
+    def _get(self, url, params=None, headers=None, timeout=REQUEST_TIMEOUT):
+        return self.session.get(url, params=params, headers=headers, timeout=timeout)
+
+    def _params(self, query, num):
+        return {"key": self.api_key, "cx": self.cse_id, "q": query, "num": num}
+
+    def service(self):
+        """
+        Serviço "customsearch" do googleapiclient, construído uma vez (discovery estático, sem cache em disco)
+        """
+        with self._service_lock:
+            if self._service is None:
+                from googleapiclient.discovery import build
+                try:
+                    self._service = build("customsearch", "v1", developerKey=self.api_key,
+                                          cache_discovery=False, static_discovery=True)
+                except TypeError:
+                    # Versões antigas do googleapiclient não têm static_discovery
+                    self._service = build("customsearch", "v1", developerKey=self.api_key, cache_discovery=False)
+            return self._service
+
+    def _http(self):
+        # httplib2.Http não é thread-safe: uma conexão por thread, reaproveitada entre lotes
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import httplib2
+            http = httplib2.Http(timeout=REQUEST_TIMEOUT)
+            self._local.http = http
+        return http
+
+    def search(self, query, num=10):
+        """
+        Executa uma consulta e retorna a lista de resultados normalizados
+        """
+        if not self.configured:
+            raise SearchBackendError("Google API Key ou CSE ID não configurados.")
+
+        def parse(response):
+            if response.status_code != 200:
+                raise SearchBackendError(f"Erro na API Google: {response.status_code}")
+            return normalize_items(response.json())
+
+        self._count("searches")
+        try:
+            return self.http_cache.fetch_extracted(CSE_URL, parse, params=self._params(query, num),
+                                                   kind="google", fetcher=self._fetch)
+        except Exception:
+            self._count("errors")
+            raise
+
+    def _execute_batch(self, queries, num):
+        service = self.service()
+        results = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                print(f"Erro na busca em lote '{queries[int(request_id)]}': {exception}")
+                self._count("errors")
+                results[int(request_id)] = None
+            else:
+                results[int(request_id)] = normalize_items(response)
+
+        batch = service.new_batch_http_request(callback=callback)
+        for i, query in enumerate(queries):
+            batch.add(service.cse().list(q=query, cx=self.cse_id, num=num), request_id=str(i))
+        self.scheduler.acquire(CSE_URL)
+        batch.execute(http=self._http())
+        self._count("batches")
+        self._count("batched_queries", len(queries))
+        return [results.get(i) for i in range(len(queries))]
+
+    def search_many(self, queries, num=10):
+        """
+        Executa várias consultas; as que não estão no cache vão em lotes de até MAX_BATCH.
+        Retorna uma lista de resultados por consulta (None em caso de falha).
+        """
+        if not self.configured:
+            raise SearchBackendError("Google API Key ou CSE ID não configurados.")
+        results = [self.http_cache.peek_extracted(CSE_URL, self._params(q, num)) for q in queries]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        try:
+            self.service()
+            batched = True
+        except ImportError:
+            batched = False
+
+        for start in range(0, len(missing), MAX_BATCH):
+            chunk = missing[start:start + MAX_BATCH]
+            if batched:
+                try:
+                    found = self._execute_batch([queries[i] for i in chunk], num)
+                except Exception as e:
+                    print(f"Erro na requisição em lote: {e}")
+                    self._count("errors")
+                    found = [None] * len(chunk)
+            else:
+                found = []
+                for i in chunk:
+                    try:
+                        found.append(self.search(queries[i], num))
+                    except Exception as e:
+                        print(f"Erro na busca '{queries[i]}': {e}")
+                        found.append(None)
+            for i, items in zip(chunk, found):
+                results[i] = items
+                if batched and items is not None:
+                    self.http_cache.put_extracted(CSE_URL, items, params=self._params(queries[i], num), kind="google")
+        return results
+
+    def get_stats(self):
+        with self._stats_lock:
+            return dict(self.stats, service_built=self._service is not None)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_search_backend(api_key=None, cse_id=None):
+    """
+    Retorna o backend compartilhado para o par (chave, CSE).
+    Sem argumentos usa GOOGLE_SEARCH_API_KEY (ou GOOGLE_API_KEY) e GOOGLE_CSE_ID.
+    """
+    api_key = api_key or os.environ.get("GOOGLE_SEARCH_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+    cse_id = cse_id or os.environ.get("GOOGLE_CSE_ID")
+    with _backends_lock:
+        backend = _backends.get((api_key, cse_id))
+        if backend is None:
+            backend = GoogleSearchBackend(api_key, cse_id)
+            _backends[(api_key, cse_id)] = backend
+        return backend
+
+
+if __name__ == "__main__":
+    # Benchmark: build() a cada busca (como era em ferramentas) vs serviço reaproveitado
+    import time
+
+    backend = get_search_backend()
+    try:
+        from googleapiclient.discovery import build
+    except ImportError:
+        print("googleapiclient não instalado: pip install google-api-python-client")
+        raise SystemExit(0)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        build("customsearch", "v1", developerKey=backend.api_key or "x", cache_discovery=False)
+    print(f"build() por chamada: {(time.perf_counter() - start) / 20 * 1000:.1f} ms")
+    start = time.perf_counter()
+    for _ in range(20):
+        backend.service()
+    print(f"Serviço compartilhado: {(time.perf_counter() - start) / 20 * 1000:.3f} ms")
+
+    if backend.configured:
+        consultas = ["python asyncio", "flask caching", "sqlite fts5"]
+        print(backend.search_many(consultas, 3))
+        print(backend.get_stats())
@@ -0,0 +1,265 @@
+"""
+Índice local (SQLite FTS5) de buscas, resultados e páginas extraídas.
+Persiste entre reinícios, permite busca textual ranqueada (bm25) e
+responder a temas repetidos sem acessar a rede ("local primeiro").
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+DEFAULT_INDEX_PATH = os.environ.get("NEXO_SEARCH_INDEX_PATH", "cache/search_index.sqlite")
+DEFAULT_LOCAL_MAX_AGE = int(os.environ.get("NEXO_SEARCH_LOCAL_MAX_AGE", 7 * 24 * 3600))
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_query(query):
+    """
+    Normaliza a consulta (minúsculas, espaços únicos) para comparar buscas repetidas
+    """
+    return " ".join((query or "").lower().split())
+
+
+def fts_query(text, operator="AND"):
+    """
+    Converte texto livre em expressão FTS5 segura (cada termo entre aspas)
+    """
+    terms = [w for w in _WORD_RE.findall(text or "") if len(w) > 1]
+    return f" {operator} ".join(f'"{term}"' for term in terms)
+
+
+class SearchIndex:
+    """
+    Índice persistente de buscas
+    - documents: resultados (kind="result") e páginas extraídas (kind="page"), únicos por URL
+    - documents_fts: índice FTS5 sobre título e corpo, mantido por triggers
+      (páginas com o mesmo hash de conteúdo não são reindexadas)
+    - queries: consultas já feitas e os links retornados
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.enabled = os.environ.get("NEXO_SEARCH_INDEX", "1") != "0"
+        self.stats = {"indexed_queries": 0, "indexed_pages": 0, "unchanged_pages": 0, "local_hits": 0, "local_misses": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            self._connect()
+
+    def _connect(self):
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT,
+                    url TEXT,
+                    title TEXT,
+                    body TEXT,
+                    query TEXT,
+                    source TEXT,
+                    updated_at REAL,
+                    content_hash TEXT,
+                    UNIQUE(kind, url)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                    title, body, content='documents', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+                    INSERT INTO documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+                END;
+                CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+                    INSERT INTO documents_fts(documents_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+                END;
+                DROP TRIGGER IF EXISTS documents_au;
+                CREATE TRIGGER documents_au AFTER UPDATE OF title, body ON documents BEGIN
+                    INSERT INTO documents_fts(documents_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+                    INSERT INTO documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+                END;
+                CREATE TABLE IF NOT EXISTS queries (
+                    normalized TEXT PRIMARY KEY,
+                    query TEXT,
+                    links TEXT,
+                    count INTEGER,
+                    updated_at REAL
+                );
+                """
+            )
+            # Índices criados antes da coluna content_hash
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+            if "content_hash" not in columns:
+                self._conn.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+            self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Índice de buscas desativado: {e}")
+            self._conn = None
+            self.enabled = False
+
+    def _upsert(self, kind, url, title, body, query=None, source=None, content_hash=None):
+        self._conn.execute(
+            "INSERT INTO documents (kind, url, title, body, query, source, updated_at, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(kind, url) DO UPDATE SET title = excluded.title, body = excluded.body, "
+            "query = COALESCE(excluded.query, documents.query), source = COALESCE(excluded.source, documents.source), "
+            "updated_at = excluded.updated_at, content_hash = excluded.content_hash",
+            (kind, url, title or "", body or "", query, source, time.time(), content_hash),
+        )
+
+    def add_search(self, query, results):
+        """
+        Indexa uma busca e seus resultados (título, link e snippet)
+        """
+        if not self.enabled:
+            return
+        links = [r.get("link") for r in results if r.get("link")]
+        with self._lock:
+            for result in results:
+                if result.get("link"):
+                    self._upsert("result", result["link"], result.get("title"), result.get("snippet"), query, result.get("source"))
+            self._conn.execute(
+                "INSERT INTO queries (normalized, query, links, count, updated_at) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT(normalized) DO UPDATE SET links = excluded.links, count = queries.count + 1, "
+                "updated_at = excluded.updated_at",
+                (normalize_query(query), query, json.dumps(links), time.time()),
+            )
+            self._conn.commit()
+            self.stats["indexed_queries"] += 1
+
+    def add_page(self, url, title, content):
+        """
+        Indexa (ou atualiza) o texto extraído de uma página.
+        Se o conteúdo não mudou (mesmo hash), só renova a data, sem mexer no FTS.
+        """
+        if not self.enabled or not url:
+            return
+        content_hash = hashlib.sha256(f"{title or ''}\0{content or ''}".encode("utf-8")).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM documents WHERE kind = 'page' AND url = ?", (url,)
+            ).fetchone()
+            if row and row[0] == content_hash:
+                self._conn.execute(
+                    "UPDATE documents SET updated_at = ? WHERE kind = 'page' AND url = ?", (time.time(), url)
+                )
+                self._conn.commit()
+                self.stats["unchanged_pages"] += 1
+                return
+            self._upsert("page", url, title, content, content_hash=content_hash)
+            self._conn.commit()
+            self.stats["indexed_pages"] += 1
+
+    def search(self, text, limit=10, kinds=("result", "page"), max_age=None, operator="AND"):
+        """
+        Busca textual ranqueada (bm25). Retorna dicts com kind, title, url, snippet e score.
+        """
+        expression = fts_query(text, operator)
+        if not self.enabled or not expression:
+            return []
+        min_updated = time.time() - max_age if max_age else 0
+        placeholders = ",".join("?" for _ in kinds)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT d.kind, d.title, d.url, snippet(documents_fts, 1, '', '', '…', 32), d.source,
+                       bm25(documents_fts, 5.0, 1.0) AS score
+                FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+                WHERE documents_fts MATCH ? AND d.kind IN ({placeholders}) AND d.updated_at >= ?
+                ORDER BY score LIMIT ?
+                """,
+                (expression, *kinds, min_updated, limit),
+            ).fetchall()
+        return [
+            {"kind": kind, "title": title, "url": url, "snippet": snippet, "source": source, "score": round(-score, 4)}
+            for kind, title, url, snippet, source, score in rows
+        ]
+
+    def lookup(self, query, num_results=5, max_age=DEFAULT_LOCAL_MAX_AGE):
+        """
+        Responde uma busca pelo índice: consulta idêntica recente ou resultados/páginas que
+        contenham todos os termos. Retorna None se não houver resultados suficientes.
+        """
+        if not self.enabled:
+            return None
+        min_updated = time.time() - max_age if max_age else 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT links FROM queries WHERE normalized = ? AND updated_at >= ?",
+                (normalize_query(query), min_updated),
+            ).fetchone()
+            links = json.loads(row[0])[:num_results] if row else []
+            exact = []
+            for link in links:
+                doc = self._conn.execute(
+                    "SELECT title, url, body FROM documents WHERE kind = 'result' AND url = ?", (link,)
+                ).fetchone()
+                if doc:
+                    exact.append({"title": doc[0], "link": doc[1], "snippet": doc[2], "source": "local_index"})
+        # Consulta idêntica: devolve o que ela retornou, se todos os resultados ainda estão no índice
+        if links and len(exact) == len(links):
+            self._count("local_hits")
+            return exact
+
+        results, seen = [], set()
+        for hit in self.search(query, limit=num_results * 3, max_age=max_age):
+            if hit["url"] in seen:
+                continue
+            seen.add(hit["url"])
+            results.append({"title": hit["title"], "link": hit["url"], "snippet": hit["snippet"], "source": "local_index"})
+            if len(results) >= num_results:
+                break
+        if len(results) >= num_results:
+            self._count("local_hits")
+            return results
+        self._count("local_misses")
+        return None
+
+    def _count(self, metric):
+        with self._lock:
+            self.stats[metric] += 1
+
+    def get_stats(self):
+        """
+        Contadores do índice e número de documentos
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            if self.enabled:
+                stats["documents"] = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+                stats["queries"] = self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+        return stats
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_search_index():
+    """
+    Retorna o índice de buscas compartilhado
+    """
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = SearchIndex()
+        return _shared_index
+
+
+if __name__ == "__main__":
+    # Teste do módulo
+    index = SearchIndex(path=":memory:")
+    index.add_search("flask optimization", [
+        {"title": "Otimizando Flask", "link": "https://a.example/flask", "snippet": "Cache e gunicorn para APIs Flask", "source": "google"},
+        {"title": "Flask em produção", "link": "https://b.example/prod", "snippet": "Workers, threads e otimização", "source": "google"},
+    ])
+    index.add_page("https://c.example/cache", "Cache HTTP", "Como usar ETag e cache em aplicações Flask rápidas")
+    print(index.lookup("Flask   OPTIMIZATION", 2))
+    print(index.lookup("cache flask", 2))
+    print(index.search("otimizacao"))
+    print(index.get_stats())
@@ -4,6 +4,7 @@ import logging
 from datetime import datetime
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from core.write_behind import get_write_behind
 
 load_dotenv()
 
@@ -25,6 +26,8 @@ class SelfCorrectionModule:
             return
         try:
             self.supabase = create_client(self.supabase_url, self.supabase_key)
+            # Logs e lições são gravados em lote por uma fila em segundo plano
+            self.write_queue = get_write_behind(self.supabase)
             logger.info("Conexão com Supabase estabelecida para SelfCorrectionModule.")
             self._ensure_tables_exist()
         except Exception as e:
@@ -41,13 +44,13 @@ class SelfCorrectionModule:
             logger.warning("Supabase não inicializado. Não foi possível logar erro.")
             return
         try:
-            data, count = self.supabase.table(self.error_log_table).insert({
+            self.write_queue.enqueue(self.error_log_table, {
                 "agent_name": self.agent_name,
                 "error_type": error_type,
                 "description": description,
                 "context": json.dumps(context) if context else "{}",
                 "timestamp": datetime.now().isoformat()
-            }).execute()
+            })
             logger.error(f"Erro logado para {self.agent_name}: {error_type} - {description}")
         except Exception as e:
             logger.error(f"Erro ao logar erro no Supabase: {e}")
@@ -57,14 +60,14 @@ class SelfCorrectionModule:
             logger.warning("Supabase não inicializado. Não foi possível adicionar à memória de aprendizado.")
             return
         try:
-            data, count = self.supabase.table(self.learning_memory_table).insert({
+            self.write_queue.enqueue(self.learning_memory_table, {
                 "agent_name": self.agent_name,
                 "lesson": lesson,
                 "action_taken": action_taken,
                 "effectiveness": effectiveness,
                 "context": json.dumps(context) if context else "{}",
                 "timestamp": datetime.now().isoformat()
-            }).execute()
+            })
             logger.info(f"Lição aprendida adicionada à memória para {self.agent_name}: {lesson}")
         except Exception as e:
             logger.error(f"Erro ao adicionar lição à memória de aprendizado: {e}")
@@ -0,0 +1,158 @@
+"""
+Cache semântico de respostas de LLM construído sobre a VectorMemory.
+Reaproveita a resposta de um prompt anterior quase idêntico (ex.: mesma missão
+com outro timestamp) quando a similaridade passa do limiar
+configurado para o ponto de chamada.
+"""
+import os
+import re
+import time
+import threading
+
+DEFAULT_THRESHOLDS = {
+    "interpret_mission": 0.95,
+    # Chaveado pelo conteúdo empacotado das melhorias: só reaproveita material praticamente igual
+    "evolution_opportunities": 0.98,
+}
+
+# Prompts de geração de código nunca são reaproveitados
+CODE_GENERATION_MARKERS = (
+    "coder ai",
+    "implemente o código",
+    "gere um código",
+    "retorne apenas o código python",
+    "crie um agente python",
+)
+
+
+def normalize_for_semantics(text):
+    """
+    Remove ruído que não muda o sentido do prompt: datas, horários e espaços.
+    Os demais números são mantidos ("Crie 5 agentes" e "Crie 50 agentes" são missões diferentes).
+    """
+    text = (text or "").lower()
+    text = re.sub(r"\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?", " <data> ", text)
+    text = re.sub(r"\d{1,2}/\d{1,2}/\d{2,4}", " <data> ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def is_code_generation(prompt):
+    """
+    Detecta prompts de geração de código, que não devem usar o cache semântico
+    """
+    lowered = (prompt or "").lower()
+    return any(marker in lowered for marker in CODE_GENERATION_MARKERS)
+
+
+class SemanticLLMCache:
+    """
+    Camada opcional de cache semântico (ativada com NEXO_SEMANTIC_CACHE=1)
+    - Limiar de similaridade por ponto de chamada (NEXO_SEMANTIC_THRESHOLD_<PONTO>)
+    - Exclui prompts de geração de código e os pontos de chamada de NEXO_SEMANTIC_CACHE_EXCLUDE
+      (lista separada por vírgulas, ex.: "evolution_opportunities")
+    - Contabiliza quantas chamadas a provedores foram economizadas
+    """
+
+    def __init__(self, thresholds=None, ttl=None, enabled=None, memory=None, excluded=None):
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.thresholds.update(thresholds or {})
+        if excluded is None:
+            excluded = os.environ.get("NEXO_SEMANTIC_CACHE_EXCLUDE", "").split(",")
+        self.excluded = {site.strip() for site in excluded if site.strip()}
+        self.ttl = ttl if ttl is not None else int(os.environ.get("NEXO_SEMANTIC_CACHE_TTL", 24 * 3600))
+        self.enabled = enabled if enabled is not None else os.environ.get("NEXO_SEMANTIC_CACHE", "0") == "1"
+        self.memory = memory
+        self.metrics = {"lookups": 0, "hits": 0, "misses": 0, "excluded": 0, "stores": 0, "saved_calls": 0, "by_call_site": {}}
+        self._lock = threading.Lock()
+
+    def _get_memory(self):
+        if self.memory is None and self.enabled:
+            try:
+                from core.vector_memory import VectorMemory
+                self.memory = VectorMemory("nexo_semantic_llm_cache", space="cosine")
+            except Exception as e:
+                print(f"⚠️ Cache semântico desativado: {e}")
+                self.enabled = False
+        return self.memory
+
+    def threshold_for(self, call_site):
+        """
+        Retorna o limiar de similaridade do ponto de chamada
+        """
+        env_value = os.environ.get(f"NEXO_SEMANTIC_THRESHOLD_{call_site.upper()}")
+        if env_value:
+            return float(env_value)
+        return self.thresholds.get(call_site, 0.97)
+
+    def _count(self, call_site, metric):
+        with self._lock:
+            self.metrics[metric] += 1
+            site = self.metrics["by_call_site"].setdefault(call_site, {"hits": 0, "misses": 0})
+            if metric in site:
+                site[metric] += 1
+
+    def lookup(self, call_site, text, prompt=None):
+        """
+        Retorna a resposta de um prompt anterior semelhante ou None
+        """
+        if not self.enabled:
+            return None
+        if call_site in self.excluded or is_code_generation(prompt or text):
+            self._count(call_site, "excluded")
+            return None
+        memory = self._get_memory()
+        if memory is None:
+            return None
+        self._count(call_site, "lookups")
+        try:
+            vizinhos = memory.buscar_com_distancia(f"{call_site}: {normalize_for_semantics(text)}", k=3)
+        except Exception as e:
+            print(f"Erro no cache semântico: {e}")
+            vizinhos = []
+        now = time.time()
+        for _doc, meta, distance in vizinhos:
+            meta = meta or {}
+            if meta.get("call_site") != call_site:
+                continue
+            if self.ttl and now - meta.get("created_at", 0) > self.ttl:
+                continue
+            if 1.0 - distance >= self.threshold_for(call_site):
+                self._count(call_site, "hits")
+                self._count(call_site, "saved_calls")
+                return meta.get("response")
+        self._count(call_site, "misses")
+        return None
+
+    def store(self, call_site, text, response, prompt=None):
+        """
+        Registra o prompt normalizado e a resposta para reaproveitamento futuro
+        """
+        if not self.enabled or not isinstance(response, str) or call_site in self.excluded or is_code_generation(prompt or text):
+            return
+        memory = self._get_memory()
+        if memory is None:
+            return
+        try:
+            memory.salvar_ideia(
+                f"{call_site}: {normalize_for_semantics(text)}",
+                {"call_site": call_site, "response": response, "created_at": time.time()}
+            )
+            self._count(call_site, "stores")
+        except Exception as e:
+            print(f"Erro ao salvar no cache semântico: {e}")
+
+    def get_metrics(self):
+        """
+        Retorna métricas de uso, incluindo chamadas economizadas
+        """
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["by_call_site"] = {k: dict(v) for k, v in self.metrics["by_call_site"].items()}
+        metrics["enabled"] = self.enabled
+        return metrics
+
+
+if __name__ == "__main__":
+    # Teste do módulo
+    print(normalize_for_semantics("Nova funcionalidade ciclo 818 em 2025-09-19T10:00:00"))
+    print(is_code_generation("Você é o Coder AI do ecossistema EcoGuardians."))
@@ -0,0 +1,102 @@
+"""
+Coalescência "single-flight" de requisições idênticas em andamento.
+Chamadas concorrentes com a mesma impressão digital aguardam uma única
+execução subjacente e compartilham o resultado (ou a exceção).
+"""
+import json
+import hashlib
+import threading
+
+
+def fingerprint(*parts):
+    """
+    Gera a impressão digital estável de uma requisição a partir das suas partes
+    """
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Grupo de single-flight: a primeira chamada de uma chave executa a função,
+    as chamadas simultâneas com a mesma chave esperam e reaproveitam o resultado
+    """
+
+    def __init__(self, name="default"):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        """
+        Executa fn() uma única vez para todas as chamadas simultâneas com a mesma chave
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self):
+        """
+        Número de chaves em execução no momento
+        """
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self):
+        """
+        Retorna quantas execuções reais ocorreram e quantas chamadas foram coalescidas
+        """
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls), name=self.name)
+
+
+if __name__ == "__main__":
+    # Teste do módulo: 5 chamadas simultâneas, 1 execução
+    import time
+
+    group = SingleFlight("teste")
+
+    def busca_lenta():
+        time.sleep(0.3)
+        return ["resultado"]
+
+    threads = [threading.Thread(target=lambda: print(group.do("q", busca_lenta))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(group.get_stats())
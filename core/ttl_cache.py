@@ -0,0 +1,140 @@
+"""
+Cache em memória com expiração (TTL) e limite de entradas (LRU).
+Usado como cache read-through de leituras do Supabase (contexto do usuário,
+memória do agente): a leitura consulta o banco só na primeira vez ou após
+expirar, e as gravações atualizam o cache na hora (write-through), de modo
+que quem grava lê o próprio valor mesmo com a fila write-behind ainda pendente.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+DEFAULT_TTL = float(os.environ.get("NEXO_CONTEXT_CACHE_TTL", 300))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("NEXO_CONTEXT_CACHE_MAX", 1024))
+
+# Marca de "não encontrado no cache" (None é um valor válido: chave inexistente no banco)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Dicionário LRU com TTL, seguro entre threads
+    - get(chave): valor ou MISSING (ausente ou expirado)
+    - set(chave, valor): grava/atualiza e marca como mais recente
+    - get_or_load(chave, loader): read-through; o valor carregado só é guardado se
+      nenhuma gravação (set/invalidate) aconteceu na chave durante a carga
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.enabled = os.environ.get("NEXO_CONTEXT_CACHE", "1") != "0" and max_entries > 0
+        self._entries = OrderedDict()
+        # Versão por chave, incrementada a cada gravação; só existe enquanto há carga em andamento
+        self._versions = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "stale_loads": 0}
+
+    def get(self, key):
+        if not self.enabled:
+            return MISSING
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return MISSING
+            expires_at, value = entry
+            if self.ttl and self.clock() >= expires_at:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._bump(key)
+            self._store(key, value)
+
+    def _bump(self, key):
+        if key in self._loading:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _store(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._bump(key)
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            for key in self._loading:
+                self._bump(key)
+            self._entries.clear()
+
+    def get_or_load(self, key, loader):
+        """
+        Retorna o valor em cache ou chama loader() e guarda o resultado.
+        Exceções do loader não são guardadas. Se a chave foi gravada enquanto o loader
+        rodava, o valor carregado (possivelmente antigo) é devolvido mas não substitui o novo.
+        """
+        value = self.get(key)
+        if value is not MISSING or not self.enabled:
+            return loader() if value is MISSING else value
+        with self._lock:
+            self._loading[key] = self._loading.get(key, 0) + 1
+            version = self._versions.get(key, 0)
+        try:
+            value = loader()
+            with self._lock:
+                if self._versions.get(key, 0) == version:
+                    self._store(key, value)
+                else:
+                    self.stats["stale_loads"] += 1
+            return value
+        finally:
+            with self._lock:
+                self._loading[key] -= 1
+                if not self._loading[key]:
+                    del self._loading[key]
+                    self._versions.pop(key, None)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._entries), ttl=self.ttl)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / total, 3) if total else 0.0
+        return stats
+
+
+if __name__ == "__main__":
+    # Benchmark: usuário recorrente carregando o contexto a cada mensagem (Supabase simulado, 30 ms por consulta)
+    import json
+
+    def consulta_supabase():
+        time.sleep(0.03)
+        return json.dumps({"history": [{"role": "user", "content": "olá"}] * 20})
+
+    start = time.perf_counter()
+    for _ in range(50):
+        json.loads(consulta_supabase())
+    print(f"Sem cache: {(time.perf_counter() - start) / 50 * 1000:.2f} ms por mensagem")
+
+    cache = TTLCache(ttl=300, max_entries=1024)
+    start = time.perf_counter()
+    for _ in range(50):
+        json.loads(cache.get_or_load("8016202357", consulta_supabase))
+    print(f"Com cache: {(time.perf_counter() - start) / 50 * 1000:.2f} ms por mensagem {cache.get_stats()}")
@@ -0,0 +1,428 @@
+"""
+Índice vetorial em NumPy, usado pela VectorMemory quando o chromadb não está disponível.
+Vetores float32 em disco (memmap, só acrescentados ou sobrescritos no lugar),
+documentos e metadados em SQLite. Busca exata vetorizada com argpartition;
+a partir de ~100 mil vetores, modo IVF (quantizador grosso por k-means) que
+examina só as nprobe listas mais próximas, trocando um pouco de recall por
+tempo de consulta sublinear. A coleção imita a API usada do chromadb.
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from core.embedding_cache import file_lock
+
+DEFAULT_INDEX_DIR = os.environ.get("NEXO_VECTOR_INDEX_PATH", "cache/vector_index")
+IVF_THRESHOLD = int(os.environ.get("NEXO_VECTOR_IVF_THRESHOLD", 100000))
+IVF_NPROBE = int(os.environ.get("NEXO_VECTOR_IVF_NPROBE", 8))
+QUERY_CHUNK = 65536
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """
+    Embedding leve sem modelo (feature hashing de palavras e bigramas, normalizado).
+    Captura apenas similaridade lexical; é o fallback quando não há modelo ONNX.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def __call__(self, input):
+        vectors = np.zeros((len(input), self.dim), dtype=np.float32)
+        for i, text in enumerate(input):
+            words = [w.lower() for w in _TOKEN_RE.findall(text or "")]
+            for feature in words + [a + " " + b for a, b in zip(words, words[1:])]:
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+                vectors[i, digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return list(vectors / np.maximum(norms, 1e-12))
+
+
+def _normalize(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+
+def kmeans(data, nlist, iterations=10, seed=0):
+    """
+    k-means esférico (vetores normalizados) para o quantizador grosso do IVF
+    """
+    rng = np.random.default_rng(seed)
+    data = _normalize(np.asarray(data, dtype=np.float32))
+    centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(data @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = data[assignment == c]
+            # Lista vazia: reinicia o centróide em um ponto aleatório
+            centroids[c] = members.sum(axis=0) if len(members) else data[rng.integers(len(data))]
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class NumpyVectorIndex:
+    """
+    Índice vetorial persistente
+    - add(ids, vectors, documents, metadatas): insere ou sobrescreve (upsert)
+    - search(query_vectors, k): top-k exato (argpartition) ou IVF acima de ivf_threshold
+    - distância "cosine" (1 - cosseno) ou "l2" (euclidiana ao quadrado), como no chromadb
+    - Várias instâncias (ou processos) no mesmo diretório: add() grava sob uma trava de arquivo
+      e numera as linhas novas pelo SQLite, e cada instância lê as linhas gravadas pelas outras
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_DIR, space="l2", ivf_threshold=IVF_THRESHOLD, nprobe=IVF_NPROBE):
+        self.path = path
+        self.space = space or "l2"
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self.dim = None
+        self.rows = 0
+        self._matrix = None
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._ids = {}
+        self._row_ids = []
+        self._centroids = None
+        self._lists = None
+        self._ivf_rows = 0
+        os.makedirs(path, exist_ok=True)
+        self.matrix_path = os.path.join(path, "vectors.f32")
+        self.lock_path = os.path.join(path, "index.lock")
+        self._conn = sqlite3.connect(os.path.join(path, "documents.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents (row INTEGER PRIMARY KEY, id TEXT UNIQUE, document TEXT, metadata TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if not row:
+            return
+        self.dim = int(row[0])
+        with file_lock(self.lock_path):
+            # Vetores gravados sem a linha correspondente no SQLite (queda entre os dois passos) são descartados
+            expected = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] * self.dim * 4
+            if os.path.exists(self.matrix_path) and os.path.getsize(self.matrix_path) > expected:
+                with open(self.matrix_path, "r+b") as f:
+                    f.truncate(expected)
+        self._refresh()
+        centroids_path = os.path.join(self.path, "ivf_centroids.npy")
+        if os.path.exists(centroids_path):
+            self._centroids = np.load(centroids_path)
+            self._assign_lists()
+
+    def _refresh(self):
+        """
+        Incorpora as linhas gravadas por outras instâncias desde a última leitura.
+        O vetor é gravado antes da linha no SQLite, então toda linha lida já tem vetor.
+        """
+        if self.dim is None:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+            if not row:
+                return
+            self.dim = int(row[0])
+        start = self.rows
+        for row_number, doc_id in self._conn.execute("SELECT row, id FROM documents WHERE row >= ? ORDER BY row", (start,)):
+            self._ids[doc_id] = row_number
+            self._row_ids.append(doc_id)
+        self.rows = len(self._row_ids)
+        if self.rows > start:
+            added = np.linalg.norm(np.asarray(self._view()[start:]), axis=1).astype(np.float32)
+            self._norms = np.concatenate([self._norms, added])
+
+    def _view(self):
+        # Remapeia a matriz quando novas linhas foram acrescentadas
+        if self._matrix is None or self._matrix.shape[0] != self.rows:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(self.rows, self.dim)) if self.rows else None
+        return self._matrix
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return self.rows
+
+    def add(self, ids, vectors, documents=None, metadatas=None):
+        """
+        Insere novos documentos e sobrescreve no lugar os IDs já existentes
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock, file_lock(self.lock_path):
+            # Outra instância pode ter acrescentado linhas: a numeração continua a partir do SQLite
+            self._refresh()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+            latest = {}
+            for i, doc_id in enumerate(ids):
+                latest[doc_id] = i
+            existing = [(self._ids[doc_id], i) for doc_id, i in latest.items() if doc_id in self._ids]
+            new = [(doc_id, i) for doc_id, i in latest.items() if doc_id not in self._ids]
+            if existing:
+                matrix = self._view()
+                for row_number, i in existing:
+                    matrix[row_number] = vectors[i]
+                    self._norms[row_number] = np.linalg.norm(vectors[i])
+                matrix.flush()
+            if new:
+                # Grava a partir da última linha registrada (não do fim do arquivo), para que
+                # restos de uma gravação interrompida nunca desalinhem linhas e documentos
+                with open(self.matrix_path, "r+b" if os.path.exists(self.matrix_path) else "wb") as f:
+                    f.seek(self.rows * self.dim * 4)
+                    f.write(vectors[[i for _, i in new]].tobytes())
+                    f.truncate()
+                for offset, (doc_id, _) in enumerate(new):
+                    self._ids[doc_id] = self.rows + offset
+                    self._row_ids.append(doc_id)
+                self._norms = np.concatenate([self._norms, np.linalg.norm(vectors[[i for _, i in new]], axis=1)])
+                self.rows += len(new)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (self._ids[doc_id], doc_id, documents[i], json.dumps(metadatas[i] or {}, ensure_ascii=False))
+                    for doc_id, i in latest.items()
+                ],
+            )
+            self._conn.commit()
+            if self._centroids is not None:
+                self._assign_new_rows()
+            elif self.rows >= self.ivf_threshold:
+                self.build_ivf()
+
+    def update_metadata(self, ids, metadatas):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE documents SET metadata = ? WHERE id = ?",
+                [(json.dumps(meta or {}, ensure_ascii=False), doc_id) for doc_id, meta in zip(ids, metadatas)],
+            )
+            self._conn.commit()
+
+    def existing_ids(self, ids):
+        with self._lock:
+            self._refresh()
+            return [doc_id for doc_id in ids if doc_id in self._ids]
+
+    def documents(self, rows):
+        """
+        Documentos e metadados das linhas, na ordem pedida
+        """
+        if not rows:
+            return []
+        placeholders = ",".join("?" for _ in rows)
+        with self._lock:
+            found = {
+                row_number: (document, json.loads(metadata) if metadata else {})
+                for row_number, document, metadata in self._conn.execute(
+                    f"SELECT row, document, metadata FROM documents WHERE row IN ({placeholders})", [int(r) for r in rows]
+                )
+            }
+        return [found.get(int(r), (None, {})) for r in rows]
+
+    # ---- IVF -------------------------------------------------------------
+
+    def build_ivf(self, nlist=None, sample_size=None):
+        """
+        Treina o quantizador grosso (k-means em uma amostra) e distribui os vetores em listas
+        """
+        with self._lock:
+            if not self.rows:
+                return
+            nlist = nlist or max(1, int(np.sqrt(self.rows)))
+            sample_size = min(self.rows, sample_size or nlist * 64)
+            sample_rows = np.sort(np.random.default_rng(0).choice(self.rows, sample_size, replace=False))
+            self._centroids = kmeans(np.asarray(self._view()[sample_rows]), nlist)
+            np.save(os.path.join(self.path, "ivf_centroids.npy"), self._centroids)
+            self._assign_lists()
+
+    def _assign(self, start, end):
+        matrix = self._view()
+        parts = []
+        for chunk in range(start, end, QUERY_CHUNK):
+            block = np.asarray(matrix[chunk:min(end, chunk + QUERY_CHUNK)])
+            parts.append(np.argmax(block @ self._centroids.T, axis=1))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def _assign_lists(self):
+        assignment = self._assign(0, self.rows)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(len(self._centroids) + 1))
+        self._lists = [list(order[bounds[c]:bounds[c + 1]]) for c in range(len(self._centroids))]
+        self._ivf_rows = self.rows
+
+    def _assign_new_rows(self):
+        # Vetores novos entram na lista do centróide mais próximo; retreina ao dobrar de tamanho
+        if self.rows >= 2 * max(self._ivf_rows, 1) and self.rows >= self.ivf_threshold:
+            self.build_ivf()
+            return
+        for offset, c in enumerate(self._assign(self._ivf_rows, self.rows)):
+            self._lists[c].append(self._ivf_rows + offset)
+        self._ivf_rows = self.rows
+
+    @property
+    def ivf_enabled(self):
+        return self._centroids is not None and self.rows >= self.ivf_threshold
+
+    # ---- busca -----------------------------------------------------------
+
+    def _distances(self, scores, norms, query_norm):
+        if self.space == "cosine":
+            return 1.0 - scores / np.maximum(norms * query_norm, 1e-12)
+        if self.space == "ip":
+            return 1.0 - scores
+        return norms ** 2 + query_norm ** 2 - 2.0 * scores
+
+    def _top_k(self, distances, rows, k):
+        k = min(k, len(distances))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        best = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        best = best[np.argsort(distances[best])]
+        return rows[best], distances[best]
+
+    def _search_exact(self, query, query_norm, k):
+        matrix = self._view()
+        candidates, candidate_distances = [], []
+        for start in range(0, self.rows, QUERY_CHUNK):
+            end = min(self.rows, start + QUERY_CHUNK)
+            scores = np.asarray(matrix[start:end]) @ query
+            rows, distances = self._top_k(self._distances(scores, self._norms[start:end], query_norm), np.arange(start, end), k)
+            candidates.append(rows)
+            candidate_distances.append(distances)
+        return self._top_k(np.concatenate(candidate_distances), np.concatenate(candidates), k)
+
+    def _search_ivf(self, query, query_norm, k, nprobe):
+        probe = np.argsort(-(self._centroids @ (query / max(query_norm, 1e-12))))[:nprobe]
+        rows = np.sort(np.fromiter((r for c in probe for r in self._lists[c]), dtype=np.int64))
+        if len(rows) < k:
+            return self._search_exact(query, query_norm, k)
+        scores = np.asarray(self._view()[rows]) @ query
+        return self._top_k(self._distances(scores, self._norms[rows], query_norm), rows, k)
+
+    def search(self, query_vectors, k=10, nprobe=None, exact=None):
+        """
+        Retorna, para cada consulta, (linhas, distâncias) dos k vizinhos mais próximos.
+        exact=True força a busca exata mesmo com IVF ativo.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        with self._lock:
+            self._refresh()
+            if not self.rows:
+                return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in queries]
+            use_ivf = self.ivf_enabled if exact is None else not exact and self._centroids is not None
+            results = []
+            for query in queries:
+                query_norm = float(np.linalg.norm(query))
+                if use_ivf:
+                    results.append(self._search_ivf(query, query_norm, k, nprobe or self.nprobe))
+                else:
+                    results.append(self._search_exact(query, query_norm, k))
+            return results
+
+
+class NumpyCollection:
+    """
+    Adaptador com a parte da API de coleção do chromadb usada pela VectorMemory
+    (count, get, upsert, update, query)
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def count(self):
+        return self.index.count()
+
+    def get(self, ids, include=None):
+        return {"ids": self.index.existing_ids(ids)}
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        self.index.add(ids, embeddings, documents, metadatas)
+
+    def update(self, ids, metadatas):
+        self.index.update_metadata(ids, metadatas)
+
+    def query(self, query_embeddings, n_results=10, include=("documents", "metadatas", "distances")):
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for rows, distances in self.index.search(query_embeddings, n_results):
+            docs = self.index.documents(list(rows))
+            result["ids"].append([self.index._row_ids[int(r)] for r in rows])
+            result["documents"].append([d for d, _ in docs])
+            result["metadatas"].append([m for _, m in docs])
+            result["distances"].append([float(d) for d in distances])
+        return {key: value for key, value in result.items() if key == "ids" or key in include}
+
+
+class NumpyVectorClient:
+    """
+    Cliente com get_or_create_collection, uma pasta por coleção
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_DIR):
+        self.path = path
+        self._collections = {}
+
+    def get_or_create_collection(self, name, metadata=None):
+        if name not in self._collections:
+            space = (metadata or {}).get("hnsw:space", "l2")
+            self._collections[name] = NumpyCollection(NumpyVectorIndex(os.path.join(self.path, name), space=space))
+        return self._collections[name]
+
+
+if __name__ == "__main__":
+    # Benchmark de recall@10 e latência: busca exata vs IVF (e chromadb/HNSW, se instalado)
+    # Uso: python -m core.vector_index [n_vetores] [dimensão]
+    import sys
+    import time
+    import shutil
+    import tempfile
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+    rng = np.random.default_rng(42)
+    # Dados agrupados (como embeddings reais), normalizados
+    centros = rng.standard_normal((200, dim)).astype(np.float32)
+    dados = _normalize(centros[rng.integers(200, size=n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32))
+    consultas = _normalize(dados[rng.integers(n, size=100)] + 0.3 * rng.standard_normal((100, dim)).astype(np.float32))
+    ids = [str(i) for i in range(n)]
+
+    pasta = tempfile.mkdtemp()
+    indice = NumpyVectorIndex(os.path.join(pasta, "bench"), space="cosine", ivf_threshold=n + 1)
+    for start in range(0, n, 20000):
+        indice.add(ids[start:start + 20000], dados[start:start + 20000])
+
+    def medir(nome, buscar, referencia=None):
+        start = time.perf_counter()
+        resultados = [buscar(q) for q in consultas]
+        ms = (time.perf_counter() - start) / len(consultas) * 1000
+        recall = ""
+        if referencia is not None:
+            acertos = sum(len(set(r) & set(ref)) for r, ref in zip(resultados, referencia))
+            recall = f" recall@10 {acertos / (10 * len(consultas)):.3f}"
+        print(f"{nome:<22} {ms:7.2f} ms/consulta{recall}")
+        return resultados
+
+    print(f"{n} vetores de dimensão {dim}")
+    exatos = medir("NumPy exato", lambda q: list(indice.search([q], 10, exact=True)[0][0]))
+    start = time.perf_counter()
+    indice.build_ivf()
+    print(f"Treino do IVF ({len(indice._centroids)} listas): {time.perf_counter() - start:.1f}s")
+    for nprobe in (4, 8, 16, 32):
+        medir(f"NumPy IVF nprobe={nprobe}", lambda q: list(indice.search([q], 10, nprobe=nprobe, exact=False)[0][0]), exatos)
+
+    try:
+        import chromadb
+        cliente = chromadb.Client()
+        colecao = cliente.create_collection("bench", metadata={"hnsw:space": "cosine"})
+        for start in range(0, n, 5000):
+            colecao.add(ids=ids[start:start + 5000], embeddings=dados[start:start + 5000].tolist())
+        medir("chromadb HNSW", lambda q: [int(i) for i in colecao.query(query_embeddings=[q.tolist()], n_results=10)["ids"][0]], exatos)
+    except ImportError:
+        print("chromadb não instalado: comparação com HNSW ignorada")
+    shutil.rmtree(pasta)
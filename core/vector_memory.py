@@ -1,30 +1,135 @@
-import chromadb
-from chromadb.config import Settings
-from chromadb.utils import embedding_functions
+import os
+import hashlib
+from core.embedding_cache import get_cached_embedding_function
+from core.vector_index import NumpyVectorClient, HashingEmbedder
+
+try:
+    import chromadb
+    from chromadb.config import Settings
+    from chromadb.utils import embedding_functions
+except ImportError:
+    # Sem chromadb (comum em builds enxutos): índice NumPy com embeddings por hashing
+    chromadb = None
+
+# Diretório da coleção persistente; NEXO_VECTOR_PATH="" mantém o cliente só em memória
+DEFAULT_VECTOR_PATH = os.environ.get("NEXO_VECTOR_PATH", "cache/vector_memory")
+# Backend: "auto" (chromadb se instalado), "chroma" ou "numpy"
+VECTOR_BACKEND = os.environ.get("NEXO_VECTOR_BACKEND", "auto")
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def document_id(texto):
+    """
+    ID estável do documento: hash do conteúdo (o mesmo texto gera o mesmo ID em qualquer processo)
+    """
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def use_numpy_backend(backend=None):
+    backend = backend or VECTOR_BACKEND
+    return backend == "numpy" or (backend == "auto" and chromadb is None)
+
+
+def _create_client(path):
+    if use_numpy_backend():
+        return NumpyVectorClient(os.path.join(path or "cache", "vector_index"))
+    if not path:
+        return chromadb.Client(Settings())
+    os.makedirs(path, exist_ok=True)
+    if hasattr(chromadb, "PersistentClient"):
+        return chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+    # chromadb < 0.4
+    return chromadb.Client(Settings(chroma_db_impl="duckdb+parquet", persist_directory=path))
+
 
 class VectorMemory:
-    def __init__(self, collection_name="nexo_memory"):
-        self.client = chromadb.Client(Settings())
-        self.collection = self.client.get_or_create_collection(collection_name)
-        self.embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+    """
+    Memória vetorial persistente (chromadb, ou índice NumPy em core.vector_index se indisponível)
+    - Embeddings gravados em disco: reiniciar não exige recalcular o histórico
+    - IDs pelo hash do conteúdo com upsert: o mesmo texto nunca vira duplicata
+    - salvar_ideias/buscar_similaridade_batch calculam os embeddings de vários textos de uma vez
+    - Embeddings com cache em disco e micro-batching entre threads (core.embedding_cache)
+    """
+
+    def __init__(self, collection_name="nexo_memory", space=None, path=DEFAULT_VECTOR_PATH):
+        self.path = path
+        self.client = _create_client(path)
+        metadata = {"hnsw:space": space} if space else None
+        self.collection = self.client.get_or_create_collection(collection_name, metadata=metadata)
+        if use_numpy_backend():
+            embedder = HashingEmbedder()
+            self.embedding_fn = get_cached_embedding_function(embedder, f"hashing-{embedder.dim}")
+        else:
+            self.embedding_fn = get_cached_embedding_function(embedding_functions.DefaultEmbeddingFunction(), EMBEDDING_MODEL)
+
+    def _embed(self, textos):
+        return [vetor.tolist() for vetor in self.embedding_fn(textos)]
 
     def salvar_ideia(self, texto, metadados=None):
-        embedding = self.embedding_fn([texto])[0]
-        doc_id = str(hash(texto))
-        self.collection.add(
-            embeddings=[embedding],
-            documents=[texto],
-            ids=[doc_id],
-            metadatas=[metadados or {}]
-        )
-        return doc_id
+        return self.salvar_ideias([texto], [metadados])[0]
+
+    def salvar_ideias(self, textos, metadados=None):
+        """
+        Salva vários textos em uma única operação e retorna seus IDs.
+        Só os textos que ainda não estão na coleção têm o embedding calculado;
+        os já existentes apenas têm os metadados atualizados.
+        """
+        metadados = metadados or [None] * len(textos)
+        ids = [document_id(texto) for texto in textos]
+        unicos = {}
+        for doc_id, texto, meta in zip(ids, textos, metadados):
+            unicos[doc_id] = (texto, meta or {})
+        existentes = set(self.collection.get(ids=list(unicos), include=[])["ids"]) if unicos else set()
+
+        novos = [doc_id for doc_id in unicos if doc_id not in existentes]
+        if novos:
+            documentos = [unicos[doc_id][0] for doc_id in novos]
+            self.collection.upsert(
+                ids=novos,
+                embeddings=self._embed(documentos),
+                documents=documentos,
+                metadatas=[unicos[doc_id][1] for doc_id in novos]
+            )
+        atualizados = [doc_id for doc_id in unicos if doc_id in existentes and unicos[doc_id][1]]
+        if atualizados:
+            self.collection.update(ids=atualizados, metadatas=[unicos[doc_id][1] for doc_id in atualizados])
+        return ids
 
     def buscar_similaridade(self, consulta, k=3):
-        embedding = self.embedding_fn([consulta])[0]
+        """
+        Retorna [(documento, metadados)] dos k vizinhos mais próximos
+        """
+        return self.buscar_similaridade_batch([consulta], k)[0]
+
+    def buscar_similaridade_batch(self, consultas, k=3):
+        """
+        Busca várias consultas com um único cálculo de embeddings e uma única consulta à coleção.
+        Retorna uma lista de [(documento, metadados)] por consulta.
+        """
+        total = self.collection.count()
+        if total == 0 or not consultas:
+            return [[] for _ in consultas]
+        resultados = self.collection.query(
+            query_embeddings=self._embed(list(consultas)),
+            n_results=min(k, total),
+            include=["documents", "metadatas"]
+        )
+        docs = resultados.get("documents") or [[] for _ in consultas]
+        metas = resultados.get("metadatas") or [[] for _ in consultas]
+        return [list(zip(d, m)) for d, m in zip(docs, metas)]
+
+    def buscar_com_distancia(self, consulta, k=1):
+        """
+        Retorna [(documento, metadados, distância)] dos k vizinhos mais próximos
+        """
+        if self.collection.count() == 0:
+            return []
         resultados = self.collection.query(
-            query_embeddings=[embedding],
-            n_results=k
+            query_embeddings=self._embed([consulta]),
+            n_results=min(k, self.collection.count()),
+            include=["documents", "metadatas", "distances"]
         )
-        docs = resultados.get("documents", [])
-        metas = resultados.get("metadatas", [])
-        return list(zip(docs, metas))
+        docs = resultados.get("documents", [[]])[0]
+        metas = resultados.get("metadatas", [[]])[0]
+        dists = resultados.get("distances", [[]])[0]
+        return list(zip(docs, metas, dists))
@@ -0,0 +1,123 @@
+"""
+Marcas d'água por fonte para a pesquisa incremental da evolução.
+Para cada fonte de aprendizado guarda as URLs já analisadas e o hash do
+conteúdo; ciclos seguintes só enviam ao LLM o que é novo ou mudou.
+As marcas são gravadas em JSON (escrita atômica) e só avançam depois que
+a análise do ciclo termina, para que nada se perca se o LLM falhar.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+DEFAULT_WATERMARK_PATH = os.environ.get("NEXO_EVOLUTION_WATERMARKS_PATH", "cache/evolution_watermarks.json")
+MAX_URLS_PER_SOURCE = int(os.environ.get("NEXO_EVOLUTION_WATERMARK_MAX_URLS", 200))
+
+
+def content_hash(text):
+    """
+    Hash do conteúdo normalizado (espaços e maiúsculas não contam como mudança)
+    """
+    normalized = " ".join((text or "").lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+class SourceWatermarks:
+    """
+    Marcas d'água persistentes: fonte -> {url: {"hash", "seen_at"}}
+    - is_new(source, url, text): conteúdo inédito ou alterado desde a última análise
+    - commit(items): avança as marcas depois que os itens foram analisados
+    """
+
+    def __init__(self, path=DEFAULT_WATERMARK_PATH, max_urls=MAX_URLS_PER_SOURCE):
+        self.path = path
+        self.max_urls = max_urls
+        self.enabled = os.environ.get("NEXO_EVOLUTION_INCREMENTAL", "1") != "0"
+        self.stats = {"new": 0, "changed": 0, "unchanged": 0, "commits": 0}
+        self._lock = threading.Lock()
+        self._marks = self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Marcas d'água da evolução ignoradas: {e}")
+            return {}
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._marks, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Erro ao salvar marcas d'água da evolução: {e}")
+
+    def is_new(self, source, url, text):
+        """
+        Indica se o conteúdo da URL ainda não foi analisado para a fonte (ou mudou desde então)
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            mark = self._marks.get(source, {}).get(url)
+            if mark is None:
+                self.stats["new"] += 1
+                return True
+            if mark["hash"] != content_hash(text):
+                self.stats["changed"] += 1
+                return True
+            self.stats["unchanged"] += 1
+            return False
+
+    def commit(self, items, text_field="content"):
+        """
+        Registra os itens (dicts com source, url e conteúdo) como analisados
+        """
+        if not self.enabled or not items:
+            return
+        now = time.time()
+        with self._lock:
+            for item in items:
+                marks = self._marks.setdefault(item["source"], {})
+                marks[item["url"]] = {"hash": content_hash(item.get(text_field)), "seen_at": now}
+                if len(marks) > self.max_urls:
+                    # Mantém só as URLs vistas mais recentemente
+                    recent = sorted(marks.items(), key=lambda kv: kv[1]["seen_at"], reverse=True)[:self.max_urls]
+                    self._marks[item["source"]] = dict(recent)
+            self.stats["commits"] += 1
+            self._save()
+
+    def get_stats(self):
+        """
+        Contadores de conteúdo novo/alterado/inalterado e URLs marcadas por fonte
+        """
+        with self._lock:
+            return dict(self.stats, sources={source: len(marks) for source, marks in self._marks.items()})
+
+
+if __name__ == "__main__":
+    # Teste do módulo: o segundo ciclo sem mudanças não tem nada a enviar ao LLM
+    import tempfile
+
+    caminho = os.path.join(tempfile.mkdtemp(), "marcas.json")
+    paginas = [
+        {"source": "flask optimization", "url": "https://a.example/flask", "content": "Use cache e gunicorn"},
+        {"source": "flask optimization", "url": "https://b.example/prod", "content": "Workers e threads"},
+    ]
+    marcas = SourceWatermarks(path=caminho)
+    novos = [p for p in paginas if marcas.is_new(p["source"], p["url"], p["content"])]
+    marcas.commit(novos)
+    print(f"Ciclo 1: {len(novos)} novos")
+
+    paginas[1]["content"] = "Workers, threads e HTTP/2"
+    marcas = SourceWatermarks(path=caminho)  # recarrega do disco, como em um novo processo
+    novos = [p for p in paginas if marcas.is_new(p["source"], p["url"], p["content"])]
+    print(f"Ciclo 2: {[p['url'] for p in novos]}", marcas.get_stats())
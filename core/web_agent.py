@@ -1,56 +1,171 @@
+import os
 import asyncio
+import threading
+from contextlib import asynccontextmanager
 from playwright.async_api import async_playwright
+from core.async_runtime import get_runtime
 import json
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Recursos que não influenciam o texto extraído e só atrasam o carregamento
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
 class WebAgent:
     """
     Um agente para navegação e extração de dados da web usando Playwright.
+    - Um navegador Chromium persistente com um pool limitado de contextos e páginas reutilizáveis
+    - Páginas de resultado extraídas em paralelo, em abas diferentes
+    - Imagens, fontes e mídia bloqueadas
+    - Páginas que travam são descartadas e recriadas; close() encerra tudo
     """
 
+    def __init__(self, max_pages=None, max_contexts=None, block_resources=True):
+        self.max_pages = max_pages or int(os.environ.get("NEXO_BROWSER_PAGES", 4))
+        self.max_contexts = max_contexts or int(os.environ.get("NEXO_BROWSER_CONTEXTS", 2))
+        self.block_resources = block_resources
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._idle_pages = []
+        self._crashed = set()
+        self._pages_created = 0
+        self._semaphore = None
+        self._start_lock = None
+        self._loop = None
+        self.stats = {"launches": 0, "pages_created": 0, "page_reuses": 0, "recycled": 0, "blocked_requests": 0}
+
+    async def _block_route(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            self.stats["blocked_requests"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _browser_ready(self, loop):
+        return self._browser is not None and self._loop is loop and self._browser.is_connected()
+
+    async def _ensure_browser(self):
+        """Inicia o navegador persistente (ou o reinicia se caiu)"""
+        loop = asyncio.get_running_loop()
+        if self._browser_ready(loop):
+            return
+        if self._loop is not loop:
+            # Objetos do Playwright pertencem ao event loop em que foram criados
+            self._reset_state()
+            self._loop = loop
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._browser_ready(loop):
+                return
+            if self._browser is not None:
+                logger.warning("Navegador desconectado. Reiniciando...")
+                await self._shutdown()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+            self.stats["launches"] += 1
+
+    def _reset_state(self):
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._idle_pages = []
+        self._crashed = set()
+        self._pages_created = 0
+
+    async def _new_page(self):
+        # As páginas são distribuídas entre até max_contexts contextos
+        if len(self._contexts) < self.max_contexts:
+            context = await self._browser.new_context()
+            if self.block_resources:
+                await context.route("**/*", self._block_route)
+            self._contexts.append(context)
+        else:
+            context = self._contexts[self._pages_created % len(self._contexts)]
+        page = await context.new_page()
+        page.on("crash", lambda crashed_page: self._crashed.add(id(crashed_page)))
+        self._pages_created += 1
+        self.stats["pages_created"] += 1
+        return page
+
+    @asynccontextmanager
+    async def _page(self):
+        """Empresta uma página do pool (no máximo max_pages em uso ao mesmo tempo)"""
+        await self._ensure_browser()
+        async with self._semaphore:
+            page = None
+            while self._idle_pages and page is None:
+                candidate = self._idle_pages.pop()
+                if candidate.is_closed() or id(candidate) in self._crashed:
+                    self._crashed.discard(id(candidate))
+                    continue
+                page = candidate
+                self.stats["page_reuses"] += 1
+            if page is None:
+                page = await self._new_page()
+            try:
+                yield page
+            finally:
+                if page.is_closed() or id(page) in self._crashed:
+                    # Página travou: descarta e a próxima requisição cria outra
+                    self._crashed.discard(id(page))
+                    self.stats["recycled"] += 1
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                else:
+                    self._idle_pages.append(page)
+
+    async def _extract_result(self, title, url):
+        """Abre um resultado em uma aba do pool e extrai o texto"""
+        try:
+            async with self._page() as page:
+                await page.goto(url, timeout=10000, wait_until="domcontentloaded")
+                content = await page.inner_text('body')
+            logger.info(f"Extração bem-sucedida do resultado: {title}")
+            return {
+                "title": title,
+                "url": url,
+                "content": content[:1000]
+            }
+        except Exception as e:
+            logger.warning(f"Erro ao extrair o conteúdo do resultado: {e}")
+            return None
+
     async def search_and_extract(self, query: str, num_results: int = 3):
         """
         Realiza uma pesquisa no Google e extrai o conteúdo dos primeiros resultados.
         """
-        results = []
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                
+            links = []
+            async with self._page() as page:
                 logger.info(f"Navegando para o Google para pesquisar: {query}")
                 await page.goto("https://www.google.com")
                 await page.fill('textarea[name="q"]', query)
                 await page.press('textarea[name="q"]', 'Enter')
-                
+
                 await page.wait_for_selector('div.g', timeout=10000)
-                
+
                 logger.info("Resultados encontrados. Extraindo dados...")
                 search_results = await page.locator('div.g').all()
-                
-                for i, result in enumerate(search_results[:num_results]):
+
+                for result in search_results[:num_results]:
                     try:
                         title = await result.locator('h3').inner_text()
                         url = await result.locator('a').first.get_attribute('href')
-                        
-                        await page.goto(url, timeout=10000)
-                        content = await page.inner_text('body')
-                        
-                        results.append({
-                            "title": title,
-                            "url": url,
-                            "content": content[:1000]
-                        })
-                        logger.info(f"Extração bem-sucedida do resultado {i+1}: {title}")
+                        links.append((title, url))
                     except Exception as e:
-                        logger.warning(f"Erro ao extrair o conteúdo do resultado: {e}")
+                        logger.warning(f"Erro ao ler o resultado da pesquisa: {e}")
                         continue
-                
-                await browser.close()
-                return results
+
+            # Os resultados são abertos em paralelo, cada um em uma aba do pool
+            results = await asyncio.gather(*(self._extract_result(title, url) for title, url in links))
+            return [result for result in results if result]
 
         except Exception as e:
             logger.error(f"Erro geral na navegação web: {e}")
@@ -61,23 +176,76 @@ class WebAgent:
         Navega para uma URL específica e retorna o conteúdo da página.
         """
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.goto(url, timeout=10000)
-                content = await page.inner_text('body')
-                await browser.close()
-                return content
+            async with self._page() as page:
+                await page.goto(url, timeout=10000, wait_until="domcontentloaded")
+                return await page.inner_text('body')
         except Exception as e:
             logger.error(f"Erro ao obter conteúdo da página {url}: {e}")
             return ""
 
-# Exemplo de uso (para testes)
+    async def _shutdown(self):
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+        except Exception:
+            pass
+        try:
+            if self._playwright is not None:
+                await self._playwright.stop()
+        except Exception:
+            pass
+        self._reset_state()
+
+    async def close(self):
+        """
+        Fecha páginas, contextos e o navegador persistente.
+        """
+        if self._loop is asyncio.get_running_loop():
+            await self._shutdown()
+        else:
+            self._reset_state()
+        logger.info("Navegador do WebAgent encerrado.")
+
+    def get_stats(self):
+        """
+        Contadores do pool: inicializações do navegador, páginas criadas/reutilizadas/recicladas
+        """
+        return dict(self.stats, idle_pages=len(self._idle_pages), contexts=len(self._contexts))
+
+
+_shared_agent = None
+_shared_lock = threading.Lock()
+
+
+def get_web_agent():
+    """
+    Retorna o WebAgent compartilhado (um único navegador por processo).
+    O navegador é fechado uma única vez, no encerramento do runtime assíncrono.
+    """
+    global _shared_agent
+    with _shared_lock:
+        if _shared_agent is None:
+            _shared_agent = WebAgent()
+            get_runtime().register_shutdown(_shared_agent.close)
+        return _shared_agent
+
+# Exemplo de uso (para testes): a segunda pesquisa reaproveita navegador e abas
 async def main():
+    import time
     agent = WebAgent()
     query = "o que é inteligência artificial geral"
-    results = await agent.search_and_extract(query)
+    for _ in range(2):
+        start = time.perf_counter()
+        results = await agent.search_and_extract(query)
+        print(f"{len(results)} resultados em {time.perf_counter() - start:.2f}s")
     print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(agent.get_stats())
+    await agent.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,370 @@
+"""
+Fila write-behind para inserções no Supabase.
+Quem grava só enfileira a linha e retorna; uma thread de fundo agrupa as
+linhas por tabela em inserções em lote (ao atingir o tamanho do lote ou a
+cada intervalo), repete com backoff em caso de falha e, se o Supabase
+continuar inacessível, grava as linhas em um journal JSONL local que é
+reenviado no próximo início (ou assim que o Supabase voltar).
+A entrega é "pelo menos uma vez": um reenvio após queda pode duplicar linhas.
+"""
+import os
+import json
+import time
+import random
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = int(os.environ.get("NEXO_WRITE_BATCH", 50))
+DEFAULT_INTERVAL = float(os.environ.get("NEXO_WRITE_INTERVAL", 2.0))
+DEFAULT_MAX_RETRIES = int(os.environ.get("NEXO_WRITE_MAX_RETRIES", 4))
+DEFAULT_JOURNAL_PATH = os.environ.get("NEXO_WRITE_JOURNAL_PATH", "cache/write_behind.jsonl")
+
+# Erros de rede/servidor (vale repetir e, se persistirem, guardar no journal)
+TRANSIENT_STATUS = (408, 429, 500, 502, 503, 504)
+TRANSIENT_NAME_MARKERS = ("timeout", "connect", "network", "transport", "protocol")
+
+
+def is_transient_error(error):
+    """
+    Indica se a falha é do transporte ou do servidor (o Supabase pode voltar).
+    Erros 4xx e do PostgREST/PostgreSQL (coluna inexistente, restrição violada...)
+    são da própria linha e não adianta reenviá-los.
+    """
+    if isinstance(error, OSError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS
+    name = type(error).__name__.lower()
+    return any(marker in name for marker in TRANSIENT_NAME_MARKERS)
+
+
+class WriteBehindQueue:
+    """
+    Fila de inserções em lote
+    - enqueue(tabela, linha): não bloqueia
+    - flush(): envia tudo agora (usado no encerramento)
+    - O journal é drenado na inicialização e após cada envio bem-sucedido
+    - Lotes recusados pelo banco são divididos ao meio até isolar a linha inválida,
+      que vai para o arquivo de descarte (<journal>.dead.jsonl) em vez do journal
+    """
+
+    def __init__(self, client=None, batch_size=DEFAULT_BATCH_SIZE, interval=DEFAULT_INTERVAL,
+                 max_retries=DEFAULT_MAX_RETRIES, journal_path=DEFAULT_JOURNAL_PATH, sleep=time.sleep):
+        self.client = client
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_retries = max_retries
+        self.journal_path = journal_path
+        self.dead_letter_path = os.path.splitext(journal_path)[0] + ".dead.jsonl" if journal_path else None
+        self.sleep = sleep
+        self.enabled = os.environ.get("NEXO_WRITE_BEHIND", "1") != "0"
+        self._buffers = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self.stats = {"enqueued": 0, "inserted": 0, "batches": 0, "retries": 0, "journaled": 0, "drained": 0, "malformed": 0, "splits": 0, "dead_lettered": 0}
+
+    def _count(self, metric, amount=1):
+        with self._condition:
+            self.stats[metric] += amount
+
+    def start(self):
+        """
+        Inicia a thread de envio (idempotente); a primeira tarefa dela é drenar o journal
+        """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="nexo-write-behind", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, table, row):
+        """
+        Enfileira uma linha para inserção em lote e retorna imediatamente.
+        Com NEXO_WRITE_BEHIND=0 a inserção é feita na hora (comportamento antigo).
+        """
+        if not self.enabled:
+            self.client.table(table).insert(row).execute()
+            return
+        with self._condition:
+            buffer = self._buffers.setdefault(table, [])
+            buffer.append(row)
+            self.stats["enqueued"] += 1
+            if len(buffer) >= self.batch_size:
+                self._condition.notify()
+        self.start()
+
+    def _take_all(self):
+        with self._condition:
+            buffers, self._buffers = self._buffers, {}
+        return buffers
+
+    def _run(self):
+        self._drain_journal()
+        while True:
+            with self._condition:
+                if not self._stopping and not any(len(b) >= self.batch_size for b in self._buffers.values()):
+                    self._condition.wait(self.interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def _insert(self, table, rows):
+        """
+        Insere as linhas em lotes; linhas com colunas diferentes vão em lotes separados
+        (a inserção em lote do PostgREST exige as mesmas chaves). Retorna as linhas não enviadas.
+        """
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        failed = []
+        for group in groups.values():
+            for start in range(0, len(group), self.batch_size):
+                failed.extend(self._insert_batch(table, group[start:start + self.batch_size]))
+        return failed
+
+    def _insert_batch(self, table, batch):
+        """
+        Envia um lote e retorna as linhas que devem ir para o journal.
+        Se o banco recusa o lote, ele é dividido ao meio para que uma linha inválida
+        não arraste as demais; a linha isolada vai para o arquivo de descarte.
+        """
+        error = self._insert_with_retry(table, batch)
+        if error is None:
+            return []
+        if is_transient_error(error):
+            logger.error(f"Falha ao inserir {len(batch)} linha(s) em '{table}': {error}")
+            return batch
+        if len(batch) == 1:
+            self._dead_letter(table, batch[0], error)
+            return []
+        self._count("splits")
+        middle = len(batch) // 2
+        return self._insert_batch(table, batch[:middle]) + self._insert_batch(table, batch[middle:])
+
+    def _insert_with_retry(self, table, batch):
+        """
+        Retorna None em caso de sucesso ou a última exceção; só falhas transitórias são repetidas
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.table(table).insert(batch).execute()
+                self._count("inserted", len(batch))
+                self._count("batches")
+                return None
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient_error(e):
+                    return e
+                self._count("retries")
+                # Backoff exponencial com jitter completo
+                self.sleep(random.uniform(0, min(30.0, 0.5 * 2 ** attempt)))
+
+    def _dead_letter(self, table, row, error):
+        logger.error(f"Linha descartada de '{table}' (recusada pelo banco): {error}")
+        self._count("dead_lettered")
+        if self.dead_letter_path:
+            self._append(self.dead_letter_path, [{"table": table, "row": row, "error": str(error)}])
+
+    def flush(self):
+        """
+        Envia todas as linhas pendentes; o que falhar vai para o journal
+        """
+        with self._flush_lock:
+            buffers = self._take_all()
+            if not buffers:
+                return
+            if self.client is None:
+                self._journal([(table, row) for table, rows in buffers.items() for row in rows])
+                return
+            failed = []
+            for table, rows in buffers.items():
+                failed.extend((table, row) for row in self._insert(table, rows))
+            if failed:
+                self._journal(failed)
+            elif self._journal_has_rows():
+                # Supabase respondeu de novo: reenvia o que ficou no journal
+                self._drain_journal()
+
+    def _journal(self, entries):
+        if not self.journal_path:
+            return
+        if self._append(self.journal_path, [{"table": table, "row": row} for table, row in entries]):
+            self._count("journaled", len(entries))
+            logger.warning(f"{len(entries)} linha(s) gravada(s) no journal local: {self.journal_path}")
+
+    def _append(self, path, records):
+        with self._journal_lock:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "a+b") as f:
+                    # Após uma queda no meio de uma linha, a próxima começa em uma linha nova
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            f.write(b"\n")
+                    for record in records:
+                        f.write((json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                return True
+            except Exception as e:
+                logger.error(f"Erro ao gravar journal de escrita: {e}")
+                return False
+
+    def _journal_has_rows(self):
+        return bool(self.journal_path) and (
+            os.path.exists(self.journal_path + ".draining")
+            or (os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0)
+        )
+
+    def _drain_journal(self):
+        """
+        Reenvia as linhas do journal. O arquivo é renomeado antes do envio; se o processo cair
+        no meio, o ".draining" é retomado na próxima vez.
+        """
+        if self.client is None or not self._journal_has_rows():
+            return
+        # Uma drenagem por vez (início da thread e retomada após falhas podem coincidir)
+        if not self._drain_lock.acquire(blocking=False):
+            return
+        try:
+            self._drain_journal_file()
+        finally:
+            self._drain_lock.release()
+
+    def _drain_journal_file(self):
+        draining = self.journal_path + ".draining"
+        with self._journal_lock:
+            if os.path.exists(self.journal_path):
+                if os.path.exists(draining):
+                    with open(self.journal_path, "r", encoding="utf-8") as src, open(draining, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, draining)
+        by_table = {}
+        try:
+            with open(draining, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except Exception as e:
+            logger.error(f"Erro ao ler journal de escrita: {e}")
+            return
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            # Linha truncada (queda durante a gravação) é descartada sem travar as demais
+            try:
+                entry = json.loads(line)
+                by_table.setdefault(entry["table"], []).append(entry["row"])
+            except (ValueError, KeyError, TypeError) as e:
+                self._count("malformed")
+                logger.warning(f"Linha {number} do journal ignorada (malformada): {e}")
+        failed = []
+        for table, rows in by_table.items():
+            failed.extend((table, row) for row in self._insert(table, rows))
+        self._count("drained", sum(len(rows) for rows in by_table.values()) - len(failed))
+        if failed:
+            self._journal(failed)
+        os.remove(draining)
+
+    def close(self, timeout=10):
+        """
+        Para a thread de envio depois de um último flush
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        else:
+            self.flush()
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self.stats)
+            stats["pending"] = sum(len(b) for b in self._buffers.values())
+        stats["journal_pending"] = self._journal_has_rows()
+        return stats
+
+
+_shared_queue = None
+_shared_lock = threading.Lock()
+
+
+def get_write_behind(client=None):
+    """
+    Retorna a fila compartilhada; o primeiro cliente Supabase informado é usado para os envios
+    """
+    global _shared_queue
+    with _shared_lock:
+        if _shared_queue is None:
+            _shared_queue = WriteBehindQueue(client)
+            atexit.register(_shared_queue.close)
+        if client is not None and _shared_queue.client is None:
+            _shared_queue.client = client
+            # Linhas de execuções anteriores são reenviadas assim que há um cliente
+            _shared_queue.start()
+        return _shared_queue
+
+
+if __name__ == "__main__":
+    # Teste do módulo: Supabase simulado que cai e volta; nenhuma linha se perde
+    import tempfile
+
+    class Tabela:
+        def __init__(self, banco, nome):
+            self.banco, self.nome = banco, nome
+
+        def insert(self, linhas):
+            self.linhas = linhas if isinstance(linhas, list) else [linhas]
+            return self
+
+        def execute(self):
+            time.sleep(0.05)  # ida e volta de rede
+            if not self.banco.online:
+                raise ConnectionError("Supabase inacessível")
+            self.banco.chamadas += 1
+            self.banco.linhas.setdefault(self.nome, []).extend(self.linhas)
+
+    class SupabaseFalso:
+        def __init__(self):
+            self.online, self.chamadas, self.linhas = True, 0, {}
+
+        def table(self, nome):
+            return Tabela(self, nome)
+
+    banco = SupabaseFalso()
+    start = time.perf_counter()
+    for i in range(100):
+        Tabela(banco, "agent_memory").insert({"key": f"k{i}"}).execute()
+    print(f"Inserções síncronas: {time.perf_counter() - start:.2f}s, {banco.chamadas} chamadas")
+
+    banco = SupabaseFalso()
+    journal = os.path.join(tempfile.mkdtemp(), "journal.jsonl")
+    fila = WriteBehindQueue(banco, batch_size=50, interval=0.2, max_retries=1, journal_path=journal, sleep=lambda s: None)
+    start = time.perf_counter()
+    for i in range(100):
+        fila.enqueue("agent_memory", {"key": f"k{i}"})
+    print(f"Enfileiradas em {(time.perf_counter() - start) * 1000:.1f} ms")
+    fila.flush()
+    print(f"Enviadas: {banco.chamadas} chamadas em lote")
+
+    banco.online = False
+    for i in range(10):
+        fila.enqueue("agent_error_log", {"error_type": "teste", "n": i})
+    fila.flush()
+    print(f"Supabase fora do ar: {fila.get_stats()}")
+
+    banco.online = True
+    fila = WriteBehindQueue(banco, journal_path=journal)  # "reinício" do processo
+    fila.start()
+    fila.close()
+    print(f"Após reinício: {len(banco.linhas['agent_error_log'])} linhas do journal reenviadas, {fila.get_stats()}")
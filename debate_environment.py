@@ -1,16 +1,27 @@
+import asyncio
+from core.async_llm import gather_limited, run_sync
+
 class DebateEnvironment:
-    def __init__(self, agents):
+    def __init__(self, agents, max_concurrency=4):
         self.agents = agents  # Lista de instâncias de agentes
+        self.max_concurrency = max_concurrency
 
-    def debate(self, problem):
+    async def adebate(self, problem):
+        # As falas são independentes: cada agente responde em paralelo
         print(f"\n[Debate] Problema apresentado: {problem}")
+        respostas = await gather_limited(
+            [lambda agent=agent: asyncio.to_thread(agent.falar, problem) for agent in self.agents],
+            limit=self.max_concurrency
+        )
         falas = []
-        for agent in self.agents:
-            fala = agent.falar(problem)
+        for agent, fala in zip(self.agents, respostas):
             print(f"{agent.name} diz: {fala}")
             falas.append((agent.name, fala))
         return falas
 
+    def debate(self, problem):
+        return run_sync(self.adebate(problem))
+
 # Exemplo de uso:
 if __name__ == "__main__":
     class Agent:
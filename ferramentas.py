@@ -1,9 +1,9 @@
 import os
 import subprocess
-import google.generativeai as genai
-from googleapiclient.discovery import build
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from core.llm_clients import get_client_registry
+from core.search_backend import get_search_backend
 
 # Força a leitura do .env a partir do diretório do script, garantindo que ele sempre seja encontrado.
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
@@ -17,8 +17,9 @@ SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
 
 # Configurações de API e modelos
-genai.configure(api_key=API_KEY_GEMINI)
-model = genai.GenerativeModel('gemini-1.5-flash')
+def modelo_gemini():
+    # Modelo compartilhado pelo registro de clientes (configurado uma única vez)
+    return get_client_registry().gemini_model(API_KEY_GEMINI, 'gemini-1.5-flash')
 
 # ==================== Funções de Ferramentas ====================
 def testar_conexao_supabase():
@@ -72,25 +73,32 @@ def criar_pasta(nome_pasta):
     except Exception as e:
         print(f"Erro ao criar a pasta: {e}")
 
+def _formatar_resultados(resultados):
+    resultados_formatados = ""
+    for item in resultados:
+        resultados_formatados += f"Título: {item['title']}\nLink: {item['link']}\nDescrição: {item['snippet']}\n\n"
+    return resultados_formatados
+
 def pesquisar_na_internet(termo_de_busca):
+    """
+    Pesquisa um termo (ou uma lista de termos, enviada em lote) no Google Custom Search.
+    Para uma lista, retorna um dicionário termo -> resultados formatados.
+    """
     if not API_KEY_GOOGLE_SEARCH or not CSE_ID:
         print("Nexo: Chaves de API do Google Search não estão configuradas.")
         return "Nexo: Erro de configuração."
         
     try:
-        service = build("customsearch", "v1", developerKey=API_KEY_GOOGLE_SEARCH)
-        res = service.cse().list(
-            q=termo_de_busca,
-            cx=CSE_ID,
-            num=5
-        ).execute()
-
-        resultados_formatados = ""
-        for item in res.get('items', []):
-            title = item.get('title')
-            snippet = item.get('snippet')
-            link = item.get('link')
-            resultados_formatados += f"Título: {title}\nLink: {link}\nDescrição: {snippet}\n\n"
+        # Serviço e cache compartilhados: nada de build() do cliente a cada pesquisa
+        backend = get_search_backend(API_KEY_GOOGLE_SEARCH, CSE_ID)
+        if isinstance(termo_de_busca, (list, tuple)):
+            resultados = backend.search_many(list(termo_de_busca), num=5)
+            return {
+                termo: _formatar_resultados(itens) if itens is not None else None
+                for termo, itens in zip(termo_de_busca, resultados)
+            }
+
+        resultados_formatados = _formatar_resultados(backend.search(termo_de_busca, num=5))
         print(resultados_formatados)
         return resultados_formatados
     except Exception as e:
@@ -103,7 +111,7 @@ def usar_gemini_para_tarefa(prompt, contexto=""):
         return
     try:
         full_prompt = f"{prompt}\n\n{contexto}" if contexto else prompt
-        response = model.generate_content(full_prompt)
+        response = modelo_gemini().generate_content(full_prompt)
         print(f"Nexo: {response.text}")
     except Exception as e:
         print(f"Nexo: Ocorreu um erro ao usar o Gemini: {e}")
@@ -114,7 +122,7 @@ def gerar_codigo_com_gemini(topico):
         return
     prompt_codigo = f"Gere um código em Python sobre '{topico}'. Inclua comentários e use boas práticas de programação. Não use nenhum texto de introdução ou conclusão. Apenas o código."
     try:
-        response = model.generate_content(prompt_codigo)
+        response = modelo_gemini().generate_content(prompt_codigo)
         codigo_gerado = response.text
         nome_arquivo = f"{topico.replace(' ', '_')}.py"
         criar_arquivo_texto(nome_arquivo, codigo_gerado)
@@ -173,7 +181,7 @@ def analisar_erro_com_gemini(mensagem_erro, codigo_contexto="Não há contexto d
         return
 
     try:
-        response = model.generate_content(prompt_analise)
+        response = modelo_gemini().generate_content(prompt_analise)
         print("Nexo: Análise do Gemini:")
         print(response.text)
     except Exception as e:
@@ -13,6 +13,7 @@ from typing import Dict, List, Optional
 from dotenv import load_dotenv
 import telebot
 from telebot import types
+from core.llm_clients import get_client_registry
 
 load_dotenv()
 
@@ -67,7 +68,8 @@ class IntegratedCommunicationSystem:
                 'context': context or []
             }
             
-            response = requests.post(
+            response = get_client_registry().post(
+                "nexo",
                 f"{NEXO_URL}/api/chat",
                 json=data,
                 headers={'Content-Type': 'application/json'},
@@ -8,10 +8,13 @@ import os
 import logging
 import requests
 import json
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 import telebot
 from telebot import types
+from core.llm_clients import get_client_registry
+from core.llm_streaming import iter_sse_deltas
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -33,6 +36,9 @@ if not BOT_TOKEN:
 NEXO_URL = os.environ.get('NEXO_URL', 'https://nexo-kh57.onrender.com')
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+# Intervalo mínimo entre edições da mensagem em streaming (limite de edições do Telegram)
+EDIT_INTERVAL = float(os.environ.get('NEXO_TELEGRAM_EDIT_INTERVAL', 1.0))
+TELEGRAM_MAX_LENGTH = 4096
 
 # Inicializar bot
 bot = telebot.TeleBot(BOT_TOKEN)
@@ -67,7 +73,8 @@ class NexoTelegramBot:
             }
             
             # Fazer requisição para o Nexo
-            response = requests.post(
+            response = get_client_registry().post(
+                "nexo",
                 f"{NEXO_URL}/api/chat",
                 json=data,
                 headers={'Content-Type': 'application/json'},
@@ -83,6 +90,55 @@ class NexoTelegramBot:
             logger.error(f"Erro ao chamar API do Nexo: {e}")
             return "Desculpe, não consegui me conectar ao Nexo no momento. Tente novamente em alguns instantes."
     
+    def call_nexo_api_stream(self, message, user_id):
+        """Chama a API do Nexo em modo streaming e gera os trechos da resposta"""
+        data = {
+            'message': message,
+            'user_id': str(user_id),
+            'timestamp': datetime.now().isoformat(),
+            'source': 'telegram',
+            'stream': True
+        }
+        response = get_client_registry().post(
+            "nexo",
+            f"{NEXO_URL}/api/chat",
+            json=data,
+            headers={'Content-Type': 'application/json', 'Accept': 'text/event-stream'},
+            timeout=30,
+            stream=True
+        )
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(f"Erro na comunicação com o Nexo: {response.status_code}")
+        yield from iter_sse_deltas(response)
+
+    def stream_reply(self, chat_id, message, user_id):
+        """
+        Envia a resposta do Nexo à medida que é gerada: a primeira parte cria a mensagem
+        e as seguintes a editam, no máximo uma vez a cada EDIT_INTERVAL segundos.
+        Retorna o texto completo.
+        """
+        text = ""
+        sent = None
+        shown = ""
+        last_edit = 0.0
+        for delta in self.call_nexo_api_stream(message, user_id):
+            text += delta
+            if sent is None:
+                sent = bot.send_message(chat_id, text[:TELEGRAM_MAX_LENGTH])
+                shown, last_edit = text, time.monotonic()
+            elif time.monotonic() - last_edit >= EDIT_INTERVAL and text[:TELEGRAM_MAX_LENGTH] != shown[:TELEGRAM_MAX_LENGTH]:
+                bot.edit_message_text(text[:TELEGRAM_MAX_LENGTH], chat_id, sent.message_id)
+                shown, last_edit = text, time.monotonic()
+        if sent is None:
+            raise requests.exceptions.RequestException("Resposta vazia do Nexo")
+        # Versão final formatada (se o Markdown for inválido, mantém o texto simples)
+        try:
+            bot.edit_message_text(text[:TELEGRAM_MAX_LENGTH], chat_id, sent.message_id, parse_mode="Markdown")
+        except Exception:
+            if text[:TELEGRAM_MAX_LENGTH] != shown[:TELEGRAM_MAX_LENGTH]:
+                bot.edit_message_text(text[:TELEGRAM_MAX_LENGTH], chat_id, sent.message_id)
+        return text
+
     def get_user_context(self, user_id):
         """Obtém o contexto do usuário"""
         if user_id not in user_contexts:
@@ -233,15 +289,17 @@ def handle_message(message):
     bot.send_chat_action(message.chat.id, 'typing')
     
     try:
-        # Processar mensagem através do Nexo
-        response = nexo_bot.call_nexo_api(message.text, user_id)
+        try:
+            # Streaming: o usuário vê a resposta a partir do primeiro token
+            response = nexo_bot.stream_reply(message.chat.id, message.text, user_id)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Streaming indisponível, usando resposta completa: {e}")
+            response = nexo_bot.call_nexo_api(message.text, user_id)
+            bot.send_message(message.chat.id, response, parse_mode="Markdown")
         
         # Atualizar contexto
         nexo_bot.update_user_context(user_id, message.text, response)
         
-        # Enviar resposta
-        bot.send_message(message.chat.id, response, parse_mode="Markdown")
-        
     except Exception as e:
         logger.error(f"Erro ao processar mensagem: {e}")
         bot.send_message(
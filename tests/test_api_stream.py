@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+pytest.importorskip("ollama")
+
+from flask import Flask
+
+import api_endpoints
+
+
+def eventos(resposta):
+    return [json.loads(linha[5:]) for linha in resposta.get_data(as_text=True).splitlines() if linha.startswith("data:")]
+
+
+@pytest.fixture
+def cliente():
+    app = Flask(__name__)
+    api_endpoints.register_api_routes(app)
+    return app.test_client()
+
+
+def test_streaming_usa_o_mesmo_processamento_da_resposta_completa(cliente, monkeypatch):
+    recebidas = []
+
+    def processar(dados):
+        recebidas.append(dados)
+        return {"success": True, "response": "Missão interpretada"}
+
+    monkeypatch.setattr(api_endpoints.nexo_api, "nexo_genesis", None)
+    monkeypatch.setattr(api_endpoints.nexo_api, "process_message", processar)
+    resposta = cliente.post("/api/chat", json={"message": "Crie 5 agentes", "user_id": "42", "stream": True})
+
+    assert resposta.mimetype == "text/event-stream"
+    inicio, fim = eventos(resposta)
+    assert inicio == {"delta": "Missão interpretada"}
+    assert fim["done"] and fim["success"] and fim["response"] == "Missão interpretada"
+    assert recebidas[0]["message"] == "Crie 5 agentes"
+
+
+def test_falha_no_processamento_gera_evento_de_erro(cliente, monkeypatch):
+    monkeypatch.setattr(api_endpoints.nexo_api, "nexo_genesis", None)
+    monkeypatch.setattr(api_endpoints.nexo_api, "process_message", lambda dados: {"success": False, "error": "falhou"})
+    resposta = cliente.post("/api/chat", json={"message": "oi", "stream": True})
+    assert eventos(resposta) == [{"error": "Erro ao gerar resposta", "response": ""}]
+
+
+class NexoFalso:
+    def __init__(self):
+        self.chamadas = []
+
+    def process_mission_stream(self, mensagem, user_id):
+        self.chamadas.append((mensagem, user_id))
+        yield "Criando "
+        yield "5 agentes"
+        yield "\n\n✅ Agente criado"
+
+
+def test_tokens_da_missao_saem_conforme_sao_gerados(cliente, monkeypatch):
+    nexo = NexoFalso()
+    monkeypatch.setattr(api_endpoints.nexo_api, "nexo_genesis", nexo)
+    resposta = cliente.post("/api/chat", json={"message": "Crie 5 agentes", "user_id": "42", "stream": True})
+
+    *deltas, fim = eventos(resposta)
+    assert [d["delta"] for d in deltas] == ["Criando ", "5 agentes", "\n\n✅ Agente criado"]
+    assert fim["done"] and fim["response"] == "Criando 5 agentes\n\n✅ Agente criado"
+    assert nexo.chamadas == [("Crie 5 agentes", "42")]
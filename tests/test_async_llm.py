@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.async_llm import gather_limited, make_async, run_sync
+
+
+def test_gather_limited_respeita_limite_e_ordem():
+    ativos = []
+    pico = []
+
+    async def tarefa(i):
+        ativos.append(i)
+        pico.append(len(ativos))
+        await asyncio.sleep(0.02 * (5 - i))
+        ativos.remove(i)
+        return i
+
+    resultados = run_sync(gather_limited([lambda i=i: tarefa(i) for i in range(5)], limit=2))
+    assert resultados == [0, 1, 2, 3, 4]
+    assert max(pico) == 2
+
+
+def test_gather_limited_devolve_excecoes_sem_cancelar_as_demais():
+    async def falhar():
+        raise ValueError("provedor indisponível")
+
+    async def responder():
+        return "ok"
+
+    resultados = run_sync(gather_limited([falhar, responder()], return_exceptions=True))
+    assert isinstance(resultados[0], ValueError) and resultados[1] == "ok"
+
+
+def test_make_async_roda_chamadas_bloqueantes_em_paralelo():
+    def llm_lento(prompt):
+        time.sleep(0.2)
+        return f"resposta para {prompt}"
+
+    allm = make_async(llm_lento)
+    inicio = time.perf_counter()
+    resultados = run_sync(gather_limited([lambda i=i: allm(f"p{i}") for i in range(4)], limit=4))
+    assert resultados == [f"resposta para p{i}" for i in range(4)]
+    assert time.perf_counter() - inicio < 0.6
+
+
+def test_run_sync_funciona_dentro_de_um_loop_em_execucao():
+    async def interna():
+        return threading.current_thread().name
+
+    async def externa():
+        return run_sync(interna())
+
+    assert asyncio.run(externa())
+
+
+def test_acall_many_dispara_prompts_em_paralelo():
+    nexo_genesis = pytest.importorskip("agentes.NexoGenesis")
+    agente = nexo_genesis.NexoGenesisAgent.__new__(nexo_genesis.NexoGenesisAgent)
+    chamadas = []
+
+    def call_llm(prompt, user_message="", use_cache=True, call_site=None, semantic_text=None):
+        chamadas.append(prompt)
+        time.sleep(0.2)
+        return prompt.upper()
+
+    agente.call_llm = call_llm
+    inicio = time.perf_counter()
+    assert run_sync(agente.acall_many(["a", "b", "c"], limit=3)) == ["A", "B", "C"]
+    assert time.perf_counter() - inicio < 0.5
+    assert sorted(chamadas) == ["a", "b", "c"]
+
+
+def test_evolucao_implementa_oportunidades_em_paralelo(monkeypatch):
+    pytest.importorskip("supabase")
+    from core.evolution import EvolutionModule
+
+    evolucao = EvolutionModule.__new__(EvolutionModule)
+    evolucao.evolution_history = []
+    evolucao._analyze_current_state = lambda: {}
+    evolucao._search_for_improvements = lambda: [{"title": "PEP"}]
+    evolucao._identify_evolution_opportunities = lambda estado, melhorias: [
+        {"type": "feature"}, {"type": "bugfix"}, {"type": "excedente"}
+    ]
+    evolucao._save_evolution_log = lambda ciclo: None
+
+    def implementar(oportunidade):
+        time.sleep(0.2)
+        if oportunidade["type"] == "bugfix":
+            raise RuntimeError("deploy falhou")
+        return {"implemented": oportunidade["type"]}
+
+    evolucao._implement_improvement = implementar
+    inicio = time.perf_counter()
+    evolucao.evolve()
+    assert time.perf_counter() - inicio < 0.35
+
+    ciclo = evolucao.evolution_history[-1]
+    assert ciclo["improvements"] == [{"implemented": "feature"}]
+    assert ciclo["errors"] == ["deploy falhou"]
+    assert "implement_feature" in ciclo["steps"]
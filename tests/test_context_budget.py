@@ -0,0 +1,61 @@
+import json
+
+from core.context_budget import (
+    budget_for, compact_json, estimate_tokens, pack_context, pack_context_with_coverage, split_passages
+)
+
+
+def test_empacotamento_respeita_orcamento_e_prioriza_trechos_relevantes():
+    irrelevante = "Assunto sem relação com a missão, apenas texto de preenchimento. " * 30
+    relevante = "Cache com Redis reduz a latência das respostas da API."
+    itens = [
+        {"title": "Outro", "link": "https://a.example", "content": irrelevante},
+        {"title": "Redis", "link": "https://b.example", "content": relevante},
+    ]
+    resultado = pack_context(itens, "cache redis latência api", max_tokens=120)
+
+    assert estimate_tokens(resultado) <= 120
+    empacotados = json.loads(resultado)
+    # Ordem e metadados dos itens mantidos; o trecho relevante entra, o longo e irrelevante não cabe inteiro
+    assert [i["link"] for i in empacotados] == ["https://a.example", "https://b.example"]
+    assert empacotados[1]["content"] == relevante
+    assert len(empacotados[0].get("content", "")) < len(irrelevante)
+
+
+def test_trechos_quase_identicos_de_sites_diferentes_sao_descartados():
+    noticia = "O Python 3.13 traz um compilador JIT experimental e remove o GIL opcionalmente. " * 3
+    itens = [{"title": "A", "content": noticia}, {"title": "B", "content": noticia}]
+    empacotados = json.loads(pack_context(itens, "python jit gil", max_tokens=10000))
+    assert "content" in empacotados[0] and "content" not in empacotados[1]
+
+
+def test_quebra_em_trechos_preserva_indentacao_e_limite():
+    codigo = "def f():\n    return 1\n\n" + "Frase longa. " * 60
+    trechos = split_passages(codigo, max_chars=100)
+    assert trechos[0] == "def f():\n    return 1"
+    assert all(len(t) <= 100 for t in trechos)
+
+
+def test_orcamento_por_ponto_de_chamada_e_entradas_que_nao_sao_lista(monkeypatch):
+    monkeypatch.setenv("NEXO_CONTEXT_BUDGET_CODER_AI", "42")
+    assert budget_for("coder_ai") == 42
+    assert budget_for("interpret_mission") == 800
+    assert pack_context([], "x") == "[]"
+    assert pack_context({"a": 1}, "x") == compact_json({"a": 1}) == '{"a":1}'
+
+
+def test_cobertura_indica_itens_que_entraram_inteiros():
+    curto = "Cache com Redis reduz a latência da API."
+    longo = " ".join(f"Parágrafo {i} sobre filas, workers e deploy em produção." for i in range(80))
+    noticia = "O Python 3.13 traz um compilador JIT experimental."
+    itens = [
+        {"title": "A", "content": curto},
+        {"title": "B", "content": longo},
+        {"title": "C", "content": noticia},
+        {"title": "D", "content": noticia},
+    ]
+    resultado, cobertos = pack_context_with_coverage(itens, "cache redis python jit", max_tokens=120)
+    assert resultado == pack_context(itens, "cache redis python jit", max_tokens=120)
+    # B foi cortado pelo orçamento; D é duplicata de C, que entrou
+    assert cobertos == [0, 2, 3]
+    assert pack_context_with_coverage(itens, "x", max_tokens=10000)[1] == [0, 1, 2, 3]
@@ -0,0 +1,64 @@
+from core.crawl_scheduler import CrawlScheduler, RobotsDisallowed, retry_after_seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_429_com_retry_after_reduz_ritmo_e_repete():
+    clock = FakeClock()
+    scheduler = CrawlScheduler(rate=2.0, burst=1, host_rates={}, sleep=clock.sleep, clock=clock)
+    respostas = [FakeResponse(429, {"Retry-After": "5"}), FakeResponse(200)]
+    fetch = scheduler.wrap(lambda url, params=None, headers=None, timeout=10: respostas.pop(0))
+
+    assert fetch("https://a.example/x").status_code == 200
+    assert sum(clock.sleeps) >= 5
+    host = scheduler.get_stats()["hosts"]["a.example"]
+    assert host["throttled"] == 1 and host["retries"] == 1
+
+
+def test_balde_por_host_espaca_requisicoes():
+    clock = FakeClock()
+    scheduler = CrawlScheduler(rate=2.0, burst=1, host_rates={}, sleep=clock.sleep, clock=clock)
+    for _ in range(3):
+        scheduler.acquire("https://a.example/x")
+    scheduler.acquire("https://b.example/y")
+    assert clock.now == 1.0
+    assert retry_after_seconds("12") == 12.0
+
+
+def test_pagina_e_baixada_com_o_mesmo_user_agent_das_regras_do_robots():
+    clock = FakeClock()
+    scheduler = CrawlScheduler(host_rates={}, user_agent="NexoBot", sleep=clock.sleep, clock=clock)
+    robots = FakeResponse(200)
+    robots.text = "User-agent: NexoBot\nDisallow: /privado\n\nUser-agent: *\nAllow: /\n"
+    scheduler.session.get = lambda url, timeout=5, headers=None: robots
+    enviados = []
+
+    def fetcher(url, params=None, headers=None, timeout=10):
+        enviados.append(headers)
+        return FakeResponse(200)
+
+    fetch = scheduler.wrap(fetcher, respect_robots=True)
+    fetch("https://a.example/publico", headers={"User-Agent": "Mozilla/5.0", "If-None-Match": '"v1"'})
+    assert enviados == [{"User-Agent": "NexoBot", "If-None-Match": '"v1"'}]
+    try:
+        fetch("https://a.example/privado")
+        assert False, "robots.txt deveria bloquear /privado"
+    except RobotsDisallowed:
+        pass
@@ -0,0 +1,37 @@
+import time
+
+from core.crawler import Crawler
+
+
+def test_dominio_lento_nao_bloqueia_outro_dominio():
+    crawler = Crawler(max_workers=2, per_domain=1, deadline=5)
+    inicio = time.perf_counter()
+    concluidas = {}
+
+    def baixar(url):
+        if "lento" in url:
+            time.sleep(0.2)
+        concluidas[url] = time.perf_counter() - inicio
+        return url
+
+    urls = ["https://lento.example/1", "https://lento.example/2", "https://lento.example/3", "https://rapido.example/1"]
+    assert crawler.map(baixar, urls) == urls
+    # Com uma vaga por domínio, o domínio rápido usa a segunda thread sem esperar o lento
+    assert concluidas["https://rapido.example/1"] < 0.1
+    assert concluidas["https://lento.example/3"] >= 0.6
+
+
+def test_prazo_cancela_tarefas_que_nao_comecaram():
+    crawler = Crawler(max_workers=2, per_domain=1)
+    iniciadas = []
+
+    def baixar(url):
+        iniciadas.append(url)
+        time.sleep(0.3)
+        return url
+
+    resultados = crawler.map(baixar, [f"https://lento.example/{i}" for i in range(4)], deadline=0.1)
+    assert resultados == [None] * 4
+    time.sleep(0.4)
+    assert len(iniciadas) <= 2
+    assert crawler.get_stats()["timed_out"] == 4
@@ -0,0 +1,33 @@
+import numpy as np
+
+from core.embedding_cache import CachedEmbeddingFunction, EmbeddingCache, MicroBatcher
+
+
+def test_textos_repetidos_nao_sao_recalculados_entre_processos(tmp_path):
+    chamadas = []
+
+    def modelo(textos):
+        chamadas.append(list(textos))
+        return [np.full(4, len(t), dtype=np.float32) for t in textos]
+
+    funcao = CachedEmbeddingFunction(modelo, "teste", cache=EmbeddingCache("teste", str(tmp_path)), batcher=MicroBatcher(modelo, max_wait=0))
+    vetores = funcao(["ab", "abc", "ab"])
+    assert [v[0] for v in vetores] == [2, 3, 2]
+    assert chamadas == [["ab", "abc"]]
+
+    # Nova instância (como após reiniciar): lê a matriz do disco sem chamar o modelo
+    recarregada = CachedEmbeddingFunction(modelo, "teste", cache=EmbeddingCache("teste", str(tmp_path)), batcher=MicroBatcher(modelo, max_wait=0))
+    assert recarregada(["abc"])[0][0] == 3
+    assert len(chamadas) == 1
+
+
+def test_dois_processos_gravando_no_mesmo_cache_nao_trocam_vetores(tmp_path):
+    # Duas instâncias abertas ao mesmo tempo, como o Flask e o bot compartilhando cache/embeddings
+    flask = EmbeddingCache("teste", str(tmp_path))
+    bot = EmbeddingCache("teste", str(tmp_path))
+    flask.put_many(["a"], [np.full(4, 1, dtype=np.float32)])
+    bot.put_many(["b"], [np.full(4, 2, dtype=np.float32)])
+    flask.put_many(["c"], [np.full(4, 3, dtype=np.float32)])
+
+    for cache in (flask, bot, EmbeddingCache("teste", str(tmp_path))):
+        assert [v[0] for v in cache.get_many(["a", "b", "c"])] == [1, 2, 3]
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+pytest.importorskip("supabase")
+
+from core import evolution
+from core.evolution import EvolutionModule
+from core.near_duplicates import NearDuplicateStore
+from core.watermarks import SourceWatermarks
+
+
+class NexoFalso:
+    def __init__(self, resposta):
+        self.resposta = resposta
+        self.chamadas = []
+
+    def call_llm(self, prompt, descricao, **kwargs):
+        self.chamadas.append(kwargs)
+        return self.resposta
+
+
+@pytest.fixture(autouse=True)
+def duplicatas_em_memoria(monkeypatch):
+    store = NearDuplicateStore(path=":memory:")
+    monkeypatch.setattr(evolution, "get_near_duplicates", lambda: store)
+    return store
+
+
+def modulo(tmp_path, resposta):
+    evolucao = EvolutionModule.__new__(EvolutionModule)
+    evolucao.nexo = NexoFalso(resposta)
+    evolucao.learning_sources = ["python new features"]
+    evolucao.watermarks = SourceWatermarks(path=str(tmp_path / "marcas.json"))
+    evolucao._pending_pages = {}
+    return evolucao
+
+
+MELHORIA = {"source": "python new features", "title": "PEP", "content": "Novo recurso do Python", "url": "https://a.example/pep"}
+
+
+def test_marcas_avancam_apos_analise_valida(tmp_path, duplicatas_em_memoria):
+    resposta = json.dumps([{"type": "feature", "priority": "high", "description": "x", "implementation": "y"}])
+    evolucao = modulo(tmp_path, resposta)
+    assert len(evolucao._identify_evolution_opportunities({}, [MELHORIA])) == 1
+    assert not evolucao.watermarks.is_new(MELHORIA["source"], MELHORIA["url"], MELHORIA["content"])
+    assert duplicatas_em_memoria.seen_url(MELHORIA["url"])
+    # O cache semântico compara o conteúdo empacotado, não só os títulos
+    assert MELHORIA["content"] in evolucao.nexo.chamadas[0]["semantic_text"]
+
+
+def test_falha_do_provedor_nao_avanca_marcas(tmp_path, duplicatas_em_memoria):
+    evolucao = modulo(tmp_path, '{"action": "error", "response": "provedor indisponível"}')
+    assert evolucao._identify_evolution_opportunities({}, [MELHORIA]) == []
+    assert evolucao.watermarks.is_new(MELHORIA["source"], MELHORIA["url"], MELHORIA["content"])
+    assert not duplicatas_em_memoria.seen_url(MELHORIA["url"])
+
+
+def test_melhorias_cortadas_pelo_orcamento_nao_avancam_marcas(tmp_path, duplicatas_em_memoria, monkeypatch):
+    monkeypatch.setenv("NEXO_CONTEXT_BUDGET_EVOLUTION_OPPORTUNITIES", "150")
+    longa = dict(MELHORIA, url="https://b.example/longa", title="Longa",
+                 content=" ".join(f"Trecho {i} de um artigo extenso sobre o Python." for i in range(60)))
+    resposta = json.dumps([{"type": "feature", "priority": "high", "description": "x", "implementation": "y"}])
+    evolucao = modulo(tmp_path, resposta)
+    evolucao._identify_evolution_opportunities({}, [MELHORIA, longa])
+
+    assert not evolucao.watermarks.is_new(MELHORIA["source"], MELHORIA["url"], MELHORIA["content"])
+    assert evolucao.watermarks.is_new(longa["source"], longa["url"], longa["content"])
+    assert duplicatas_em_memoria.seen_url(MELHORIA["url"]) and not duplicatas_em_memoria.seen_url(longa["url"])
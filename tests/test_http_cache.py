@@ -0,0 +1,49 @@
+from core.http_cache import HTTPCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+
+
+def test_revalidacao_condicional_reaproveita_extracao():
+    requisicoes = []
+
+    def fetcher(url, params=None, headers=None, timeout=10):
+        requisicoes.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, b"<p>ola</p>", {"ETag": '"v1"'})
+
+    extracoes = []
+
+    def extrair(response):
+        extracoes.append(1)
+        return {"texto": response.text}
+
+    cache = HTTPCache(path=":memory:", ttls={"scrape": 0})
+    assert cache.fetch_extracted("https://a.example", extrair, fetcher=fetcher) == {"texto": "<p>ola</p>"}
+    assert cache.fetch_extracted("https://a.example", extrair, fetcher=fetcher) == {"texto": "<p>ola</p>"}
+    assert requisicoes[1]["If-None-Match"] == '"v1"'
+    assert len(extracoes) == 1
+    assert cache.get_stats()["revalidated"] == 1
+
+
+def test_fresco_nao_usa_rede_e_no_store_nao_grava():
+    chamadas = []
+
+    def fetcher(url, params=None, headers=None, timeout=10):
+        chamadas.append(url)
+        cache_control = "no-store" if "privado" in url else ""
+        return FakeResponse(200, b"{}", {"Cache-Control": cache_control})
+
+    cache = HTTPCache(path=":memory:", ttls={"google": 3600})
+    cache.fetch("https://api.example", params={"q": "nexo"}, kind="google", fetcher=fetcher)
+    resposta = cache.fetch("https://api.example", params={"q": "nexo"}, kind="google", fetcher=fetcher)
+    assert resposta.from_cache and len(chamadas) == 1
+    cache.fetch("https://privado.example", kind="google", fetcher=fetcher)
+    cache.fetch("https://privado.example", kind="google", fetcher=fetcher)
+    assert len(chamadas) == 3
@@ -0,0 +1,46 @@
+from collections import deque
+
+from core.crawl_scheduler import CrawlScheduler
+from core.http_cache import HTTPCache
+from core.internet_search import InternetSearchModule
+from core.search_index import SearchIndex
+
+
+PAGINA_DDG = "".join(
+    f'<div class="result"><a class="result__a" href="https://r{i}.example/">Resultado {i}</a>'
+    f'<a class="result__snippet">trecho {i}</a></div>'
+    for i in range(8)
+).encode()
+
+
+class RespostaFalsa:
+    status_code = 200
+    headers = {"Content-Type": "text/html"}
+    encoding = "utf-8"
+    content = PAGINA_DDG
+
+
+def modulo(pedidos):
+    busca = InternetSearchModule.__new__(InternetSearchModule)
+    busca.search_history = deque(maxlen=10)
+    busca.index = SearchIndex(path=":memory:")
+    busca.http_cache = HTTPCache(path=":memory:")
+    busca.scheduler = CrawlScheduler(host_rates={}, user_agent="NexoBot")
+
+    def buscar(url, params=None, headers=None, timeout=10):
+        assert headers["User-Agent"] == "NexoBot"
+        pedidos.append((url, params))
+        return RespostaFalsa()
+
+    busca._polite_get = buscar
+    return busca
+
+
+def test_duckduckgo_mais_resultados_depois_de_uma_busca_curta():
+    pedidos = []
+    busca = modulo(pedidos)
+
+    assert len(busca._duckduckgo_search("c++ & rust", 2)) == 2
+    assert len(busca._duckduckgo_search("c++ & rust", 5)) == 5
+    # A consulta vai como parâmetro (codificada) e a segunda busca sai do cache
+    assert pedidos == [("https://duckduckgo.com/html/", {"q": "c++ & rust"})]
@@ -0,0 +1,24 @@
+from core.llm_cache import LLMResponseCache
+
+
+def test_cache_hit_ignora_espacos():
+    cache = LLMResponseCache(path=":memory:")
+    chamadas = []
+
+    def request():
+        chamadas.append(1)
+        return "resposta"
+
+    assert cache.get_or_call("google", "gemini", "Olá  Nexo\n", request) == "resposta"
+    assert cache.get_or_call("google", "gemini", "Olá Nexo", request) == "resposta"
+    assert len(chamadas) == 1
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_cache_bypass_e_lru():
+    cache = LLMResponseCache(path=":memory:", max_entries=1)
+    cache.set("openai", "gpt", "a", "1")
+    cache.set("openai", "gpt", "b", "2")
+    assert cache.get("openai", "gpt", "a") is None
+    assert cache.get_or_call("openai", "gpt", "b", lambda: "novo", use_cache=False) == "novo"
+    assert cache.get("openai", "gpt", "b") == "2"
@@ -0,0 +1,94 @@
+import socket
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from core.llm_clients import ProviderClientRegistry
+
+
+class OllamaFalso(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == "/api/tags" else 404)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_ollama_so_e_candidato_com_servidor_respondendo():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), OllamaFalso)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    registro = ProviderClientRegistry(http2=False)
+    try:
+        assert registro.ollama_reachable(f"127.0.0.1:{servidor.server_address[1]}")
+        assert not registro.ollama_reachable(f"http://127.0.0.1:{porta_livre()}")
+    finally:
+        servidor.shutdown()
+
+
+class Sessao:
+    def __init__(self):
+        self.chamadas = []
+
+    def post(self, url, **kwargs):
+        self.chamadas.append(kwargs)
+        return "ok"
+
+
+def test_sem_httpx_o_timeout_do_chamador_e_mantido(monkeypatch):
+    monkeypatch.setitem(sys.modules, "httpx", None)
+    registro = ProviderClientRegistry(http2=True)
+    sessao = Sessao()
+    registro._sessions["nexo"] = sessao
+
+    assert registro.post("nexo", "http://nexo/api/chat", json={}, timeout=30) == "ok"
+    assert sessao.chamadas == [{"json": {}, "timeout": 30}]
+    assert not registro.http2
+
+
+def test_erros_do_httpx_viram_excecoes_do_requests(monkeypatch):
+    httpx = types.ModuleType("httpx")
+
+    class HTTPError(Exception):
+        pass
+
+    httpx.HTTPError = HTTPError
+    httpx.TransportError = type("TransportError", (HTTPError,), {})
+    httpx.TimeoutException = type("TimeoutException", (httpx.TransportError,), {})
+    httpx.ConnectTimeout = type("ConnectTimeout", (httpx.TimeoutException,), {})
+    httpx.ReadTimeout = type("ReadTimeout", (httpx.TimeoutException,), {})
+    httpx.ConnectError = type("ConnectError", (httpx.TransportError,), {})
+    httpx.Timeout = lambda leitura, connect: ("timeout", connect, leitura)
+    monkeypatch.setitem(sys.modules, "httpx", httpx)
+
+    recebidos = []
+
+    class Cliente:
+        def post(self, url, timeout=None, **kwargs):
+            recebidos.append(timeout)
+            raise erro("falhou")
+
+    registro = ProviderClientRegistry(http2=True)
+    registro._http2_clients["groq"] = Cliente()
+    casos = [
+        (httpx.ConnectTimeout, requests.exceptions.ConnectTimeout),
+        (httpx.ReadTimeout, requests.exceptions.ReadTimeout),
+        (httpx.ConnectError, requests.exceptions.ConnectionError),
+        (httpx.TransportError, requests.exceptions.RequestException),
+    ]
+    for erro, esperada in casos:
+        with pytest.raises(esperada):
+            registro.post("groq", "https://api.groq.com", json={}, timeout=(2, 10))
+    assert recebidos == [("timeout", 2, 10)] * len(casos)
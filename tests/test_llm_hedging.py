@@ -0,0 +1,39 @@
+import time
+
+from core.llm_hedging import LLMHedger
+
+
+class RouterFalso:
+    def latency_percentile(self, provider, q):
+        return None
+
+
+def lento(prompt):
+    time.sleep(0.2)
+    return "principal"
+
+
+def rapido(prompt):
+    return "secundário"
+
+
+def test_hedge_volta_a_disparar_depois_do_primeiro():
+    hedger = LLMHedger(RouterFalso(), enabled=True, default_delay=0.02, min_delay=0.01, max_hedge_ratio=0.25)
+    providers = {"google": lento, "groq": rapido}
+    respostas = []
+    for _ in range(8):
+        if hedger.should_hedge("olá", "interactive"):
+            respostas.append(hedger.call("olá", providers, ["google", "groq"]))
+
+    metricas = hedger.get_metrics()
+    # Chamadas 1 e 5 usam hedge (1/5 < 0.25); as demais respeitam a proporção máxima
+    assert metricas["eligible"] == 8
+    assert metricas["hedges_fired"] == 2
+    assert respostas == [("groq", "secundário")] * 2
+
+
+def test_hedge_respeita_classe_e_geracao_de_codigo():
+    hedger = LLMHedger(RouterFalso(), enabled=True)
+    assert not hedger.should_hedge("olá", "background")
+    assert not hedger.should_hedge("Coder AI: implemente o código da função", "interactive")
+    assert hedger.get_metrics()["eligible"] == 0
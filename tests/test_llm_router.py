@@ -0,0 +1,100 @@
+import pytest
+
+from core.llm_router import AdaptiveLLMRouter, CircuitOpen
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_provider(clock, delay, fail=False):
+    def call(prompt):
+        clock.now += delay
+        if fail:
+            raise RuntimeError("erro simulado")
+        return "ok"
+    return call
+
+
+def test_escolhe_mais_barato_dentro_do_slo():
+    clock = FakeClock()
+    router = AdaptiveLLMRouter(clock=clock)
+    providers = {
+        "groq": fake_provider(clock, 30.0),
+        "openai": fake_provider(clock, 1.0),
+    }
+    # groq é mais barato, mas depois da primeira chamada viola o SLO interativo (10 s)
+    assert router.call("olá", providers, "interactive")[0] == "groq"
+    assert router.call("olá", providers, "interactive")[0] == "openai"
+    assert router.get_decisions()[-1]["chosen"] == "openai"
+
+
+def test_circuit_breaker_abre_e_reabre_apos_cooldown():
+    clock = FakeClock()
+    router = AdaptiveLLMRouter(clock=clock, failure_threshold=2, cooldown=30.0)
+    providers = {
+        "ollama": fake_provider(clock, 0.1, fail=True),
+        "google": fake_provider(clock, 1.0),
+    }
+    for _ in range(2):
+        assert router.call("olá", providers, "background")[0] == "google"
+    assert router.snapshot()["ollama"]["breaker"] == "open"
+    assert router.choose("background", list(providers)) == "google"
+    clock.now += 31.0
+    assert router.rank("background", list(providers))[0] == "ollama"
+
+
+def test_cota_esgotada_e_falha_total():
+    clock = FakeClock()
+    router = AdaptiveLLMRouter(clock=clock)
+    router.set_quota("groq", 0)
+    assert router.choose("interactive", ["groq", "google"]) == "google"
+    with pytest.raises(RuntimeError):
+        router.call("olá", {"google": fake_provider(clock, 1.0, fail=True)}, "interactive")
+
+
+def test_half_open_libera_uma_unica_tentativa_de_teste():
+    clock = FakeClock()
+    router = AdaptiveLLMRouter(clock=clock, cooldown=30.0)
+    for _ in range(3):
+        router.record("ollama", 0.1, False)
+    clock.now += 31.0
+
+    # Ordenar os candidatos não gasta a tentativa de teste
+    assert router.rank("background", ["ollama", "google"])[0] == "ollama"
+    assert router.rank("background", ["ollama", "google"])[0] == "ollama"
+
+    # Várias requisições simultâneas: só a primeira que chama o provedor em recuperação passa
+    router.claim("ollama")
+    with pytest.raises(CircuitOpen):
+        router.claim("ollama")
+    assert router.rank("background", ["ollama", "google"])[0] == "google"
+    router.record("ollama", 0.1, True)
+    assert router.rank("background", ["ollama", "google"])[0] == "ollama"
+
+
+def test_tentativa_de_teste_vai_para_o_provedor_chamado():
+    clock = FakeClock()
+    router = AdaptiveLLMRouter(clock=clock, cooldown=30.0)
+    for provider in ("ollama", "groq"):
+        for _ in range(3):
+            router.record(provider, 0.1, False)
+    clock.now += 31.0
+
+    # ollama responde; groq foi ordenado mas não chamado e continua disponível para teste
+    assert router.call("olá", {"ollama": fake_provider(clock, 0.1), "groq": fake_provider(clock, 0.1)}, "background")[0] == "ollama"
+    assert router.snapshot()["ollama"]["breaker"] == "closed"
+    assert router.rank("background", ["groq", "google"])[0] == "groq"
+
+
+def test_cota_configurada_recarrega_a_cada_janela():
+    clock = FakeClock()
+    router = AdaptiveLLMRouter(clock=clock, quotas={"groq": 1000}, quota_window=3600)
+    router.record("groq", 0.5, True, tokens=1000)
+    assert router.choose("interactive", ["groq", "google"]) == "google"
+    clock.now += 3601
+    assert router.choose("interactive", ["groq", "google"]) == "groq"
@@ -0,0 +1,22 @@
+import json
+
+from core.llm_streaming import JSONFieldStreamer
+
+
+def test_campo_response_sai_em_partes_sem_o_json():
+    resposta = {"action": "create_agent", "response": 'Criando "Agente" 🤖\nLinha 2 \\ fim', "agent_name": "X"}
+    for ensure_ascii in (True, False):
+        bruto = json.dumps(resposta, ensure_ascii=ensure_ascii)
+        for tamanho in (1, 2, 5, 13):
+            campo = JSONFieldStreamer("response")
+            partes = [campo.feed(bruto[i:i + tamanho]) for i in range(0, len(bruto), tamanho)]
+            assert "".join(partes) == resposta["response"]
+            assert campo.done
+            # O texto chega aos poucos, não só no final
+            assert len([p for p in partes if p]) > 1
+
+
+def test_campo_ausente_nao_gera_texto():
+    campo = JSONFieldStreamer("response")
+    assert campo.feed('{"action": "clarify", "description": "o campo \\"response\\" não vem"}') == ""
+    assert not campo.done
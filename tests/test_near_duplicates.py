@@ -0,0 +1,37 @@
+from core.near_duplicates import NearDuplicateStore, hamming, simhash
+
+
+ARTIGO = (
+    "O novo coletor de lixo reduz pausas em aplicações com muitos objetos pequenos. "
+    "Os testes mostram ganhos de vazão em servidores web e filas de tarefas. "
+    "A mudança chega na próxima versão estável junto com melhorias no compilador. "
+)
+
+
+def test_republicacao_com_variacoes_e_descartada():
+    store = NearDuplicateStore(path=":memory:")
+    original = {"url": "https://a.example/gc", "content": ARTIGO}
+    copia = {"url": "https://b.example/noticia/7", "content": "Notícias: " + ARTIGO.upper()}
+    outro = {"url": "https://c.example/sql", "content": "Índices parciais no SQLite aceleram consultas filtradas por status."}
+
+    assert hamming(simhash(original["content"]), simhash(copia["content"])) <= store.threshold
+    assert [p["url"] for p in store.filter([original, copia, outro])] == [original["url"], outro["url"]]
+    assert store.seen_url(copia["url"])
+
+
+def test_impressoes_persistem_entre_execucoes(tmp_path):
+    caminho = str(tmp_path / "dups.sqlite")
+    NearDuplicateStore(path=caminho).check("https://a.example/gc", ARTIGO)
+
+    store = NearDuplicateStore(path=caminho)
+    assert store.seen_url("https://a.example/gc")
+    assert store.check("https://espelho.example/gc", ARTIGO) == "https://a.example/gc"
+
+
+def test_verificacao_sem_registro_so_marca_apos_record():
+    store = NearDuplicateStore(path=":memory:")
+    assert store.check("https://a.example/gc", ARTIGO, record=False) is None
+    assert not store.seen_url("https://a.example/gc")
+
+    store.record("https://a.example/gc", ARTIGO)
+    assert store.check("https://espelho.example/gc", ARTIGO, record=False) == "https://a.example/gc"
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from core.rate_limiter import ProviderRateLimiter, RateLimitExceeded, RateLimiterRegistry, TokenBucket, _parse_limits
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_balde_repoe_tokens_continuamente_ate_a_capacidade():
+    relogio = Relogio()
+    balde = TokenBucket(capacity=60, refill_per_second=1, clock=relogio)
+    balde.take(60)
+    assert balde.time_until(10) == 10.0
+
+    relogio.agora = 4
+    assert balde.time_until(10) == 6.0
+    relogio.agora = 1000
+    assert balde.time_until(60) == 0.0 and balde.tokens == 60
+
+
+def test_rpm_e_tpm_limitam_e_timeout_rejeita():
+    relogio = Relogio()
+    limitador = ProviderRateLimiter("groq", requests_per_minute=2, tokens_per_minute=600, clock=relogio)
+    assert limitador.acquire(tokens=100) == 0.0
+    assert limitador.acquire(tokens=100) == 0.0
+    # Sem requisições no balde: com o relógio parado, a fila expira
+    with pytest.raises(RateLimitExceeded):
+        limitador.acquire(tokens=100, timeout=0)
+
+    relogio.agora = 30
+    limitador.acquire(tokens=600)
+    # Tokens/min esgotados mesmo com requisição disponível
+    relogio.agora = 60
+    with pytest.raises(RateLimitExceeded):
+        limitador.acquire(tokens=600, timeout=0)
+
+    metricas = limitador.get_metrics()
+    assert metricas["granted"] == 3 and metricas["rejected"] == 2 and metricas["queue_depth"] == 0
+
+
+def test_chamada_interativa_passa_a_frente_das_de_fundo():
+    limitador = ProviderRateLimiter("teste", requests_per_minute=600)
+    limitador.request_bucket.tokens = 0
+    ordem = []
+
+    def chamada(nome, prioridade):
+        limitador.acquire(priority=prioridade, timeout=10)
+        ordem.append(nome)
+
+    fundo = [threading.Thread(target=chamada, args=(f"fundo{i}", 10)) for i in range(3)]
+    for t in fundo:
+        t.start()
+    time.sleep(0.05)
+    urgente = threading.Thread(target=chamada, args=("interativa", 0))
+    urgente.start()
+    for t in fundo + [urgente]:
+        t.join()
+
+    assert ordem[0] == "interativa"
+    assert limitador.get_metrics()["by_priority"][0]["granted"] == 1
+
+
+def test_limites_configuraveis_e_provedor_sem_limite():
+    limites = _parse_limits("groq=60:,ollama=:1000")
+    assert limites["groq"] == (60, None) and limites["ollama"] == (None, 1000)
+    assert limites["google"] == (15, 1000000)
+
+    registro = RateLimiterRegistry(limits={"ollama": (None, None)})
+    assert registro.acquire("ollama", tokens=10 ** 9) == 0.0
+    assert registro.limiter("ollama") is registro.limiter("ollama")
@@ -0,0 +1,41 @@
+from core.http_cache import HTTPCache
+from core.search_backend import GoogleSearchBackend
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+    encoding = "utf-8"
+
+    def __init__(self, query):
+        self.content = ('{"items": [{"title": "%s", "link": "https://a.example/%s", "snippet": "s"}]}' % (query, query)).encode()
+
+    def json(self):
+        import json
+        return json.loads(self.content)
+
+
+class FakeSession:
+    def __init__(self):
+        self.queries = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.queries.append(params["q"])
+        return FakeResponse(params["q"])
+
+
+def test_search_many_reaproveita_cache_entre_consultas(monkeypatch):
+    session = FakeSession()
+    backend = GoogleSearchBackend("chave", "cse", session=session)
+    backend.http_cache = HTTPCache(path=":memory:")
+
+    def sem_cliente():
+        raise ImportError("googleapiclient ausente")
+
+    monkeypatch.setattr(backend, "service", sem_cliente)
+    monkeypatch.setattr(backend.scheduler, "acquire", lambda url: 0.0)
+
+    assert backend.search("flask", 3)[0]["link"] == "https://a.example/flask"
+    resultados = backend.search_many(["flask", "sqlite"], 3)
+    assert [r[0]["title"] for r in resultados] == ["flask", "sqlite"]
+    assert session.queries == ["flask", "sqlite"]
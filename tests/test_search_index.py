@@ -0,0 +1,70 @@
+import sqlite3
+
+from core.search_index import SearchIndex, fts_query, normalize_query
+
+
+def indice():
+    index = SearchIndex(path=":memory:")
+    index.add_search("flask optimization", [
+        {"title": "Otimizando Flask", "link": "https://a.example/flask", "snippet": "Cache e gunicorn para APIs Flask", "source": "google"},
+        {"title": "Flask em produção", "link": "https://b.example/prod", "snippet": "Workers, threads e otimização", "source": "google"},
+    ])
+    index.add_page("https://c.example/cache", "Cache HTTP", "Como usar ETag e cache em aplicações Flask rápidas")
+    return index
+
+
+def test_busca_repetida_e_termos_respondidos_pelo_indice():
+    index = indice()
+    exata = index.lookup("Flask   OPTIMIZATION", 2)
+    assert [r["link"] for r in exata] == ["https://a.example/flask", "https://b.example/prod"]
+    assert {r["link"] for r in index.lookup("cache flask", 2)} == {"https://a.example/flask", "https://c.example/cache"}
+    assert index.lookup("kubernetes", 2) is None
+    # Acentos são ignorados e o título pesa mais que o corpo
+    assert [h["url"] for h in index.search("otimizacao")] == ["https://b.example/prod"]
+    assert index.get_stats()["local_hits"] == 2 and index.get_stats()["local_misses"] == 1
+
+
+def test_upsert_substitui_o_texto_indexado_da_pagina():
+    index = indice()
+    index.add_page("https://c.example/cache", "Cache HTTP", "Agora o texto fala de Redis")
+    assert index.search("ETag") == []
+    assert [h["url"] for h in index.search("redis")] == ["https://c.example/cache"]
+    assert index.get_stats()["documents"] == 3
+
+
+def test_pagina_sem_mudanca_nao_e_reindexada():
+    index = indice()
+    fts = index._conn.execute("SELECT COUNT(*) FROM documents_fts_docsize").fetchone()[0]
+    index._conn.execute("CREATE TEMP TABLE escritas (n)")
+    index._conn.execute(
+        "CREATE TEMP TRIGGER conta_fts AFTER UPDATE OF body ON documents BEGIN INSERT INTO escritas VALUES (1); END"
+    )
+    index.add_page("https://c.example/cache", "Cache HTTP", "Como usar ETag e cache em aplicações Flask rápidas")
+
+    assert index._conn.execute("SELECT COUNT(*) FROM escritas").fetchone()[0] == 0
+    assert index._conn.execute("SELECT COUNT(*) FROM documents_fts_docsize").fetchone()[0] == fts
+    stats = index.get_stats()
+    assert stats["indexed_pages"] == 1 and stats["unchanged_pages"] == 1
+    assert [h["url"] for h in index.search("etag")] == ["https://c.example/cache"]
+
+
+def test_indice_antigo_ganha_coluna_de_hash(tmp_path):
+    caminho = str(tmp_path / "indice.sqlite")
+    conn = sqlite3.connect(caminho)
+    conn.execute(
+        "CREATE TABLE documents (id INTEGER PRIMARY KEY, kind TEXT, url TEXT, title TEXT, body TEXT, "
+        "query TEXT, source TEXT, updated_at REAL, UNIQUE(kind, url))"
+    )
+    conn.commit()
+    conn.close()
+
+    index = SearchIndex(path=caminho)
+    assert index.enabled
+    index.add_page("https://a.example", "Título", "Corpo")
+    index.add_page("https://a.example", "Título", "Corpo")
+    assert index.get_stats()["unchanged_pages"] == 1
+
+
+def test_consulta_fts_e_normalizacao():
+    assert fts_query('flask "drop" a') == '"flask" AND "drop"'
+    assert normalize_query("  Flask   API ") == "flask api"
@@ -0,0 +1,53 @@
+from core.semantic_cache import SemanticLLMCache, normalize_for_semantics
+
+
+class MemoriaFalsa:
+    """Vizinho único com a distância informada (a busca vetorial real fica em test_vector_index)"""
+
+    def __init__(self, distancia=0.01):
+        self.distancia = distancia
+        self.salvos = []
+        self.buscas = 0
+
+    def buscar_com_distancia(self, texto, k=1):
+        self.buscas += 1
+        return [(doc, meta, self.distancia) for doc, meta in self.salvos[-k:]]
+
+    def salvar_ideia(self, texto, metadados=None):
+        self.salvos.append((texto, metadados))
+
+
+def test_normalizacao_mantem_numeros_e_remove_datas():
+    assert normalize_for_semantics("Crie 5 agentes") != normalize_for_semantics("Crie 50 agentes")
+    assert normalize_for_semantics("Status em 2025-09-19T10:00:00") == normalize_for_semantics("Status em 2025-10-01 08:30")
+
+
+def test_reaproveita_prompt_semelhante_dentro_do_limiar():
+    memoria = MemoriaFalsa(distancia=0.02)
+    cache = SemanticLLMCache(enabled=True, memory=memoria)
+    cache.store("interpret_mission", "Pesquisar receitas", '{"action": "pesquisa"}')
+    assert cache.lookup("interpret_mission", "Pesquisar receitas hoje") == '{"action": "pesquisa"}'
+
+    memoria.distancia = 0.2
+    assert cache.lookup("interpret_mission", "Outra missão") is None
+
+
+def test_analise_de_evolucao_usa_limiar_mais_estrito():
+    memoria = MemoriaFalsa(distancia=0.03)
+    cache = SemanticLLMCache(enabled=True, memory=memoria)
+    cache.store("evolution_opportunities", '[{"title":"PEP","content":"Novo recurso"}]', "[]")
+    # Similaridade 0.97: suficiente para missões, não para a análise de evolução
+    assert cache.lookup("evolution_opportunities", '[{"title":"PEP","content":"Outro recurso"}]') is None
+
+    memoria.distancia = 0.01
+    assert cache.lookup("evolution_opportunities", '[{"title":"PEP","content":"Novo recurso"}]') == "[]"
+
+
+def test_pontos_de_chamada_excluidos_por_configuracao(monkeypatch):
+    monkeypatch.setenv("NEXO_SEMANTIC_CACHE_EXCLUDE", "evolution_opportunities, architect_ai")
+    memoria = MemoriaFalsa()
+    cache = SemanticLLMCache(enabled=True, memory=memoria)
+    cache.store("evolution_opportunities", "python new features: PEP", "[]")
+    assert cache.lookup("evolution_opportunities", "python new features: PEP") is None
+    assert memoria.salvos == [] and memoria.buscas == 0
+    assert cache.get_metrics()["excluded"] == 1
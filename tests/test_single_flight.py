@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from core.single_flight import SingleFlight, fingerprint
+
+
+def em_paralelo(funcoes):
+    resultados = [None] * len(funcoes)
+
+    def rodar(i, fn):
+        try:
+            resultados[i] = fn()
+        except Exception as e:
+            resultados[i] = e
+
+    threads = [threading.Thread(target=rodar, args=(i, fn)) for i, fn in enumerate(funcoes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultados
+
+
+def test_chamadas_simultaneas_com_a_mesma_chave_executam_uma_vez():
+    grupo = SingleFlight("busca")
+    execucoes = []
+
+    def busca_lenta():
+        execucoes.append(1)
+        time.sleep(0.2)
+        return ["resultado"]
+
+    resultados = em_paralelo([lambda: grupo.do("q", busca_lenta)] * 5)
+    assert resultados == [["resultado"]] * 5
+    assert len(execucoes) == 1
+    assert grupo.get_stats() == {"executions": 1, "coalesced": 4, "in_flight": 0, "name": "busca"}
+
+    # Terminada a execução, a chave é liberada: uma nova chamada executa de novo
+    grupo.do("q", busca_lenta)
+    assert len(execucoes) == 2
+
+
+def test_excecao_e_compartilhada_e_chaves_diferentes_nao_se_misturam():
+    grupo = SingleFlight()
+
+    def falhar():
+        time.sleep(0.2)
+        raise ConnectionError("provedor indisponível")
+
+    resultados = em_paralelo([lambda: grupo.do("a", falhar)] * 3 + [lambda: grupo.do("b", lambda: "b")])
+    assert all(isinstance(r, ConnectionError) for r in resultados[:3])
+    assert resultados[3] == "b"
+    assert grupo.get_stats()["executions"] == 2
+    with pytest.raises(ConnectionError):
+        grupo.do("a", falhar)
+
+
+def test_fingerprint_independe_da_ordem_das_chaves():
+    assert fingerprint("groq", {"a": 1, "b": 2}) == fingerprint("groq", {"b": 2, "a": 1})
+    assert fingerprint("groq", "prompt") != fingerprint("openai", "prompt")
@@ -0,0 +1,70 @@
+from core.ttl_cache import MISSING, TTLCache
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_read_through_expira_e_respeita_limite_lru():
+    relogio = Relogio()
+    cache = TTLCache(ttl=60, max_entries=2, clock=relogio)
+    consultas = []
+
+    def carregar():
+        consultas.append(1)
+        return '{"history": []}'
+
+    cache.get_or_load("u1", carregar)
+    cache.get_or_load("u1", carregar)
+    assert len(consultas) == 1
+
+    relogio.agora = 61
+    cache.get_or_load("u1", carregar)
+    assert len(consultas) == 2
+
+    cache.set("u2", None)
+    cache.set("u3", "x")
+    assert cache.get("u1") is MISSING
+    assert cache.get("u2") is None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_gravacao_atualiza_e_falha_nao_fica_em_cache():
+    cache = TTLCache(ttl=60, max_entries=10)
+    cache.set(("NexoGenesis", "last_thought"), '"novo"')
+    assert cache.get_or_load(("NexoGenesis", "last_thought"), lambda: '"antigo"') == '"novo"'
+
+    def falhar():
+        raise ConnectionError("Supabase inacessível")
+
+    try:
+        cache.get_or_load("u9", falhar)
+    except ConnectionError:
+        pass
+    assert cache.get("u9") is MISSING
+
+
+def test_carga_lenta_nao_sobrescreve_gravacao_concorrente():
+    cache = TTLCache(ttl=60, max_entries=10)
+
+    def carregar_antigo():
+        # Enquanto o banco responde, um save_* grava o valor novo (write-through)
+        cache.set("u1", '{"history": ["novo"]}')
+        return '{"history": []}'
+
+    assert cache.get_or_load("u1", carregar_antigo) == '{"history": []}'
+    assert cache.get("u1") == '{"history": ["novo"]}'
+    assert cache.get_stats()["stale_loads"] == 1
+
+    def carregar_apos_invalidar():
+        cache.invalidate("u2")
+        return "antigo"
+
+    cache.get_or_load("u2", carregar_apos_invalidar)
+    assert cache.get("u2") is MISSING
+    assert cache.get_or_load("u2", lambda: "atual") == "atual"
+    assert cache.get("u2") == "atual"
@@ -0,0 +1,69 @@
+import numpy as np
+
+from core.vector_index import NumpyVectorIndex
+
+
+def _dados(n=2000, dim=16):
+    rng = np.random.default_rng(1)
+    centros = rng.standard_normal((20, dim))
+    return (centros[rng.integers(20, size=n)] + 0.3 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_busca_exata_e_persistencia(tmp_path):
+    dados = _dados()
+    indice = NumpyVectorIndex(str(tmp_path), space="cosine")
+    indice.add([str(i) for i in range(len(dados))], dados, documents=[f"doc {i}" for i in range(len(dados))])
+
+    linhas, distancias = indice.search([dados[7]], 3)[0]
+    assert linhas[0] == 7 and abs(distancias[0]) < 1e-5
+    assert list(distancias) == sorted(distancias)
+
+    reaberto = NumpyVectorIndex(str(tmp_path), space="cosine")
+    assert reaberto.count() == len(dados)
+    assert reaberto.documents([int(reaberto.search([dados[7]], 1)[0][0][0])]) == [("doc 7", {})]
+
+
+def test_ivf_mantem_recall_alto(tmp_path):
+    dados = _dados()
+    indice = NumpyVectorIndex(str(tmp_path), space="cosine", ivf_threshold=1000, nprobe=8)
+    indice.add([str(i) for i in range(len(dados))], dados)
+    assert indice.ivf_enabled
+
+    consultas = dados[:50] + 0.05
+    exatos = [set(r) for r, _ in indice.search(consultas, 10, exact=True)]
+    aproximados = [set(r) for r, _ in indice.search(consultas, 10)]
+    recall = sum(len(a & e) for a, e in zip(aproximados, exatos)) / (10 * len(consultas))
+    assert recall >= 0.9
+
+
+def test_vetor_orfao_de_queda_nao_desalinha_linhas(tmp_path):
+    a, b = np.eye(4, dtype=np.float32)[:2]
+    indice = NumpyVectorIndex(str(tmp_path), space="cosine")
+    indice.add(["A"], [a], documents=["A"])
+    # Queda entre gravar o vetor e confirmar a linha no SQLite
+    with open(indice.matrix_path, "ab") as f:
+        f.write(a.tobytes())
+
+    reaberto = NumpyVectorIndex(str(tmp_path), space="cosine")
+    reaberto.add(["B"], [b], documents=["B"])
+    linhas, distancias = reaberto.search([b], 1)[0]
+    assert reaberto.documents([int(linhas[0])]) == [("B", {})]
+    assert abs(distancias[0]) < 1e-5
+
+
+def test_duas_instancias_no_mesmo_diretorio_nao_sobrescrevem_linhas(tmp_path):
+    x, y, z = np.eye(4, dtype=np.float32)[:3]
+    a = NumpyVectorIndex(str(tmp_path), space="cosine")
+    b = NumpyVectorIndex(str(tmp_path), space="cosine")
+    a.add(["x"], [x], documents=["x"])
+    b.add(["y"], [y], documents=["y"])
+    # a enxerga a linha gravada por b e continua a numeração depois dela
+    a.add(["z"], [z], documents=["z"])
+    assert b.count() == 3
+
+    reaberto = NumpyVectorIndex(str(tmp_path), space="cosine")
+    assert reaberto.count() == 3
+    for vetor, nome in ((x, "x"), (y, "y"), (z, "z")):
+        linhas, distancias = reaberto.search([vetor], 1)[0]
+        assert reaberto.documents([int(linhas[0])]) == [(nome, {})]
+        assert abs(distancias[0]) < 1e-5
@@ -0,0 +1,55 @@
+import pytest
+
+from core import vector_memory
+from core.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+from core.vector_memory import VectorMemory, document_id
+
+
+@pytest.fixture
+def memoria(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_memory, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(
+        vector_memory, "get_cached_embedding_function",
+        lambda fn, nome: CachedEmbeddingFunction(fn, nome, cache=EmbeddingCache(nome, path=str(tmp_path / "embeddings")))
+    )
+
+    def abrir():
+        return VectorMemory(path=str(tmp_path / "vetores"))
+
+    return abrir
+
+
+def test_busca_retorna_documento_e_metadados(memoria):
+    memoria_vetorial = memoria()
+    memoria_vetorial.salvar_ideias(
+        ["deploy da API Flask no Render", "receita de bolo de cenoura", "cache Redis para a API Flask"],
+        [{"tipo": "deploy"}, {"tipo": "culinaria"}, {"tipo": "cache"}]
+    )
+    resultados = memoria_vetorial.buscar_similaridade("API Flask com cache Redis", k=2)
+
+    assert len(resultados) == 2
+    documento, metadados = resultados[0]
+    assert documento == "cache Redis para a API Flask" and metadados == {"tipo": "cache"}
+    assert "receita de bolo de cenoura" not in [d for d, _ in resultados]
+
+    lote = memoria_vetorial.buscar_similaridade_batch(["bolo de cenoura", "deploy no Render"], k=1)
+    assert [r[0][0] for r in lote] == ["receita de bolo de cenoura", "deploy da API Flask no Render"]
+
+
+def test_mesmo_texto_nao_duplica_e_persiste_entre_instancias(memoria):
+    primeira = memoria()
+    ids = primeira.salvar_ideias(["ideia A", "ideia A", "ideia B"])
+    assert ids == [document_id("ideia A"), document_id("ideia A"), document_id("ideia B")]
+    primeira.salvar_ideia("ideia A", {"revisada": True})
+    assert primeira.collection.count() == 2
+
+    segunda = memoria()
+    assert segunda.collection.count() == 2
+    assert dict(segunda.buscar_similaridade("ideia A", k=2))["ideia A"] == {"revisada": True}
+
+
+def test_memoria_vazia_retorna_listas_vazias(memoria):
+    memoria_vetorial = memoria()
+    assert memoria_vetorial.buscar_similaridade("qualquer coisa") == []
+    assert memoria_vetorial.buscar_similaridade_batch(["a", "b"]) == [[], []]
+    assert memoria_vetorial.buscar_com_distancia("a") == []
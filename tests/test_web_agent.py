@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("playwright")
+
+from core import web_agent
+
+
+class RuntimeFalso:
+    def __init__(self):
+        self.finalizadores = []
+
+    def register_shutdown(self, fn):
+        self.finalizadores.append(fn)
+
+
+def test_um_unico_navegador_e_finalizador_por_processo(monkeypatch):
+    runtime = RuntimeFalso()
+    monkeypatch.setattr(web_agent, "get_runtime", lambda: runtime)
+    monkeypatch.setattr(web_agent, "_shared_agent", None)
+
+    # Um agente por conexão websocket: todos usam o mesmo WebAgent
+    agentes = [web_agent.get_web_agent() for _ in range(3)]
+    assert all(agente is agentes[0] for agente in agentes)
+    assert runtime.finalizadores == [agentes[0].close]
@@ -0,0 +1,120 @@
+from core.write_behind import WriteBehindQueue
+
+
+class SupabaseFalso:
+    def __init__(self):
+        self.online = True
+        self.chamadas = []
+
+    def table(self, nome):
+        banco = self
+
+        class Consulta:
+            def insert(self, linhas):
+                self.linhas = linhas
+                return self
+
+            def execute(self):
+                if not banco.online:
+                    raise ConnectionError("Supabase inacessível")
+                banco.chamadas.append((nome, self.linhas))
+
+        return Consulta()
+
+
+def test_linhas_sao_agrupadas_por_tabela_em_lotes(tmp_path):
+    banco = SupabaseFalso()
+    fila = WriteBehindQueue(banco, batch_size=10, journal_path=str(tmp_path / "j.jsonl"))
+    for i in range(25):
+        fila.enqueue("agent_memory", {"key": f"k{i}"})
+    fila.enqueue("agent_error_log", {"error_type": "x"})
+    fila.close()
+
+    tamanhos = sorted((nome, len(linhas)) for nome, linhas in banco.chamadas)
+    assert tamanhos == [("agent_error_log", 1), ("agent_memory", 5), ("agent_memory", 10), ("agent_memory", 10)]
+
+
+def test_journal_reenviado_apos_reinicio(tmp_path):
+    journal = str(tmp_path / "j.jsonl")
+    banco = SupabaseFalso()
+    banco.online = False
+    fila = WriteBehindQueue(banco, max_retries=0, journal_path=journal, sleep=lambda s: None)
+    fila.enqueue("evolution_attempts", {"cycle_number": 1})
+    fila.close()
+    assert banco.chamadas == [] and fila.get_stats()["journaled"] == 1
+
+    banco.online = True
+    nova = WriteBehindQueue(banco, journal_path=journal)
+    nova.start()
+    nova.close()
+    assert banco.chamadas == [("evolution_attempts", [{"cycle_number": 1}])]
+    assert not nova.get_stats()["journal_pending"]
+
+
+def test_linha_truncada_no_journal_nao_bloqueia_as_demais(tmp_path):
+    journal = tmp_path / "j.jsonl"
+    journal.write_text('{"table": "agent_memory", "row": {"key": "k1"}}\n{"table": "agent_mem', encoding="utf-8")
+    banco = SupabaseFalso()
+    fila = WriteBehindQueue(banco, journal_path=str(journal))
+    fila._drain_journal()
+
+    assert banco.chamadas == [("agent_memory", [{"key": "k1"}])]
+    assert fila.get_stats()["malformed"] == 1
+    assert not fila.get_stats()["journal_pending"]
+
+
+def test_journal_apos_linha_truncada_comeca_em_linha_nova(tmp_path):
+    journal = tmp_path / "j.jsonl"
+    journal.write_text('{"table": "agent_mem', encoding="utf-8")
+    banco = SupabaseFalso()
+    fila = WriteBehindQueue(banco, journal_path=str(journal))
+    fila._journal([("agent_memory", {"key": "k2"})])
+    fila._drain_journal()
+
+    assert banco.chamadas == [("agent_memory", [{"key": "k2"}])]
+
+
+class ErroPostgrest(Exception):
+    """Como o APIError do postgrest: erro da linha, não do transporte"""
+
+
+class SupabaseComValidacao(SupabaseFalso):
+    def table(self, nome):
+        consulta = super().table(nome)
+        executar = consulta.execute
+
+        def execute():
+            if any(linha.get("invalida") for linha in consulta.linhas):
+                raise ErroPostgrest('null value in column "key" violates not-null constraint')
+            executar()
+
+        consulta.execute = execute
+        return consulta
+
+
+def test_linha_invalida_nao_arrasta_o_lote(tmp_path):
+    banco = SupabaseComValidacao()
+    esperas = []
+    fila = WriteBehindQueue(banco, journal_path=str(tmp_path / "j.jsonl"), sleep=esperas.append)
+    linhas = [{"key": f"k{i}", "invalida": i == 3} for i in range(6)]
+    for linha in linhas:
+        fila.enqueue("agent_memory", linha)
+    fila.flush()
+
+    stats = fila.get_stats()
+    assert stats["inserted"] == 5 and stats["journaled"] == 0 and stats["dead_lettered"] == 1
+    assert esperas == []
+    assert not stats["journal_pending"]
+    assert "k3" in (tmp_path / "j.dead.jsonl").read_text(encoding="utf-8")
+
+
+def test_queda_do_supabase_guarda_o_lote_inteiro_sem_dividir(tmp_path):
+    banco = SupabaseFalso()
+    banco.online = False
+    fila = WriteBehindQueue(banco, max_retries=2, journal_path=str(tmp_path / "j.jsonl"), sleep=lambda s: None)
+    for i in range(6):
+        fila.enqueue("agent_memory", {"key": f"k{i}"})
+    fila.flush()
+
+    stats = fila.get_stats()
+    assert stats["journaled"] == 6 and stats["splits"] == 0 and stats["retries"] == 2